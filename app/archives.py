@@ -0,0 +1,79 @@
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import AsyncIterator, Callable, Iterable, List, Optional
+
+
+@dataclass
+class ArchiveEntry:
+    name: str
+    modified_at: Optional[datetime]
+    open_stream: Callable[[], AsyncIterator[bytes]]
+
+
+class _ChunkSink:
+    """Write-only file object that hands zipfile output back to the response instead of buffering it."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def unique_archive_name(name: str, used: set) -> str:
+    """Return ``name`` or ``name (n).ext`` so duplicate file names do not overwrite each other."""
+    candidate = name
+    path = PurePosixPath(name)
+    counter = 1
+    while candidate in used:
+        candidate = str(path.with_name(f"{path.stem} ({counter}){path.suffix}"))
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+async def stream_zip(entries: Iterable[ArchiveEntry]) -> AsyncIterator[bytes]:
+    """
+    Build a ZIP archive on the fly, yielding it chunk by chunk.
+
+    Entries are stored uncompressed (uploads are PDFs and images that do not
+    shrink) with sizes written in data descriptors, so at most one storage chunk
+    is held in memory at a time. Files missing from storage are listed in
+    ``missing_files.txt`` at the end of the archive.
+    """
+    sink = _ChunkSink()
+    missing = []
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for entry in entries:
+            stream = entry.open_stream()
+            try:
+                first_chunk = await stream.__anext__()
+            except StopAsyncIteration:
+                first_chunk = b""
+            except FileNotFoundError:
+                missing.append(entry.name)
+                continue
+
+            info = zipfile.ZipInfo(entry.name, date_time=(entry.modified_at or datetime.utcnow()).timetuple()[:6])
+            with archive.open(info, mode="w", force_zip64=True) as member:
+                member.write(first_chunk)
+                yield sink.drain()
+                async for chunk in stream:
+                    member.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+
+        if missing:
+            archive.writestr("missing_files.txt", "\n".join(missing) + "\n")
+    yield sink.drain()
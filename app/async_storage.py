@@ -0,0 +1,174 @@
+import asyncio
+from typing import AsyncIterator, Optional, Protocol
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session
+except ImportError:  # pragma: no cover - optional dependency, R2 falls back to thread offload
+    AioConfig = None
+    get_session = None
+
+from app import storage
+from app.storage import StoredFile
+
+
+class AsyncStorageBackend(Protocol):
+    async def asave(
+        self,
+        category: str,
+        filename: Optional[str],
+        content: bytes,
+        content_type: Optional[str],
+        db: Optional[Session] = None,
+    ) -> StoredFile:
+        ...
+
+    def aopen_stream(self, value: Optional[str], chunk_size: int = storage.STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        ...
+
+    async def adelete(self, value: Optional[str], db: Optional[Session] = None) -> bool:
+        ...
+
+    async def aexists(self, value: Optional[str]) -> bool:
+        ...
+
+
+class ThreadedAsyncStorage:
+    """Runs the blocking storage functions in the threadpool so handlers never block the event loop."""
+
+    async def asave(self, category, filename, content, content_type, db=None) -> StoredFile:
+        return await run_in_threadpool(storage.save_bytes, category, filename, content, content_type, db)
+
+    async def aopen_stream(self, value, chunk_size=storage.STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        async for chunk in iterate_in_threadpool(storage.open_stream(value, chunk_size)):
+            yield chunk
+
+    async def adelete(self, value, db=None) -> bool:
+        return await run_in_threadpool(storage.delete_file, value, db)
+
+    async def aexists(self, value) -> bool:
+        return await run_in_threadpool(storage.file_exists, value)
+
+
+class R2AsyncStorage:
+    """
+    Native async Cloudflare R2 access through aiobotocore.
+
+    One client, and so one connection pool, is shared by every call. It is
+    opened at startup (or on first use) and closed by close() at shutdown.
+    """
+
+    def __init__(self):
+        self._client_context = None
+        self._client = None
+        self._client_lock = asyncio.Lock()
+
+    async def open(self):
+        async with self._client_lock:
+            if self._client is None:
+                self._client_context = get_session().create_client(
+                    "s3",
+                    endpoint_url=storage.R2_ENDPOINT_URL,
+                    aws_access_key_id=storage.R2_ACCESS_KEY_ID,
+                    aws_secret_access_key=storage.R2_SECRET_ACCESS_KEY,
+                    config=AioConfig(signature_version="s3v4"),
+                    region_name="auto",
+                )
+                self._client = await self._client_context.__aenter__()
+        return self._client
+
+    async def close(self) -> None:
+        async with self._client_lock:
+            if self._client_context is not None:
+                await self._client_context.__aexit__(None, None, None)
+            self._client_context = None
+            self._client = None
+
+    async def _get_client(self):
+        return self._client or await self.open()
+
+    async def asave(self, category, filename, content, content_type, db=None) -> StoredFile:
+        key, needs_upload = storage.allocate_key(category, filename, content, content_type, db)
+        if needs_upload:
+            extra_args = {"ContentType": content_type} if content_type else {}
+            client = await self._get_client()
+            await client.put_object(Bucket=storage.R2_BUCKET, Key=key, Body=content, **extra_args)
+        return StoredFile(key=key, public_url=storage.build_public_url(key))
+
+    async def aopen_stream(self, value, chunk_size=storage.STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        key = storage.normalize_key(value)
+        if not key:
+            raise FileNotFoundError("No storage key provided")
+        if not storage.is_remote_key(key):
+            async for chunk in ThreadedAsyncStorage().aopen_stream(key, chunk_size):
+                yield chunk
+            return
+
+        client = await self._get_client()
+        try:
+            response = await client.get_object(Bucket=storage.R2_BUCKET, Key=key)
+        except client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                raise FileNotFoundError(f"Stored file not found: {key}") from e
+            raise
+        async with response["Body"] as body:
+            while True:
+                chunk = await body.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    async def adelete(self, value, db=None) -> bool:
+        if db is not None:
+            # Only writes to the deletion outbox; the worker removes the object after commit.
+            return storage.delete_file(value, db)
+        key = storage.normalize_key(value)
+        if not key or not storage.is_remote_key(key):
+            return await run_in_threadpool(storage.delete_file, key)
+        storage.release_key(key)
+        client = await self._get_client()
+        await client.delete_object(Bucket=storage.R2_BUCKET, Key=key)
+        return True
+
+    async def aexists(self, value) -> bool:
+        key = storage.normalize_key(value)
+        if not key or not storage.is_remote_key(key):
+            return await run_in_threadpool(storage.file_exists, key)
+        client = await self._get_client()
+        try:
+            await client.head_object(Bucket=storage.R2_BUCKET, Key=key)
+        except client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                return False
+            raise
+        return True
+
+
+_async_storage: Optional[AsyncStorageBackend] = None
+
+
+def get_async_storage() -> AsyncStorageBackend:
+    """Async backend for the configured STORAGE_PROVIDER."""
+    global _async_storage
+    if _async_storage is None:
+        if storage.STORAGE_PROVIDER == "cloudflare_r2" and get_session is not None:
+            _async_storage = R2AsyncStorage()
+        else:
+            _async_storage = ThreadedAsyncStorage()
+    return _async_storage
+
+
+
+async def start_async_storage() -> None:
+    """Open the shared R2 client at startup so the first request does not pay for it."""
+    backend = get_async_storage()
+    if isinstance(backend, R2AsyncStorage):
+        await backend.open()
+
+
+async def close_async_storage() -> None:
+    if isinstance(_async_storage, R2AsyncStorage):
+        await _async_storage.close()
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import os
+from contextlib import closing
+from typing import List
+
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+from app.idempotency import purge_expired_idempotency_records
+from app.matching import MATCH_REFRESH_BATCH_SIZE, drain_match_queue
+from app.storage import STORAGE_DELETION_BATCH_SIZE, drain_deletion_queue
+
+logger = logging.getLogger(__name__)
+
+STORAGE_DELETION_INTERVAL_SECONDS = float(os.getenv("STORAGE_DELETION_INTERVAL_SECONDS", "30"))
+MATCH_REFRESH_INTERVAL_SECONDS = float(os.getenv("MATCH_REFRESH_INTERVAL_SECONDS", "60"))
+
+_tasks: List[asyncio.Task] = []
+
+
+def drain_pending_deletions() -> int:
+    """Drain the storage deletion outbox until no due rows remain."""
+    total = 0
+    with closing(SessionLocal()) as db:
+        while True:
+            handled = drain_deletion_queue(db)
+            total += handled
+            if handled < STORAGE_DELETION_BATCH_SIZE:
+                return total
+
+
+def purge_expired_records() -> int:
+    with closing(SessionLocal()) as db:
+        return purge_expired_idempotency_records(db)
+
+
+async def _run_deletion_worker() -> None:
+    while True:
+        try:
+            handled = await run_in_threadpool(drain_pending_deletions)
+            if handled:
+                logger.info(f"Processed {handled} pending storage deletions")
+            await run_in_threadpool(purge_expired_records)
+        except Exception as e:
+            logger.error(f"Storage deletion worker failed: {e}")
+        await asyncio.sleep(STORAGE_DELETION_INTERVAL_SECONDS)
+
+
+def drain_pending_matches() -> int:
+    """Recompute matches for every queued client and job."""
+    total = 0
+    with closing(SessionLocal()) as db:
+        while True:
+            handled = drain_match_queue(db)
+            total += handled
+            if handled < MATCH_REFRESH_BATCH_SIZE:
+                return total
+
+
+async def _run_match_worker() -> None:
+    while True:
+        try:
+            handled = await run_in_threadpool(drain_pending_matches)
+            if handled:
+                logger.info(f"Refreshed job matches for {handled} changed clients and jobs")
+        except Exception as e:
+            logger.error(f"Job match worker failed: {e}")
+        await asyncio.sleep(MATCH_REFRESH_INTERVAL_SECONDS)
+
+
+def start_background_workers() -> None:
+    _tasks.append(asyncio.create_task(_run_deletion_worker()))
+    _tasks.append(asyncio.create_task(_run_match_worker()))
+
+
+async def stop_background_workers() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -4,10 +4,11 @@ from contextlib import closing
 from datetime import datetime
 
 from sqlalchemy import inspect, text
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from app.database import get_db
 from app.models import User, UserRole
+from app.onboarding import backfill_onboarding_completion
 from app.utils import get_password_hash
 
 
@@ -45,10 +46,12 @@ def ensure_platform_schema(engine) -> None:
     profile_columns = {column["name"] for column in inspector.get_columns("client_profiles")}
     document_columns = {column["name"] for column in inspector.get_columns("documents")}
     chat_columns = {column["name"] for column in inspector.get_columns("chat_messages")}
+    job_columns = {column["name"] for column in inspector.get_columns("job_opportunities")}
 
     profile_statements = []
     document_statements = []
     chat_statements = []
+    job_statements = []
 
     if "application_status" not in profile_columns:
         profile_statements.append(
@@ -80,6 +83,15 @@ def ensure_platform_schema(engine) -> None:
         )
     if "onboarding_completed_at" not in profile_columns:
         profile_statements.append(f"ALTER TABLE client_profiles ADD COLUMN onboarding_completed_at {timestamp_type}")
+    if "profile_photo_thumbnails_at" not in profile_columns:
+        profile_statements.append(f"ALTER TABLE client_profiles ADD COLUMN profile_photo_thumbnails_at {timestamp_type}")
+    if "completion_percentage" not in profile_columns:
+        profile_statements.append("ALTER TABLE client_profiles ADD COLUMN completion_percentage FLOAT")
+    if "missing_fields" not in profile_columns:
+        profile_statements.append("ALTER TABLE client_profiles ADD COLUMN missing_fields INTEGER")
+    profile_statements.append(
+        "CREATE INDEX IF NOT EXISTS ix_client_profiles_completion_percentage ON client_profiles (completion_percentage)"
+    )
 
     if "application_id" not in document_columns:
         document_statements.append("ALTER TABLE documents ADD COLUMN application_id VARCHAR")
@@ -117,6 +129,40 @@ def ensure_platform_schema(engine) -> None:
     if "read_at" not in chat_columns:
         chat_statements.append(f"ALTER TABLE chat_messages ADD COLUMN read_at {timestamp_type}")
 
+    if "application_count" not in job_columns:
+        job_statements.append("ALTER TABLE job_opportunities ADD COLUMN application_count INTEGER NOT NULL DEFAULT 0")
+    if "last_applied_at" not in job_columns:
+        job_statements.append(f"ALTER TABLE job_opportunities ADD COLUMN last_applied_at {timestamp_type}")
+    if job_statements:
+        # Backfill the denormalized counters once, when the columns first appear
+        job_statements.append(
+            """
+            UPDATE job_opportunities SET
+                application_count = (
+                    SELECT COUNT(*) FROM job_applications WHERE job_applications.job_id = job_opportunities.id
+                ),
+                last_applied_at = (
+                    SELECT MAX(created_at) FROM job_applications WHERE job_applications.job_id = job_opportunities.id
+                )
+            """
+        )
+
+    if "search_text" not in job_columns:
+        job_statements.append("ALTER TABLE job_opportunities ADD COLUMN search_text TEXT")
+        # Mirrors app.job_search.build_job_search_text
+        job_statements.append(
+            """
+            UPDATE job_opportunities SET search_text = LOWER(
+                title || ' ' || company_name || COALESCE(' ' || requirements, '')
+            )
+            """
+        )
+    job_statements.extend([
+        "CREATE INDEX IF NOT EXISTS idx_job_opportunities_active_created ON job_opportunities (is_active, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_job_opportunities_active_deadline ON job_opportunities (is_active, application_deadline)",
+        "CREATE INDEX IF NOT EXISTS idx_job_opportunities_country ON job_opportunities (LOWER(country))",
+    ])
+
     status_history_table = inspector.has_table("status_history")
     status_history_statement = None
     if not status_history_table:
@@ -134,10 +180,43 @@ def ensure_platform_schema(engine) -> None:
         """
 
     with engine.begin() as connection:
-        for statement in profile_statements + document_statements + chat_statements:
+        for statement in profile_statements + document_statements + chat_statements + job_statements:
             connection.execute(text(statement))
         if status_history_statement:
             connection.execute(text(status_history_statement))
+        backfill_onboarding_completion(connection)
+
+    ensure_unique_job_applications(engine)
+    if dialect == "postgresql":
+        ensure_job_search_trigram_index(engine)
+
+
+def ensure_unique_job_applications(engine) -> None:
+    """Add the one-application-per-client-per-job index to databases created before it existed."""
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_job_applications_job_client "
+                "ON job_applications (job_id, client_id)"
+            ))
+    except IntegrityError as exc:
+        print(
+            "Duplicate job applications exist; remove them so uq_job_applications_job_client "
+            f"can be created and duplicate submissions are rejected: {exc}"
+        )
+
+
+def ensure_job_search_trigram_index(engine) -> None:
+    """Back keyword search with a pg_trgm GIN index where the extension can be enabled."""
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_job_opportunities_search_trgm "
+                "ON job_opportunities USING gin (search_text gin_trgm_ops)"
+            ))
+    except SQLAlchemyError as exc:
+        print(f"pg_trgm unavailable; job keyword search will scan job_opportunities: {exc}")
 
 
 def ensure_default_super_admin() -> None:
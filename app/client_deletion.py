@@ -0,0 +1,73 @@
+from typing import Dict
+
+from sqlalchemy import delete, or_, update
+from sqlalchemy.orm import Session
+
+from app.models import (
+    AdminAuditLog,
+    ChatMessage,
+    ClientProfile,
+    Document,
+    EducationRecord,
+    EmploymentRecord,
+    JobApplication,
+    JobMatch,
+    StatusHistory,
+    User,
+)
+from app.job_counters import recount_job_applications
+from app.storage import delete_file
+from app.thumbnails import delete_profile_photo
+
+
+def delete_client_records(db: Session, client: ClientProfile, user: User) -> Dict[str, int]:
+    """
+    Remove a client, its user account and every dependent row with set-based statements.
+
+    Nothing is committed here; the caller commits once so the whole delete is a
+    single transaction. Stored files are queued in the storage deletion outbox
+    in that same transaction and removed by the deletion worker after commit.
+    Audit log entries about the user are kept with their target cleared.
+    """
+    client_id = client.id
+    user_id = user.id
+
+    file_urls = [value for (value,) in db.query(Document.file_url).filter(Document.client_id == client_id).all()]
+    for file_url in file_urls:
+        delete_file(file_url, db)
+    delete_profile_photo(client, db)
+    db.flush()
+    applied_job_ids = [
+        value for (value,) in db.query(JobApplication.job_id).filter(JobApplication.client_id == client_id).distinct().all()
+    ]
+
+    statements = (
+        ("documents", delete(Document).where(Document.client_id == client_id)),
+        (
+            "chat_messages",
+            delete(ChatMessage).where(or_(
+                ChatMessage.client_id == client_id,
+                ChatMessage.sender_id == user_id,
+                ChatMessage.receiver_id == user_id,
+            )),
+        ),
+        ("status_history", delete(StatusHistory).where(StatusHistory.client_id == client_id)),
+        ("education_records", delete(EducationRecord).where(EducationRecord.client_id == client_id)),
+        ("employment_records", delete(EmploymentRecord).where(EmploymentRecord.client_id == client_id)),
+        ("job_applications", delete(JobApplication).where(JobApplication.client_id == client_id)),
+        ("job_matches", delete(JobMatch).where(JobMatch.client_id == client_id)),
+    )
+    counts = {}
+    for name, statement in statements:
+        counts[name] = db.execute(statement, execution_options={"synchronize_session": False}).rowcount
+    recount_job_applications(db, applied_job_ids)
+
+    db.execute(
+        update(AdminAuditLog).where(AdminAuditLog.target_user_id == user_id).values(target_user_id=None),
+        execution_options={"synchronize_session": False},
+    )
+    db.execute(delete(ClientProfile).where(ClientProfile.id == client_id), execution_options={"synchronize_session": False})
+    db.execute(delete(User).where(User.id == user_id), execution_options={"synchronize_session": False})
+    db.expunge(client)
+    db.expunge(user)
+    return counts
@@ -0,0 +1,191 @@
+import csv
+import io
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models import AdminAuditLog, ClientProfile, ClientStatus, User, UserRole
+from app.matching import queue_match_refresh
+from app.numbering import reserve_client_numbers
+from app.onboarding import evaluate_onboarding_row
+from app.schemas import AdminClientCreateRequest, ApplicationWorkflowStatusEnum, ClientLifecycleStatusEnum
+from app.utils import get_password_hash
+from app.workers import get_process_pool
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 200
+IMPORT_MAX_BYTES = 5 * 1024 * 1024
+IMPORT_FIELDS = ("first_name", "last_name", "phone_number", "password", "email", "interested_job_category")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def parse_import_rows(content: bytes, filename: Optional[str], content_type: Optional[str]) -> List[Dict[str, Any]]:
+    """Decode an uploaded CSV or JSON file into a list of raw row dicts."""
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise ImportFormatError("Import file must be UTF-8 encoded") from exc
+
+    is_json = (content_type or "").endswith("json") or (filename or "").lower().endswith(".json")
+    if is_json:
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise ImportFormatError(f"Invalid JSON: {exc.msg}") from exc
+        if isinstance(rows, dict):
+            rows = rows.get("clients")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ImportFormatError("JSON import must be a list of client objects")
+        return rows
+
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise ImportFormatError("CSV import needs a header row")
+    return [
+        {key.strip(): value.strip() for key, value in row.items() if key and value is not None and value.strip()}
+        for row in reader
+    ]
+
+
+def _validate_chunk(rows, start_index, seen_phones, seen_emails, db):
+    """Validate a chunk, returning (valid (row_number, request) pairs, per-row failures)."""
+    results = []
+    valid = []
+    for offset, raw in enumerate(rows):
+        row_number = start_index + offset + 1
+        try:
+            request = AdminClientCreateRequest(**{field: raw.get(field) for field in IMPORT_FIELDS if raw.get(field) is not None})
+        except ValidationError as exc:
+            errors = [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()]
+            results.append({"row": row_number, "status": "invalid", "errors": errors})
+            continue
+        if request.phone_number in seen_phones or (request.email and request.email in seen_emails):
+            results.append({"row": row_number, "status": "duplicate", "errors": ["Repeated earlier in this file"]})
+            continue
+        seen_phones.add(request.phone_number)
+        if request.email:
+            seen_emails.add(request.email)
+        valid.append((row_number, request))
+
+    phones = [request.phone_number for _, request in valid]
+    emails = [request.email for _, request in valid if request.email]
+    taken_phones = {value for (value,) in db.query(User.phone_number).filter(User.phone_number.in_(phones)).all()}
+    taken_emails = (
+        {value for (value,) in db.query(User.email).filter(User.email.in_(emails)).all()} if emails else set()
+    )
+    accepted = []
+    for row_number, request in valid:
+        if request.phone_number in taken_phones:
+            results.append({"row": row_number, "status": "duplicate", "errors": ["Phone number already registered"]})
+        elif request.email and request.email in taken_emails:
+            results.append({"row": row_number, "status": "duplicate", "errors": ["Email already registered"]})
+        else:
+            accepted.append((row_number, request))
+    return accepted, results
+
+
+def _insert_chunk(db: Session, accepted, password_hashes, admin_user_id: str) -> List[Dict[str, Any]]:
+    now = datetime.utcnow()
+    numbers = reserve_client_numbers(db, len(accepted))
+    users, profiles, audit_logs, results = [], [], [], []
+    for (row_number, request), password_hash, (serial_number, registration_number) in zip(accepted, password_hashes, numbers):
+        user_id = str(uuid.uuid4())
+        users.append({
+            "id": user_id,
+            "phone_number": request.phone_number,
+            "email": request.email,
+            "password_hash": password_hash,
+            "role": UserRole.client,
+            "is_active": True,
+            "email_verified": True,
+            "must_change_password": True,
+        })
+        profile = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "first_name": request.first_name,
+            "last_name": request.last_name,
+            "contact_1": request.phone_number,
+            "registration_date": now,
+            "serial_number": serial_number,
+            "registration_number": registration_number,
+            "status": ClientStatus.new,
+            "application_status": ApplicationWorkflowStatusEnum.pending_profile_completion.value,
+            "client_lifecycle_status": ClientLifecycleStatusEnum.new_lead.value,
+            "created_by_admin": True,
+            "position_applied_for": request.interested_job_category,
+            "last_modified_by": admin_user_id,
+        }
+        completion = evaluate_onboarding_row(profile)
+        profile["completion_percentage"] = completion.percentage
+        profile["missing_fields"] = completion.missing_mask
+        profiles.append(profile)
+        audit_logs.append({
+            "id": str(uuid.uuid4()),
+            "actor_user_id": admin_user_id,
+            "target_user_id": user_id,
+            "action": "create_client_account",
+            "details": f"Imported client account for {request.phone_number}",
+        })
+        results.append({
+            "row": row_number,
+            "status": "created",
+            "user_id": user_id,
+            "serial_number": serial_number,
+            "registration_number": registration_number,
+        })
+
+    db.execute(insert(User), users)
+    db.execute(insert(ClientProfile), profiles)
+    db.execute(insert(AdminAuditLog), audit_logs)
+    queue_match_refresh(db, client_ids=[profile["id"] for profile in profiles])
+    db.commit()
+    return results
+
+
+def run_client_import(db: Session, rows: List[Dict[str, Any]], admin_user: User) -> Iterator[str]:
+    """
+    Import clients chunk by chunk, yielding NDJSON lines.
+
+    Every row gets a ``row`` line with its outcome, each chunk ends with a
+    ``progress`` line and the stream closes with a ``summary`` line.
+    """
+    total = len(rows)
+    counts = {"created": 0, "invalid": 0, "duplicate": 0, "failed": 0}
+    seen_phones, seen_emails = set(), set()
+    pool = get_process_pool()
+    admin_user_id = admin_user.id
+
+    for start in range(0, total, IMPORT_CHUNK_SIZE):
+        chunk = rows[start:start + IMPORT_CHUNK_SIZE]
+        accepted, results = _validate_chunk(chunk, start, seen_phones, seen_emails, db)
+        if accepted:
+            password_hashes = list(pool.map(get_password_hash, [request.password for _, request in accepted]))
+            try:
+                results.extend(_insert_chunk(db, accepted, password_hashes, admin_user_id))
+            except SQLAlchemyError as e:
+                db.rollback()
+                logger.error(f"Client import chunk starting at row {start + 1} failed: {e}")
+                results.extend(
+                    {"row": row_number, "status": "failed", "errors": ["Could not save this row"]}
+                    for row_number, _ in accepted
+                )
+
+        for result in sorted(results, key=lambda item: item["row"]):
+            counts[result["status"]] += 1
+            yield json.dumps({"type": "row", **result}) + "\n"
+        processed = min(start + IMPORT_CHUNK_SIZE, total)
+        yield json.dumps({"type": "progress", "processed": processed, "total": total, **counts}) + "\n"
+
+    yield json.dumps({"type": "summary", "total": total, **counts}) + "\n"
@@ -0,0 +1,199 @@
+import gzip
+import os
+import zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency, only gzip is offered without it
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Already compressed, or served as files the client may fetch in ranges.
+UNCOMPRESSED_PATH_PREFIXES = ("/api/uploads",)
+UNCOMPRESSED_CONTENT_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/x-7z-compressed",
+    "application/octet-stream",
+    "application/vnd.openxmlformats-officedocument.",
+)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, preferring br at equal weight."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if coding:
+            weights[coding] = weight
+    best, best_weight = None, 0.0
+    for coding in available_encodings():
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it, so streamed responses keep arriving incrementally."""
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def compress_body(encoding: str, body: bytes, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with br or gzip as the client's Accept-Encoding allows.
+
+    Bodies under ``minimum_size``, responses that already carry a
+    Content-Encoding or Content-Range, and media that is already compressed
+    (UNCOMPRESSED_CONTENT_TYPES, the /api/uploads mount) pass through as they
+    are. Streaming responses are compressed chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_BYTES,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(UNCOMPRESSED_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = b""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value
+                break
+        encoding = negotiate_encoding(accept_encoding.decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self, encoding)(self.app, scope, receive, send)
+
+
+class _CompressedResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.start_message = None
+        # None until the first body chunk decides; then True to compress, False to pass through
+        self.compressing: Optional[bool] = None
+        self.compressor: Optional[_Compressor] = None
+
+    async def __call__(self, app, scope, receive, send):
+        self.send = send
+        await app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = {name.lower(): value for name, value in message.get("headers", [])}
+            content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+            if (
+                message["status"] < 200
+                or message["status"] in (204, 304)
+                or b"content-encoding" in headers
+                or b"content-range" in headers
+                or content_type.startswith(UNCOMPRESSED_CONTENT_TYPES)
+            ):
+                self.compressing = False
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressing is False:
+            await self.send(message)
+            return
+        if self.compressing is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.compressing = False
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.compressing = True
+            if more_body:
+                self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+                await self.send(self._compressed_start(None))
+            else:
+                compressed = compress_body(self.encoding, body, self.middleware.gzip_level, self.middleware.brotli_quality)
+                await self.send(self._compressed_start(len(compressed)))
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+
+        chunk = self.compressor.compress(body) if body else b""
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _compressed_start(self, content_length: Optional[int]) -> dict:
+        headers: List[Tuple[bytes, bytes]] = []
+        vary = []
+        for name, value in self.start_message.get("headers", []):
+            lowered = name.lower()
+            if lowered == b"content-length":
+                continue
+            if lowered == b"vary":
+                vary.append(value)
+                continue
+            if lowered == b"etag" and not value.startswith(b"W/"):
+                # The compressed body is a different representation of the same content
+                value = b"W/" + value
+            headers.append((name, value))
+        vary.append(b"Accept-Encoding")
+        headers.append((b"vary", b", ".join(vary)))
+        headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        return {**self.start_message, "headers": headers}
@@ -1,5 +1,9 @@
 # database.py
-from sqlalchemy import create_engine
+from typing import Any, Dict, List
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -24,6 +28,23 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def insert_ignoring_conflicts(db, model, rows: List[Dict[str, Any]]) -> None:
+    """Insert rows, skipping any that collide with an existing primary or unique key."""
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        db.execute(postgresql.insert(model).on_conflict_do_nothing(), rows)
+    elif dialect == "sqlite":
+        db.execute(sqlite.insert(model).on_conflict_do_nothing(), rows)
+    else:
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(model).values(**row))
+            except IntegrityError:
+                pass
+
 def get_db():
     db = SessionLocal()
     try:
@@ -0,0 +1,92 @@
+import csv
+import enum
+import io
+import tempfile
+from typing import Any, Iterable, Iterator, Sequence
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+except ImportError:  # pragma: no cover - optional dependency, XLSX export is disabled without it
+    Workbook = None
+    WriteOnlyCell = None
+    ILLEGAL_CHARACTERS_RE = None
+
+# Rows buffered before a chunk is handed to the response.
+EXPORT_FLUSH_ROWS = 500
+EXPORT_CHUNK_SIZE = 256 * 1024
+XLSX_SPOOL_MAX_BYTES = 16 * 1024 * 1024
+# Spreadsheet apps run CSV cells starting with these as formulas; client-entered text must stay text.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def xlsx_export_available() -> bool:
+    return Workbook is not None
+
+
+def _export_value(value: Any) -> Any:
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def _csv_value(value: Any) -> Any:
+    value = _export_value(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _xlsx_value(sheet, value: Any) -> Any:
+    """
+    XLSX cells are typed, so only a leading "=" turns a string into a formula;
+    those are written as explicit string cells and everything else, such as
+    "+256..." phone numbers, is stored exactly as entered.
+    """
+    value = _export_value(value)
+    if not isinstance(value, str):
+        return value
+    value = ILLEGAL_CHARACTERS_RE.sub("", value)
+    if not value.startswith("="):
+        return value
+    cell = WriteOnlyCell(sheet, value=value)
+    cell.data_type = "s"
+    return cell
+
+
+def iter_csv(headers: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """Encode rows as CSV, yielding a chunk every EXPORT_FLUSH_ROWS rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")  # lets Excel detect UTF-8
+    writer.writerow(headers)
+    for index, row in enumerate(rows, 1):
+        writer.writerow([_csv_value(value) for value in row])
+        if index % EXPORT_FLUSH_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_xlsx(headers: Sequence[str], rows: Iterable[Sequence[Any]], sheet_title: str = "Export") -> Iterator[bytes]:
+    """
+    Write rows to a write-only workbook and stream the saved file.
+
+    Write-only sheets keep rows out of memory, but the XLSX container can only
+    be produced once every row is written, so the saved workbook is spooled
+    (in memory up to XLSX_SPOOL_MAX_BYTES, then on disk) before streaming.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title)
+    sheet.append(list(headers))
+    for row in rows:
+        sheet.append([_xlsx_value(sheet, value) for value in row])
+
+    with tempfile.SpooledTemporaryFile(max_size=XLSX_SPOOL_MAX_BYTES) as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(EXPORT_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,396 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from app.database import SessionLocal, insert_ignoring_conflicts
+from app.models import IdempotencyRecord
+from app.utils import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 60 * 60)))
+IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "database").strip().lower()
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+# A reservation lasts this long; the middleware renews it while its request is still
+# running, so it only lapses once the process holding it has died.
+IDEMPOTENCY_PENDING_SECONDS = int(os.getenv("IDEMPOTENCY_PENDING_SECONDS", "120"))
+IDEMPOTENCY_MAX_RESPONSE_BYTES = 1024 * 1024
+IDEMPOTENCY_MEMORY_MAX_ENTRIES = 10000
+
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Responses under these paths carry access tokens, which must never be written to the store.
+UNSTORED_PATH_PREFIXES = ("/api/auth/",)
+# Transient outcomes the client should be able to retry with the same key.
+_UNCACHED_STATUSES = {408, 409, 425, 429}
+_UNSTORED_HEADERS = {b"date", b"server", b"set-cookie"}
+
+
+@dataclass
+class StoredResponse:
+    request_hash: str
+    status_code: int
+    headers: List[Tuple[bytes, bytes]] = field(default_factory=list)
+    body: bytes = b""
+
+
+# What a store returns when asked to reserve a key: a finished response to replay,
+# the reservation token for a fresh key, or None when another request holds it.
+Reservation = Union[StoredResponse, str, None]
+
+
+class MemoryIdempotencyStore:
+    """Per-process store; only suitable when the API runs as a single worker process."""
+
+    def __init__(self, ttl: int, max_entries: int = IDEMPOTENCY_MEMORY_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, str, str], Tuple[float, Union[StoredResponse, str]]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, user_id: str, key: str, scope: str) -> Reservation:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((user_id, key, scope))
+            if entry is not None and entry[0] > now:
+                return entry[1] if isinstance(entry[1], StoredResponse) else None
+            if len(self._entries) >= self.max_entries:
+                self._prune(now)
+            token = uuid.uuid4().hex
+            self._entries[(user_id, key, scope)] = (now + IDEMPOTENCY_PENDING_SECONDS, token)
+            return token
+
+    def complete(self, user_id: str, key: str, scope: str, token: str, response: StoredResponse) -> None:
+        with self._lock:
+            entry = self._entries.get((user_id, key, scope))
+            if entry is not None and entry[1] == token:
+                self._entries[(user_id, key, scope)] = (time.monotonic() + self.ttl, response)
+
+    def extend(self, user_id: str, key: str, scope: str, token: str) -> None:
+        with self._lock:
+            entry = self._entries.get((user_id, key, scope))
+            if entry is not None and entry[1] == token:
+                self._entries[(user_id, key, scope)] = (time.monotonic() + IDEMPOTENCY_PENDING_SECONDS, token)
+
+    def release(self, user_id: str, key: str, scope: str, token: str) -> None:
+        with self._lock:
+            entry = self._entries.get((user_id, key, scope))
+            if entry is not None and entry[1] == token:
+                del self._entries[(user_id, key, scope)]
+
+    def _prune(self, now: float) -> None:
+        for entry_key in [entry_key for entry_key, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[entry_key]
+        # Still full of live entries: drop the ones closest to expiring
+        overflow = len(self._entries) - self.max_entries + 1
+        if overflow > 0:
+            for entry_key in sorted(self._entries, key=lambda item: self._entries[item][0])[:overflow]:
+                del self._entries[entry_key]
+
+
+class DatabaseIdempotencyStore:
+    """
+    Store backed by idempotency_records, shared by every worker process.
+
+    A pending row (status_code 0) holds the key while its request runs; its
+    request_hash carries the reservation token until the response is saved.
+    """
+
+    def __init__(self, ttl: int, session_factory=SessionLocal):
+        self.ttl = ttl
+        self.session_factory = session_factory
+
+    def reserve(self, user_id: str, key: str, scope: str) -> Reservation:
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        with closing(self.session_factory()) as db:
+            db.execute(
+                delete(IdempotencyRecord).where(*self._identity(user_id, key, scope), IdempotencyRecord.expires_at <= now),
+                execution_options={"synchronize_session": False},
+            )
+            insert_ignoring_conflicts(db, IdempotencyRecord, [{
+                "user_id": user_id,
+                "idempotency_key": key,
+                "scope": scope,
+                "request_hash": token,
+                "status_code": 0,
+                "response_body": "",
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=IDEMPOTENCY_PENDING_SECONDS),
+            }])
+            db.commit()
+            record = db.get(IdempotencyRecord, (user_id, key, scope))
+            if record is None:
+                return None
+            if record.request_hash == token:
+                return token
+            if record.status_code == 0:
+                return None
+            stored = json.loads(record.response_body)
+            return StoredResponse(
+                request_hash=record.request_hash,
+                status_code=record.status_code,
+                headers=[(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored["headers"]],
+                body=base64.b64decode(stored["body"]),
+            )
+
+    def complete(self, user_id: str, key: str, scope: str, token: str, response: StoredResponse) -> None:
+        body = json.dumps({
+            "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in response.headers],
+            "body": base64.b64encode(response.body).decode("ascii"),
+        })
+        with closing(self.session_factory()) as db:
+            db.execute(
+                update(IdempotencyRecord)
+                .where(*self._identity(user_id, key, scope), IdempotencyRecord.request_hash == token)
+                .values(
+                    request_hash=response.request_hash,
+                    status_code=response.status_code,
+                    response_body=body,
+                    expires_at=datetime.utcnow() + timedelta(seconds=self.ttl),
+                ),
+                execution_options={"synchronize_session": False},
+            )
+            db.commit()
+
+    def extend(self, user_id: str, key: str, scope: str, token: str) -> None:
+        with closing(self.session_factory()) as db:
+            db.execute(
+                update(IdempotencyRecord)
+                .where(*self._identity(user_id, key, scope), IdempotencyRecord.request_hash == token)
+                .values(expires_at=datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_PENDING_SECONDS)),
+                execution_options={"synchronize_session": False},
+            )
+            db.commit()
+
+    def release(self, user_id: str, key: str, scope: str, token: str) -> None:
+        with closing(self.session_factory()) as db:
+            db.execute(
+                delete(IdempotencyRecord).where(*self._identity(user_id, key, scope), IdempotencyRecord.request_hash == token),
+                execution_options={"synchronize_session": False},
+            )
+            db.commit()
+
+    @staticmethod
+    def _identity(user_id: str, key: str, scope: str):
+        return (
+            IdempotencyRecord.user_id == user_id,
+            IdempotencyRecord.idempotency_key == key,
+            IdempotencyRecord.scope == scope,
+        )
+
+
+def build_idempotency_store():
+    if IDEMPOTENCY_BACKEND == "memory":
+        return MemoryIdempotencyStore(ttl=IDEMPOTENCY_TTL_SECONDS)
+    return DatabaseIdempotencyStore(ttl=IDEMPOTENCY_TTL_SECONDS)
+
+
+def purge_expired_idempotency_records(db: Session) -> int:
+    deleted = db.execute(
+        delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= datetime.utcnow()),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+class _RequestFingerprint:
+    """
+    SHA-256 of a request body, fed chunk by chunk.
+
+    Multipart bodies are delimited by a boundary the client picks at random on
+    every send, so each occurrence of it is hashed as a fixed marker instead;
+    a retry of the same upload then fingerprints the same as the original.
+    """
+
+    _BOUNDARY_MARKER = b"\x00boundary\x00"
+
+    def __init__(self, headers: Dict[bytes, bytes]):
+        self._digest = hashlib.sha256()
+        self._boundary = b""
+        self._pending = b""
+        content_type = headers.get(b"content-type", b"")
+        media_type, _, params = content_type.partition(b";")
+        media_type = media_type.strip().lower()
+        if media_type == b"multipart/form-data":
+            for param in params.split(b";"):
+                name, _, value = param.strip().partition(b"=")
+                if name.lower() == b"boundary" and value:
+                    self._boundary = b"--" + value.strip(b'"')
+        self._digest.update(media_type + b"\n")
+
+    def update(self, chunk: bytes) -> None:
+        if not self._boundary:
+            self._digest.update(chunk)
+            return
+        pieces = (self._pending + chunk).split(self._boundary)
+        for piece in pieces[:-1]:
+            self._digest.update(piece)
+            self._digest.update(self._BOUNDARY_MARKER)
+        # Hold back enough of the tail to catch a boundary split across chunks
+        tail = pieces[-1]
+        keep = len(self._boundary) - 1
+        self._digest.update(tail[:-keep] if len(tail) > keep else b"")
+        self._pending = tail[-keep:] if len(tail) > keep else tail
+
+    def hexdigest(self) -> str:
+        digest = self._digest.copy()
+        digest.update(self._pending)
+        return digest.hexdigest()
+
+
+def _request_user(headers: Dict[bytes, bytes]) -> Optional[str]:
+    """User id from the bearer token; None without one or for a token that will be rejected."""
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if not token or scheme.lower() != "bearer":
+        return None
+    try:
+        return decode_access_token(token).get("sub")
+    except Exception:
+        return None
+
+
+class IdempotencyMiddleware:
+    """
+    Replay the stored response for a repeated Idempotency-Key instead of running the handler again.
+
+    Keys are scoped to (user, key, method and path). The first request with a
+    key reserves it, renewing the reservation every third of
+    IDEMPOTENCY_PENDING_SECONDS for as long as the handler runs; a concurrent
+    repeat gets 409 until it finishes. Its
+    response is stored unless it failed with a 5xx or transient status, so a
+    retry after an error runs again. Reusing a key with a different body is
+    rejected with 422. Requests without the header, unauthenticated requests
+    and the auth routes (UNSTORED_PATH_PREFIXES) pass straight through.
+    """
+
+    def __init__(self, app, store=None):
+        self.app = app
+        self.store = store or build_idempotency_store()
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in IDEMPOTENT_METHODS
+            or scope["path"].startswith(UNSTORED_PATH_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if b"idempotency-key" not in headers:
+            await self.app(scope, receive, send)
+            return
+        key = headers[b"idempotency-key"].decode("latin-1").strip()
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            response = JSONResponse(
+                {"detail": f"Idempotency-Key must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters"}, status_code=400
+            )
+            await response(scope, receive, send)
+            return
+        user_id = _request_user(headers)
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        route = f"{scope['method']} {scope['path']}"
+        if scope.get("query_string"):
+            route += f"?{scope['query_string'].decode('latin-1')}"
+        reservation = await run_in_threadpool(self.store.reserve, user_id, key, route)
+        if reservation is None:
+            response = JSONResponse({"detail": "A request with this Idempotency-Key is still in progress"}, status_code=409)
+            await response(scope, receive, send)
+            return
+        if isinstance(reservation, StoredResponse):
+            await self._replay(reservation, headers, scope, receive, send)
+            return
+        await self._execute(user_id, key, route, reservation, headers, scope, receive, send)
+
+    async def _keep_reserved(self, user_id, key, route, token):
+        """Renew the reservation so a long-running handler never lets a retry in."""
+        while True:
+            await asyncio.sleep(IDEMPOTENCY_PENDING_SECONDS / 3)
+            try:
+                await run_in_threadpool(self.store.extend, user_id, key, route, token)
+            except Exception as e:
+                logger.warning(f"Could not renew idempotency reservation for {route}: {e}")
+
+    async def _replay(self, stored: StoredResponse, headers, scope, receive, send):
+        digest = _RequestFingerprint(headers)
+        while True:
+            message = await receive()
+            digest.update(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        if digest.hexdigest() != stored.request_hash:
+            response = JSONResponse({"detail": "Idempotency-Key was already used with a different request"}, status_code=422)
+            await response(scope, receive, send)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": stored.status_code,
+            "headers": stored.headers + [(b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
+
+    async def _execute(self, user_id, key, route, token, headers, scope, receive, send):
+        digest = _RequestFingerprint(headers)
+        captured = {"status": 500, "headers": [], "body": bytearray(), "storable": True}
+
+        async def hashing_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                digest.update(message.get("body", b""))
+            return message
+
+        async def capturing_send(message):
+            if message["type"] == "http.response.start":
+                captured["status"] = message["status"]
+                captured["headers"] = [
+                    (name, value) for name, value in message.get("headers", []) if name.lower() not in _UNSTORED_HEADERS
+                ]
+            elif message["type"] == "http.response.body" and captured["storable"]:
+                captured["body"] += message.get("body", b"")
+                if len(captured["body"]) > IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                    captured["storable"] = False
+                    captured["body"] = bytearray()
+            await send(message)
+
+        renewal = asyncio.create_task(self._keep_reserved(user_id, key, route, token))
+        try:
+            await self.app(scope, hashing_receive, capturing_send)
+        except Exception:
+            await run_in_threadpool(self.store.release, user_id, key, route, token)
+            raise
+        finally:
+            renewal.cancel()
+
+        status_code = captured["status"]
+        if not captured["storable"] or status_code >= 500 or status_code in _UNCACHED_STATUSES:
+            await run_in_threadpool(self.store.release, user_id, key, route, token)
+            return
+        stored = StoredResponse(
+            request_hash=digest.hexdigest(),
+            status_code=status_code,
+            headers=captured["headers"],
+            body=bytes(captured["body"]),
+        )
+        try:
+            await run_in_threadpool(self.store.complete, user_id, key, route, token, stored)
+        except Exception as e:
+            logger.error(f"Could not store idempotent response for {route}: {e}")
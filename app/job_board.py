@@ -0,0 +1,86 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from app.responses import dumps
+
+JOB_BOARD_CACHE_SECONDS = float(os.getenv("JOB_BOARD_CACHE_SECONDS", "60"))
+JOB_BOARD_CACHE_MAX_ENTRIES = int(os.getenv("JOB_BOARD_CACHE_MAX_ENTRIES", "64"))
+JOB_BOARD_CACHE_CONTROL = "public, no-cache"
+JOB_BOARD_MAX_LIMIT = 200
+
+
+class JobBoardCache:
+    """
+    Versioned cache of serialized job board pages for this worker process.
+
+    Every write to job_opportunities calls invalidate(), which bumps the version
+    so a page rendered from data read before the write is never stored under the
+    new version. Entries also expire after ``ttl`` seconds, which bounds how long
+    another worker process can keep serving a page from before a change. Keys
+    come from public query strings, so at most ``max_entries`` pages are kept
+    and the least recently used one is evicted first.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = JOB_BOARD_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes, str]]" = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], object]) -> Tuple[bytes, str]:
+        """Return (body, etag) for ``key``, rendering and storing it on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1], entry[2]
+            self.misses += 1
+            version = self._version
+
+        body = dumps(render())
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        if self.ttl > 0 and self.max_entries > 0:
+            with self._lock:
+                if version == self._version:
+                    self._entries[key] = (now + self.ttl, body, etag)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return body, etag
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "version": self._version,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+job_board_cache = JobBoardCache(ttl=JOB_BOARD_CACHE_SECONDS)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so a W/ prefix added by a proxy still matches
+    return etag in {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
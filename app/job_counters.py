@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models import JobApplication, JobOpportunity
+
+
+def record_job_application(db: Session, job_id: str, applied_at: datetime) -> None:
+    """
+    Bump a job's application counter in the caller's transaction.
+
+    The increment happens in the database, so concurrent applications to the
+    same job cannot overwrite each other's count.
+    """
+    db.execute(
+        update(JobOpportunity)
+        .where(JobOpportunity.id == job_id)
+        .values(application_count=JobOpportunity.application_count + 1, last_applied_at=applied_at),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def recount_job_applications(db: Session, job_ids: Iterable[str]) -> None:
+    """
+    Recompute application_count and last_applied_at for the given jobs from job_applications.
+
+    Used after applications are deleted, where the previous last_applied_at
+    can only be recovered from the rows that remain.
+    """
+    job_ids = list(set(job_ids))
+    if not job_ids:
+        return
+    db.execute(
+        update(JobOpportunity)
+        .where(JobOpportunity.id.in_(job_ids))
+        .values(
+            application_count=select(func.count(JobApplication.id))
+            .where(JobApplication.job_id == JobOpportunity.id)
+            .scalar_subquery(),
+            last_applied_at=select(func.max(JobApplication.created_at))
+            .where(JobApplication.job_id == JobOpportunity.id)
+            .scalar_subquery(),
+        ),
+        execution_options={"synchronize_session": False},
+    )
@@ -0,0 +1,115 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.models import JobOpportunity, JobType
+
+JOB_SEARCH_PAGE_SIZE = 20
+JOB_SEARCH_MAX_PAGE_SIZE = 100
+JOB_SEARCH_MAX_TERMS = 8
+
+# Missing deadlines and salaries sort as these, so every row has a comparable key.
+_NO_DEADLINE = date(9999, 12, 31)
+_NO_SALARY = -1
+
+# Sort name -> (key expression, descending, parser for a cursor key, key of a loaded row).
+JOB_SEARCH_SORTS = {
+    "newest": (JobOpportunity.created_at, True, datetime.fromisoformat, lambda job: job.created_at),
+    "deadline": (
+        func.coalesce(JobOpportunity.application_deadline, _NO_DEADLINE),
+        False,
+        date.fromisoformat,
+        lambda job: job.application_deadline or _NO_DEADLINE,
+    ),
+    "salary": (
+        func.coalesce(JobOpportunity.salary_range_max, _NO_SALARY),
+        True,
+        Decimal,
+        lambda job: _NO_SALARY if job.salary_range_max is None else job.salary_range_max,
+    ),
+}
+
+
+def build_job_search_text(job: JobOpportunity) -> str:
+    """Lower-cased text that keyword search matches; the bootstrap backfill builds the same string."""
+    return " ".join(part for part in (job.title, job.company_name, job.requirements) if part).lower()
+
+
+def _encode_cursor(value, row_id: str) -> str:
+    key = value.isoformat() if isinstance(value, (date, datetime)) else str(value)
+    return base64.urlsafe_b64encode(json.dumps([key, row_id]).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, parse):
+    try:
+        key, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return parse(key), str(row_id)
+    except (UnicodeError, ValueError, TypeError, ArithmeticError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def search_jobs(
+    db: Session,
+    q: Optional[str] = None,
+    country: Optional[str] = None,
+    city: Optional[str] = None,
+    job_type: Optional[str] = None,
+    salary_min: Optional[float] = None,
+    salary_max: Optional[float] = None,
+    open_only: bool = True,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    limit: int = JOB_SEARCH_PAGE_SIZE,
+) -> List[JobOpportunity]:
+    """
+    One page of active jobs matching the filters, keyed on (sort key, id).
+
+    Every keyword must appear in the job's title, company or requirements.
+    Salary bounds match jobs whose advertised range overlaps the requested
+    one. Raises ValueError for an unknown sort or job type, or a bad cursor.
+    """
+    if sort not in JOB_SEARCH_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    sort_key, descending, parse_key, _ = JOB_SEARCH_SORTS[sort]
+
+    query = db.query(JobOpportunity).filter(JobOpportunity.is_active == True)
+    if q:
+        for term in q.lower().split()[:JOB_SEARCH_MAX_TERMS]:
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query = query.filter(JobOpportunity.search_text.like(f"%{escaped}%", escape="\\"))
+    if country:
+        query = query.filter(func.lower(JobOpportunity.country) == country.strip().lower())
+    if city:
+        query = query.filter(func.lower(JobOpportunity.city) == city.strip().lower())
+    if job_type:
+        query = query.filter(JobOpportunity.job_type == JobType(job_type))
+    if salary_min is not None:
+        query = query.filter(or_(JobOpportunity.salary_range_max >= salary_min, JobOpportunity.salary_range_min >= salary_min))
+    if salary_max is not None:
+        query = query.filter(JobOpportunity.salary_range_min <= salary_max)
+    if open_only:
+        query = query.filter(or_(
+            JobOpportunity.application_deadline.is_(None),
+            JobOpportunity.application_deadline >= date.today(),
+        ))
+    if cursor:
+        key, row_id = _decode_cursor(cursor, parse_key)
+        if descending:
+            query = query.filter(or_(sort_key < key, and_(sort_key == key, JobOpportunity.id < row_id)))
+        else:
+            query = query.filter(or_(sort_key > key, and_(sort_key == key, JobOpportunity.id > row_id)))
+
+    order = (sort_key.desc(), JobOpportunity.id.desc()) if descending else (sort_key.asc(), JobOpportunity.id.asc())
+    return query.order_by(*order).limit(max(1, min(limit, JOB_SEARCH_MAX_PAGE_SIZE))).all()
+
+
+def next_job_search_cursor(jobs: List[JobOpportunity], sort: str, limit: int) -> Optional[str]:
+    if len(jobs) < max(1, min(limit, JOB_SEARCH_MAX_PAGE_SIZE)):
+        return None
+    row_key = JOB_SEARCH_SORTS[sort][3]
+    return _encode_cursor(row_key(jobs[-1]), jobs[-1].id)
@@ -0,0 +1,265 @@
+import os
+import re
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, or_
+from sqlalchemy.orm import Session
+
+from app.database import insert_ignoring_conflicts
+from app.models import (
+    ClientProfile,
+    EducationRecord,
+    EmploymentRecord,
+    JobMatch,
+    JobOpportunity,
+    MatchRefresh,
+    User,
+    UserRole,
+)
+from app.schemas import ClientLifecycleStatusEnum
+
+MATCH_MIN_SCORE = float(os.getenv("MATCH_MIN_SCORE", "10"))
+MATCH_CLIENT_CHUNK_SIZE = 2000
+MATCH_REFRESH_BATCH_SIZE = 500
+MATCH_MIN_AGE = 18
+MATCH_MAX_AGE = 60
+
+# Share of the score from each feature; they add up to 1 so scores run 0-100.
+ROLE_WEIGHT = 0.55
+REQUIREMENTS_WEIGHT = 0.25
+COUNTRY_EXPERIENCE_WEIGHT = 0.20
+
+# Clients in these stages are already placed or out of the pipeline.
+UNMATCHED_LIFECYCLE_STATUSES = (
+    ClientLifecycleStatusEnum.traveled.value,
+    ClientLifecycleStatusEnum.active_abroad.value,
+    ClientLifecycleStatusEnum.cancelled.value,
+    ClientLifecycleStatusEnum.inactive.value,
+)
+
+_TOKEN_RE = re.compile(r"[a-z]{3,}")
+_STOP_WORDS = frozenset({
+    "and", "the", "for", "with", "must", "have", "has", "are", "able", "years", "year",
+    "experience", "required", "preferred", "minimum", "least", "good", "will", "who",
+})
+
+
+def _tokens(*texts: Optional[str]) -> set:
+    found = set()
+    for text in texts:
+        if text:
+            found.update(token for token in _TOKEN_RE.findall(text.lower()) if token not in _STOP_WORDS)
+    return found
+
+
+def _client_age(age: Optional[int], date_of_birth: Optional[date], today: date) -> Optional[int]:
+    if age:
+        return age
+    if date_of_birth:
+        return today.year - date_of_birth.year - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day))
+    return None
+
+
+class _JobFeatures:
+    """Feature matrices for a set of jobs; clients are projected onto the same vocabulary."""
+
+    def __init__(self, jobs: Sequence[Tuple[str, str, Optional[str], str]]):
+        self.job_ids = [job_id for job_id, _, _, _ in jobs]
+        title_tokens = [_tokens(title) for _, title, _, _ in jobs]
+        requirement_tokens = [_tokens(requirements) for _, _, requirements, _ in jobs]
+        self.vocabulary = {
+            token: index
+            for index, token in enumerate(sorted(set().union(*title_tokens, *requirement_tokens)))
+        }
+        self.countries = {
+            country: index for index, country in enumerate(sorted({(country or "").strip().lower() for *_, country in jobs}))
+        }
+
+        self.titles = self._binary(title_tokens, self.vocabulary)
+        self.requirements = self._binary(requirement_tokens, self.vocabulary)
+        self.title_norms = np.sqrt(self.titles.sum(axis=1))
+        self.requirement_counts = self.requirements.sum(axis=1)
+        self.job_countries = self._binary(
+            [{(country or "").strip().lower()} for *_, country in jobs], self.countries
+        )
+
+    @staticmethod
+    def _binary(token_sets: List[set], vocabulary: Dict[str, int]) -> np.ndarray:
+        matrix = np.zeros((len(token_sets), len(vocabulary)), dtype=np.float32)
+        for row, token_set in enumerate(token_sets):
+            columns = [vocabulary[token] for token in token_set if token in vocabulary]
+            matrix[row, columns] = 1.0
+        return matrix
+
+    def score(self, role_tokens: List[set], skill_tokens: List[set], worked_in: List[set], eligible: np.ndarray) -> np.ndarray:
+        """Return an (clients x jobs) matrix of scores from 0 to 100."""
+        roles = self._binary(role_tokens, self.vocabulary)
+        skills = self._binary(skill_tokens, self.vocabulary)
+        countries = self._binary(worked_in, self.countries)
+
+        # Cosine similarity between what the client does and the job title
+        role_norms = np.sqrt(roles.sum(axis=1))
+        denominator = np.outer(role_norms, self.title_norms)
+        role_score = np.divide(roles @ self.titles.T, denominator, out=np.zeros_like(denominator), where=denominator > 0)
+
+        # Share of the job's requirement terms the client's history covers; jobs without
+        # requirements fall back to the role score so they are not capped lower.
+        covered = skills @ self.requirements.T
+        requirement_score = np.divide(
+            covered, self.requirement_counts, out=role_score.copy(), where=self.requirement_counts > 0
+        )
+
+        # Having worked in the job's country only counts towards a related role
+        country_score = np.minimum(countries @ self.job_countries.T, 1.0) * (role_score > 0)
+
+        scores = (
+            ROLE_WEIGHT * role_score
+            + REQUIREMENTS_WEIGHT * requirement_score
+            + COUNTRY_EXPERIENCE_WEIGHT * country_score
+        )
+        return np.round(100.0 * scores * eligible[:, None], 1)
+
+
+def _load_jobs(db: Session, job_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, str, Optional[str], str]]:
+    query = db.query(JobOpportunity.id, JobOpportunity.title, JobOpportunity.requirements, JobOpportunity.country).filter(
+        JobOpportunity.is_active == True,
+        or_(JobOpportunity.application_deadline.is_(None), JobOpportunity.application_deadline >= date.today()),
+    )
+    if job_ids is not None:
+        query = query.filter(JobOpportunity.id.in_(list(job_ids)))
+    return query.all()
+
+
+def matchable_client_conditions() -> tuple:
+    """Filters, over ClientProfile joined with its User, for clients that take part in matching."""
+    return (
+        User.role == UserRole.client,
+        User.is_active == True,
+        ClientProfile.client_lifecycle_status.notin_(UNMATCHED_LIFECYCLE_STATUSES),
+    )
+
+
+def _client_id_query(db: Session):
+    return (
+        db.query(ClientProfile.id)
+        .join(User, User.id == ClientProfile.user_id)
+        .filter(*matchable_client_conditions())
+    )
+
+
+def _client_features(db: Session, client_ids: List[str]):
+    """Token sets and eligibility for a chunk of clients, in client_ids order."""
+    profiles = {
+        row.id: row
+        for row in db.query(
+            ClientProfile.id, ClientProfile.position_applied_for, ClientProfile.age, ClientProfile.date_of_birth
+        ).filter(ClientProfile.id.in_(client_ids))
+    }
+    positions, worked_in, qualifications = defaultdict(list), defaultdict(set), defaultdict(list)
+    for client_id, position, country in db.query(
+        EmploymentRecord.client_id, EmploymentRecord.position, EmploymentRecord.country
+    ).filter(EmploymentRecord.client_id.in_(client_ids)):
+        positions[client_id].append(position)
+        if country:
+            worked_in[client_id].add(country.strip().lower())
+    for client_id, qualification in db.query(EducationRecord.client_id, EducationRecord.qualification).filter(
+        EducationRecord.client_id.in_(client_ids)
+    ):
+        qualifications[client_id].append(qualification)
+
+    today = date.today()
+    role_tokens, skill_tokens, countries, eligible = [], [], [], []
+    for client_id in client_ids:
+        profile = profiles[client_id]
+        roles = _tokens(profile.position_applied_for, *positions[client_id])
+        role_tokens.append(roles)
+        skill_tokens.append(roles | _tokens(*qualifications[client_id]))
+        countries.append(worked_in[client_id])
+        age = _client_age(profile.age, profile.date_of_birth, today)
+        eligible.append(0.0 if age is not None and not MATCH_MIN_AGE <= age <= MATCH_MAX_AGE else 1.0)
+    return role_tokens, skill_tokens, countries, np.array(eligible, dtype=np.float32)
+
+
+def _score_clients(db: Session, features: _JobFeatures, client_ids: List[str]) -> List[dict]:
+    if not client_ids or not features.job_ids:
+        return []
+    scores = features.score(*_client_features(db, client_ids))
+    now = datetime.utcnow()
+    rows, columns = np.nonzero(scores >= MATCH_MIN_SCORE)
+    return [
+        {"job_id": features.job_ids[column], "client_id": client_ids[row], "score": float(scores[row, column]), "computed_at": now}
+        for row, column in zip(rows.tolist(), columns.tolist())
+    ]
+
+
+def refresh_matches(db: Session, client_ids: Optional[Iterable[str]] = None, job_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Recompute stored match scores and return how many rows were written.
+
+    With neither argument every active client is scored against every open job.
+    Otherwise only the given clients (against all open jobs) and the given jobs
+    (against all active clients) are recomputed; their old rows are replaced,
+    so clients or jobs that stopped qualifying simply lose their matches.
+    Nothing is committed here.
+    """
+    written = 0
+    if client_ids is None and job_ids is None:
+        db.execute(delete(JobMatch), execution_options={"synchronize_session": False})
+        features = _JobFeatures(_load_jobs(db))
+        all_clients = [value for (value,) in _client_id_query(db).order_by(ClientProfile.id)]
+        for start in range(0, len(all_clients), MATCH_CLIENT_CHUNK_SIZE):
+            rows = _score_clients(db, features, all_clients[start:start + MATCH_CLIENT_CHUNK_SIZE])
+            if rows:
+                db.execute(insert(JobMatch), rows)
+            written += len(rows)
+        return written
+
+    client_ids = list(set(client_ids or ()))
+    job_ids = list(set(job_ids or ()))
+    if job_ids:
+        db.execute(delete(JobMatch).where(JobMatch.job_id.in_(job_ids)), execution_options={"synchronize_session": False})
+        features = _JobFeatures(_load_jobs(db, job_ids))
+        if features.job_ids:
+            all_clients = [value for (value,) in _client_id_query(db).order_by(ClientProfile.id)]
+            for start in range(0, len(all_clients), MATCH_CLIENT_CHUNK_SIZE):
+                rows = _score_clients(db, features, all_clients[start:start + MATCH_CLIENT_CHUNK_SIZE])
+                insert_ignoring_conflicts(db, JobMatch, rows)
+                written += len(rows)
+    if client_ids:
+        db.execute(delete(JobMatch).where(JobMatch.client_id.in_(client_ids)), execution_options={"synchronize_session": False})
+        active = [value for (value,) in _client_id_query(db).filter(ClientProfile.id.in_(client_ids))]
+        rows = _score_clients(db, _JobFeatures(_load_jobs(db)), active)
+        # Pairs already written for a refreshed job above are kept
+        insert_ignoring_conflicts(db, JobMatch, rows)
+        written += len(rows)
+    return written
+
+
+def queue_match_refresh(db: Session, client_ids: Iterable[str] = (), job_ids: Iterable[str] = ()) -> None:
+    """Record clients or jobs whose matches are stale; the match worker recomputes them after commit."""
+    now = datetime.utcnow()
+    rows = [{"entity_type": "client", "entity_id": value, "queued_at": now} for value in set(client_ids)]
+    rows += [{"entity_type": "job", "entity_id": value, "queued_at": now} for value in set(job_ids)]
+    insert_ignoring_conflicts(db, MatchRefresh, rows)
+
+
+def drain_match_queue(db: Session, batch_size: int = MATCH_REFRESH_BATCH_SIZE) -> int:
+    """Recompute matches for one batch of queued clients and jobs, commit, and return the batch size."""
+    queued = db.query(MatchRefresh.entity_type, MatchRefresh.entity_id).order_by(MatchRefresh.queued_at).limit(batch_size).all()
+    if not queued:
+        return 0
+    client_ids = [entity_id for entity_type, entity_id in queued if entity_type == "client"]
+    job_ids = [entity_id for entity_type, entity_id in queued if entity_type == "job"]
+    # Dequeue before reading the data: a change committed meanwhile re-queues its row
+    for entity_type, ids in (("client", client_ids), ("job", job_ids)):
+        if ids:
+            db.execute(
+                delete(MatchRefresh).where(MatchRefresh.entity_type == entity_type, MatchRefresh.entity_id.in_(ids)),
+                execution_options={"synchronize_session": False},
+            )
+    refresh_matches(db, client_ids=client_ids, job_ids=job_ids)
+    db.commit()
+    return len(queued)
@@ -1,6 +1,6 @@
 # models.py
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Date, Integer, DECIMAL, ForeignKey, Enum, LargeBinary
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Date, Integer, DECIMAL, ForeignKey, Enum, LargeBinary, Float, Index
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 import enum
 from app.database import Base
@@ -187,7 +187,8 @@ class ClientProfile(Base):
     
     # Profile Management
     profile_photo_url = Column(String)
-    profile_photo_data = Column(LargeBinary)  # <-- Add this line
+    profile_photo_data = deferred(Column(LargeBinary))  # legacy blob, loaded only on access
+    profile_photo_thumbnails_at = Column(DateTime)
     status = Column(Enum(ClientStatus), default=ClientStatus.new)
     application_status = Column(String, default=ApplicationWorkflowStatus.draft.value, nullable=False)
     application_status_updated_at = Column(DateTime)
@@ -199,6 +200,8 @@ class ClientProfile(Base):
     lifecycle_status_notes = Column(Text)
     created_by_admin = Column(Boolean, default=False, nullable=False)
     onboarding_completed_at = Column(DateTime)
+    completion_percentage = Column(Float, index=True)  # maintained by app.onboarding
+    missing_fields = Column(Integer)  # bitmask over app.onboarding.REQUIRED_ONBOARDING_FIELDS
     verification_notes = Column(Text)
     verified_by = Column(String, ForeignKey("users.id"))
     verified_at = Column(DateTime)
@@ -226,7 +229,7 @@ class Document(Base):
     document_type = Column(Enum(DocumentType), nullable=False)
     file_name = Column(String, nullable=False)
     file_url = Column(String)
-    file_data = Column(LargeBinary)  # <-- Add this line
+    file_data = deferred(Column(LargeBinary))  # legacy blob, loaded only on access
     file_size = Column(Integer)
     mime_type = Column(String)
     is_verified = Column(Boolean, default=False)
@@ -292,12 +295,21 @@ class JobOpportunity(Base):
     is_active = Column(Boolean, default=True)
     created_by = Column(String, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Denormalized from job_applications; maintained by app.job_counters
+    application_count = Column(Integer, nullable=False, default=0)
+    last_applied_at = Column(DateTime)
+    # Lower-cased title, company and requirements for keyword search; see app.job_search
+    search_text = Column(Text)
     
     # Relationships
     applications = relationship("JobApplication", back_populates="job")
 
 class JobApplication(Base):
     __tablename__ = "job_applications"
+    __table_args__ = (
+        # One application per client per job; apply_for_job relies on it to insert without racing
+        Index("uq_job_applications_job_client", "job_id", "client_id", unique=True),
+    )
     
     id = Column(String, primary_key=True, index=True)
     client_id = Column(String, ForeignKey("client_profiles.id"), nullable=False)
@@ -349,3 +361,64 @@ class AdminAuditLog(Base):
     action = Column(String, nullable=False)
     details = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class StoredBlob(Base):
+    __tablename__ = "stored_blobs"
+
+    key = Column(String, primary_key=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String, nullable=True)
+    ref_count = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class StorageDeletion(Base):
+    __tablename__ = "storage_deletions"
+
+    id = Column(String, primary_key=True, index=True)
+    key = Column(String, nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class NumberSequence(Base):
+    __tablename__ = "number_sequences"
+
+    name = Column(String, primary_key=True)  # prefix plus bucket, e.g. SN-20250109 or REG-2025
+    last_value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class JobMatch(Base):
+    __tablename__ = "job_matches"
+
+    job_id = Column(String, ForeignKey("job_opportunities.id"), primary_key=True)
+    client_id = Column(String, ForeignKey("client_profiles.id"), primary_key=True, index=True)
+    score = Column(Float, nullable=False)  # 0-100, see app.matching
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class MatchRefresh(Base):
+    __tablename__ = "match_refresh_queue"
+
+    entity_type = Column(String, primary_key=True)  # "client" or "job"
+    entity_id = Column(String, primary_key=True)
+    queued_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class IdempotencyRecord(Base):
+    __tablename__ = "idempotency_records"
+
+    user_id = Column(String, primary_key=True)
+    idempotency_key = Column(String(255), primary_key=True)
+    scope = Column(String, primary_key=True)  # method and path the key was used on
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
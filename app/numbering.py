@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.database import insert_ignoring_conflicts
+from app.models import ClientProfile, NumberSequence
+
+SERIAL_PREFIX = "SN"
+REGISTRATION_PREFIX = "REG"
+
+
+def _format_serial(bucket: str, number: int) -> str:
+    # Format: SN-YYYYMMDD-XXXX (e.g., SN-20250109-0001)
+    return f"{bucket}-{number:04d}"
+
+
+def _format_registration(bucket: str, number: int) -> str:
+    # Format: REG-YYYY-XXXXXXX (e.g., REG-2025-0001234)
+    return f"{bucket}-{number:07d}"
+
+
+def _highest_issued(db: Session, column, bucket: str) -> int:
+    """
+    Largest number already issued in a bucket, so a new counter continues after existing rows.
+
+    The suffixes are compared as numbers: a string max() would rank "...-9999"
+    above "...-10000". This only runs when a bucket's counter is first created.
+    """
+    highest = 0
+    for (value,) in db.query(column).filter(column.like(f"{bucket}-%")).yield_per(1000):
+        suffix = value[len(bucket) + 1:]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+def _create_sequence(db: Session, name: str, start: int) -> None:
+    insert_ignoring_conflicts(db, NumberSequence, [{"name": name, "last_value": start, "updated_at": datetime.utcnow()}])
+
+
+def allocate_sequence(db: Session, name: str, count: int, column) -> int:
+    """
+    Atomically reserve ``count`` consecutive values from the ``name`` counter and return the first.
+
+    The increment runs in the caller's transaction, so the counter row stays
+    locked until it commits and a rollback hands the numbers back. A missing
+    counter is seeded from the highest number already stored in ``column``.
+    """
+    statement = (
+        update(NumberSequence)
+        .where(NumberSequence.name == name)
+        .values(last_value=NumberSequence.last_value + count, updated_at=datetime.utcnow())
+        .returning(NumberSequence.last_value)
+    )
+    last_value = db.execute(statement).scalar()
+    if last_value is None:
+        _create_sequence(db, name, _highest_issued(db, column, name))
+        last_value = db.execute(statement).scalar()
+    return last_value - count + 1
+
+
+def reserve_client_numbers(db: Session, count: int = 1) -> List[Tuple[str, str]]:
+    """Reserve ``count`` (serial_number, registration_number) pairs."""
+    if count <= 0:
+        return []
+    now = datetime.now()
+    serial_bucket = f"{SERIAL_PREFIX}-{now.strftime('%Y%m%d')}"
+    registration_bucket = f"{REGISTRATION_PREFIX}-{now.year}"
+    first_serial = allocate_sequence(db, serial_bucket, count, ClientProfile.serial_number)
+    first_registration = allocate_sequence(db, registration_bucket, count, ClientProfile.registration_number)
+    return [
+        (_format_serial(serial_bucket, first_serial + offset), _format_registration(registration_bucket, first_registration + offset))
+        for offset in range(count)
+    ]
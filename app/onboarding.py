@@ -0,0 +1,105 @@
+from functools import lru_cache
+from operator import attrgetter
+from typing import List, Mapping, NamedTuple, Sequence, Tuple
+
+from sqlalchemy import String, Text, and_, case, func, literal_column, update
+
+from app.models import ClientProfile
+
+# Bit i of ClientProfile.missing_fields is set while REQUIRED_ONBOARDING_FIELDS[i] is
+# empty, so only append to this tuple: reordering it changes what stored masks mean.
+REQUIRED_ONBOARDING_FIELDS = (
+    "first_name", "last_name", "date_of_birth", "gender", "nationality",
+    "phone_primary", "address_current", "emergency_contact_name",
+    "emergency_contact_phone", "emergency_contact_relationship",
+)
+OPTIONAL_ONBOARDING_FIELDS = (
+    "middle_name", "nin", "passport_number", "phone_secondary", "address_permanent",
+)
+_TOTAL_FIELDS = len(REQUIRED_ONBOARDING_FIELDS) + len(OPTIONAL_ONBOARDING_FIELDS)
+
+_read_required = attrgetter(*REQUIRED_ONBOARDING_FIELDS)
+_read_optional = attrgetter(*OPTIONAL_ONBOARDING_FIELDS)
+
+
+class OnboardingCompletion(NamedTuple):
+    missing_mask: int
+    percentage: float
+
+    @property
+    def is_complete(self) -> bool:
+        return self.missing_mask == 0
+
+    @property
+    def missing_fields(self) -> List[str]:
+        return missing_fields_from_mask(self.missing_mask)
+
+
+def _evaluate(required_values: Sequence, optional_values: Sequence) -> OnboardingCompletion:
+    missing_mask = 0
+    for bit, value in enumerate(required_values):
+        if not value:
+            missing_mask |= 1 << bit
+    filled = len(required_values) - bin(missing_mask).count("1") + sum(1 for value in optional_values if value)
+    return OnboardingCompletion(missing_mask=missing_mask, percentage=round(filled / _TOTAL_FIELDS * 100, 1))
+
+
+def evaluate_onboarding(profile: ClientProfile) -> OnboardingCompletion:
+    return _evaluate(_read_required(profile), _read_optional(profile))
+
+
+def evaluate_onboarding_row(row: Mapping) -> OnboardingCompletion:
+    """Same as evaluate_onboarding for a ClientProfile insert dict."""
+    return _evaluate(
+        [row.get(field) for field in REQUIRED_ONBOARDING_FIELDS],
+        [row.get(field) for field in OPTIONAL_ONBOARDING_FIELDS],
+    )
+
+
+@lru_cache(maxsize=None)
+def _missing_fields(mask: int) -> Tuple[str, ...]:
+    return tuple(field for bit, field in enumerate(REQUIRED_ONBOARDING_FIELDS) if mask & (1 << bit))
+
+
+def missing_fields_from_mask(mask: int) -> List[str]:
+    return list(_missing_fields(mask))
+
+
+def apply_onboarding_completion(profile: ClientProfile) -> OnboardingCompletion:
+    """Recompute and store completion_percentage and missing_fields; call after changing profile fields."""
+    completion = evaluate_onboarding(profile)
+    profile.completion_percentage = completion.percentage
+    profile.missing_fields = completion.missing_mask
+    return completion
+
+
+def stored_onboarding_completion(profile: ClientProfile) -> OnboardingCompletion:
+    """The completion saved on the profile, evaluated on the fly for a row written before it was stored."""
+    if profile.completion_percentage is None or profile.missing_fields is None:
+        return evaluate_onboarding(profile)
+    return OnboardingCompletion(missing_mask=profile.missing_fields, percentage=profile.completion_percentage)
+
+
+def _filled(field: str):
+    column = getattr(ClientProfile, field)
+    if isinstance(column.type, (String, Text)):
+        return and_(column.isnot(None), column != "")
+    return column.isnot(None)
+
+
+def backfill_onboarding_completion(connection) -> None:
+    """Fill the stored completion of profiles that predate it, in SQL built from the same field lists."""
+    filled_count = sum(
+        case((_filled(field), 1), else_=0) for field in REQUIRED_ONBOARDING_FIELDS + OPTIONAL_ONBOARDING_FIELDS
+    )
+    missing_mask = sum(
+        case((_filled(field), 0), else_=1 << bit) for bit, field in enumerate(REQUIRED_ONBOARDING_FIELDS)
+    )
+    connection.execute(
+        update(ClientProfile)
+        .where(ClientProfile.completion_percentage.is_(None))
+        .values(
+            completion_percentage=func.round(filled_count * literal_column("100.0") / _TOTAL_FIELDS, 1),
+            missing_fields=missing_mask,
+        )
+    )
@@ -0,0 +1,74 @@
+import enum
+from datetime import date, datetime
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Response
+from sqlalchemy import Date, DateTime, Enum
+
+from app.models import ClientProfile
+from app.responses import dumps
+from app.schemas import ApplicationWorkflowStatusEnum, ClientLifecycleStatusEnum, ClientProfileResponse
+
+# Response fields the routes compute rather than read from a column.
+COMPUTED_PROFILE_FIELDS = ("user_email", "profile_photo_url", "profile_photo_thumbnail_url", "profile_photo_data")
+
+
+def _isoformat(value: date) -> str:
+    return value.isoformat()
+
+
+def _enum_value(value: enum.Enum) -> Any:
+    return value.value
+
+
+def _converter(column) -> Optional[Callable[[Any], Any]]:
+    if isinstance(column.type, Enum):
+        return _enum_value
+    if isinstance(column.type, (DateTime, Date)):
+        return _isoformat
+    return None
+
+
+# Resolved once at import: which ClientProfileResponse fields come straight from
+# columns, a single getter for all of them, and the conversions some need for JSON.
+_COLUMN_FIELDS = tuple(
+    name for name in ClientProfileResponse.model_fields
+    if name in ClientProfile.__table__.columns and name not in COMPUTED_PROFILE_FIELDS
+)
+_read_columns = attrgetter(*_COLUMN_FIELDS)
+_CONVERSIONS = tuple(
+    (name, convert) for name in _COLUMN_FIELDS
+    if (convert := _converter(ClientProfile.__table__.columns[name])) is not None
+)
+
+
+def client_profile_payload(profile: ClientProfile, **computed: Any) -> Dict[str, Any]:
+    """
+    JSON-ready ClientProfileResponse fields for ``profile``.
+
+    ``computed`` supplies COMPUTED_PROFILE_FIELDS, which depend on the caller's
+    storage and photo handling. This produces what validating the profile into
+    ClientProfileResponse and dumping it in JSON mode would, without the
+    per-call column walk and validation.
+    """
+    payload = dict(zip(_COLUMN_FIELDS, _read_columns(profile)))
+    for name, convert in _CONVERSIONS:
+        value = payload[name]
+        if value is not None:
+            payload[name] = convert(value)
+    if not payload["application_status"]:
+        payload["application_status"] = ApplicationWorkflowStatusEnum.draft.value
+    if not payload["client_lifecycle_status"]:
+        payload["client_lifecycle_status"] = ClientLifecycleStatusEnum.new_lead.value
+    for name in COMPUTED_PROFILE_FIELDS:
+        payload[name] = computed.get(name)
+    return payload
+
+
+def client_profile_response(profile: ClientProfile, **computed: Any) -> Response:
+    """
+    Encoded client profile. Routes keep response_model=ClientProfileResponse for
+    the OpenAPI schema; returning a Response skips FastAPI's re-validation.
+    """
+    return Response(content=dumps(client_profile_payload(profile, **computed)), media_type="application/json")
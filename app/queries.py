@@ -0,0 +1,119 @@
+import base64
+from datetime import date, datetime
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, joinedload, load_only
+
+from app.models import ApplicationStatus, ClientProfile, JobApplication, JobOpportunity
+
+# Columns needed to identify a client and show them in lists and conversations.
+CLIENT_SUMMARY_COLUMNS = (
+    ClientProfile.id,
+    ClientProfile.user_id,
+    ClientProfile.first_name,
+    ClientProfile.last_name,
+    ClientProfile.profile_photo_url,
+    ClientProfile.profile_photo_thumbnails_at,
+)
+
+# Client columns shown next to each application in admin listings.
+APPLICATION_CLIENT_COLUMNS = (ClientProfile.first_name, ClientProfile.last_name)
+APPLICANT_COLUMNS = APPLICATION_CLIENT_COLUMNS + (
+    ClientProfile.serial_number,
+    ClientProfile.contact_1,
+    ClientProfile.position_applied_for,
+    ClientProfile.client_lifecycle_status,
+    ClientProfile.profile_photo_url,
+    ClientProfile.profile_photo_thumbnails_at,
+)
+
+APPLICATION_PAGE_SIZE = 100
+APPLICATION_MAX_PAGE_SIZE = 500
+
+
+def get_client_profile_id(db: Session, user_id: str) -> Optional[str]:
+    return db.query(ClientProfile.id).filter(ClientProfile.user_id == user_id).scalar()
+
+
+def get_client_profile_summary(db: Session, user_id: str) -> Optional[ClientProfile]:
+    """Load a client profile with only its display columns populated."""
+    return (
+        db.query(ClientProfile)
+        .options(load_only(*CLIENT_SUMMARY_COLUMNS))
+        .filter(ClientProfile.user_id == user_id)
+        .first()
+    )
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce."""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except (UnicodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def list_job_applications(
+    db: Session,
+    job_id: Optional[str] = None,
+    status: Optional[str] = None,
+    applied_from: Optional[date] = None,
+    applied_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = APPLICATION_PAGE_SIZE,
+    include_details: bool = True,
+    client_columns: Sequence = APPLICATION_CLIENT_COLUMNS,
+) -> List[JobApplication]:
+    """
+    One page of applications, newest first, keyed on (created_at, id).
+
+    With include_details the job title and client name are joined into the same
+    statement, so a page costs one query however many rows it holds;
+    client_columns picks which profile fields come along. A limit of None
+    returns every matching row. Raises ValueError for an unknown status or a
+    malformed cursor.
+    """
+    query = db.query(JobApplication)
+    if include_details:
+        query = query.options(
+            joinedload(JobApplication.job).load_only(JobOpportunity.title, JobOpportunity.company_name),
+            joinedload(JobApplication.client).load_only(*client_columns),
+        )
+    if job_id:
+        query = query.filter(JobApplication.job_id == job_id)
+    if status:
+        query = query.filter(JobApplication.application_status == ApplicationStatus(status))
+    if applied_from:
+        query = query.filter(JobApplication.applied_date >= applied_from)
+    if applied_to:
+        query = query.filter(JobApplication.applied_date <= applied_to)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            JobApplication.created_at < created_at,
+            and_(JobApplication.created_at == created_at, JobApplication.id < row_id),
+        ))
+    query = query.order_by(JobApplication.created_at.desc(), JobApplication.id.desc())
+    if limit is not None:
+        query = query.limit(max(1, min(limit, APPLICATION_MAX_PAGE_SIZE)))
+    return query.all()
+
+
+def application_page_limit(cursor: Optional[str], limit: Optional[int]) -> Optional[int]:
+    """The page size for a listing: None (every row) unless a cursor or limit asks for pages."""
+    if limit is None and cursor:
+        return APPLICATION_PAGE_SIZE
+    return limit
+
+
+def next_application_cursor(applications: List[JobApplication], limit: Optional[int]) -> Optional[str]:
+    if limit is None or len(applications) < max(1, min(limit, APPLICATION_MAX_PAGE_SIZE)):
+        return None
+    last = applications[-1]
+    return encode_cursor(last.created_at, last.id)
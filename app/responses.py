@@ -0,0 +1,32 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.encoders import decimal_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    """Types orjson does not encode itself, converted the way jsonable_encoder would."""
+    if isinstance(value, Decimal):
+        return decimal_encoder(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode to compact JSON; datetimes and dates come out in ISO 8601 like FastAPI's encoder."""
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    """Default response class: same output as JSONResponse, encoded with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from datetime import datetime
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session, load_only, undefer
+from starlette.concurrency import run_in_threadpool
+from datetime import date, datetime
+from pathlib import PurePosixPath
 from typing import Optional, List
 import uuid
 import base64
@@ -17,7 +21,9 @@ from app.models import (
     EducationRecord,
     EmploymentRecord,
     JobApplication,
+    JobMatch,
     JobOpportunity,
+    MatchRefresh,
     StatusHistory,
     User,
     UserRole,
@@ -28,25 +34,46 @@ from app.schemas import (
     AdminClientListResponse, AdminVerificationUpdate, UserResponse, DocumentCreate,
     EducationRecordCreate, EducationRecordResponse, EmploymentRecordCreate, EmploymentRecordResponse,
     AdminPasswordResetRequest, AdminUserCreate, AdminUserListResponse, AdminUserUpdate,
-    StatusHistoryResponse, StatusUpdateRequest
+    StatusHistoryResponse, StatusUpdateRequest, BulkStatusUpdateRequest, BulkStatusUpdateResponse
 )
+from app.archives import ArchiveEntry, stream_zip, unique_archive_name
+from app.async_storage import get_async_storage
+from app.client_deletion import delete_client_records
+from app.client_import import IMPORT_MAX_BYTES, ImportFormatError, parse_import_rows, run_client_import
 from app.database import get_db
 from app.dependencies import get_admin_user, get_super_admin_user
+from app.exports import iter_csv, iter_xlsx, xlsx_export_available
+from app.job_board import job_board_cache
+from app.matching import matchable_client_conditions, queue_match_refresh, refresh_matches
+from app.numbering import reserve_client_numbers
+from app.onboarding import apply_onboarding_completion, stored_onboarding_completion
+from app.profile_serializer import client_profile_response
+from app.queries import (
+    APPLICANT_COLUMNS,
+    application_page_limit,
+    encode_cursor,
+    list_job_applications,
+    next_application_cursor,
+)
 from app.utils import get_password_hash
-from app.storage import build_public_url, delete_file, read_bytes, save_bytes
+from app.storage import build_public_url, delete_file, get_read_cache_stats, read_bytes
+from app.thumbnails import build_thumbnail_url, delete_profile_photo, generate_profile_thumbnails
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
 def _get_profile_photo_base64(profile: ClientProfile) -> Optional[str]:
-    if profile.profile_photo_data:
-        return base64.b64encode(profile.profile_photo_data).decode("utf-8")
-    if profile.profile_photo_url and not build_public_url(profile.profile_photo_url):
+    # Check the stored key first so migrated rows never load the deferred legacy blob.
+    if profile.profile_photo_url:
+        if build_public_url(profile.profile_photo_url):
+            return None
         try:
             file_bytes, _ = read_bytes(profile.profile_photo_url)
             return base64.b64encode(file_bytes).decode("utf-8")
         except Exception:
             return None
+    if profile.profile_photo_data:
+        return base64.b64encode(profile.profile_photo_data).decode("utf-8")
     return None
 
 
@@ -72,19 +99,14 @@ def _serialize_document(doc: Document) -> dict:
     }
 
 
-def _serialize_client_profile(client_profile: ClientProfile, user: Optional[User]) -> dict:
-    profile_dict = {
-        column.name: getattr(client_profile, column.name)
-        for column in ClientProfile.__table__.columns
-    }
-    profile_dict["user_email"] = user.email if user else None
-    profile_dict["profile_photo_url"] = build_public_url(client_profile.profile_photo_url)
-    profile_dict["profile_photo_data"] = _get_profile_photo_base64(client_profile)
-    if not profile_dict.get("application_status"):
-        profile_dict["application_status"] = ApplicationWorkflowStatusEnum.draft.value
-    if not profile_dict.get("client_lifecycle_status"):
-        profile_dict["client_lifecycle_status"] = ClientLifecycleStatusEnum.new_lead.value
-    return profile_dict
+def _client_profile_response(client_profile: ClientProfile, user: Optional[User]) -> Response:
+    return client_profile_response(
+        client_profile,
+        user_email=user.email if user else None,
+        profile_photo_url=build_public_url(client_profile.profile_photo_url),
+        profile_photo_thumbnail_url=build_thumbnail_url(client_profile, 256),
+        profile_photo_data=_get_profile_photo_base64(client_profile),
+    )
 
 
 def _normalize_application_status(status: Optional[str]) -> str:
@@ -147,39 +169,6 @@ def _log_admin_action(db: Session, actor_user: User, action: str, target_user: O
         )
     )
 
-def generate_serial_number(db: Session) -> str:
-    """Generate unique serial number for client registration"""
-    while True:
-        # Format: SN-YYYYMMDD-XXXX (e.g., SN-20250109-0001)
-        date_part = datetime.now().strftime("%Y%m%d")
-        # Get count of clients registered today
-        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_count = db.query(ClientProfile).filter(
-            ClientProfile.registration_date >= today_start
-        ).count() + 1
-        
-        serial_number = f"SN-{date_part}-{today_count:04d}"
-        
-        # Check if already exists (unlikely but safe)
-        existing = db.query(ClientProfile).filter(ClientProfile.serial_number == serial_number).first()
-        if not existing:
-            return serial_number
-
-def generate_registration_number(db: Session) -> str:
-    """Generate unique registration number for client"""
-    while True:
-        # Format: REG-YYYY-XXXXXXX (e.g., REG-2025-0001234)
-        year = datetime.now().year
-        # Get total count of all clients for sequential numbering
-        total_count = db.query(ClientProfile).count() + 1
-        
-        registration_number = f"REG-{year}-{total_count:07d}"
-        
-        # Check if already exists
-        existing = db.query(ClientProfile).filter(ClientProfile.registration_number == registration_number).first()
-        if not existing:
-            return registration_number
-
 
 @router.get("/users", response_model=List[AdminUserListResponse])
 def list_admin_users(
@@ -316,20 +305,17 @@ def reset_admin_user_password(
     db.refresh(user)
     return _serialize_admin_user(user)
 
-@router.get("/clients", response_model=List[AdminClientListResponse])
-def get_all_clients(
-    skip: int = 0,
-    limit: int = 100,
+def _filter_clients(
+    query,
     status: Optional[str] = None,
     application_status: Optional[str] = None,
     lifecycle_status: Optional[str] = None,
     search: Optional[str] = None,
-    admin_user: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    min_completion: Optional[float] = None,
+    completion_below: Optional[float] = None,
 ):
-    """Get all clients with optional filtering"""
-    query = db.query(ClientProfile, User).join(User, ClientProfile.user_id == User.id).filter(User.role == UserRole.client)
-
+    """Apply the client registry filters shared by the list and export endpoints."""
+    query = query.join(User, ClientProfile.user_id == User.id).filter(User.role == UserRole.client)
     if status:
         query = query.filter(ClientProfile.status == status)
     if application_status:
@@ -345,10 +331,138 @@ def get_all_clients(
             (ClientProfile.last_name.ilike(search_value)) |
             (ClientProfile.passport_number.ilike(search_value))
         )
+    # Both use the stored onboarding completion, see app.onboarding
+    if min_completion is not None:
+        query = query.filter(ClientProfile.completion_percentage >= min_completion)
+    if completion_below is not None:
+        query = query.filter(ClientProfile.completion_percentage < completion_below)
+    return query
+
+
+CLIENT_EXPORT_COLUMNS = (
+    ("Client ID", ClientProfile.id),
+    ("Serial Number", ClientProfile.serial_number),
+    ("Registration Number", ClientProfile.registration_number),
+    ("Registration Date", ClientProfile.registration_date),
+    ("First Name", ClientProfile.first_name),
+    ("Middle Name", ClientProfile.middle_name),
+    ("Last Name", ClientProfile.last_name),
+    ("Email", User.email),
+    ("Phone Number", User.phone_number),
+    ("Gender", ClientProfile.gender),
+    ("Date of Birth", ClientProfile.date_of_birth),
+    ("Nationality", ClientProfile.nationality),
+    ("NIN", ClientProfile.nin),
+    ("Passport Number", ClientProfile.passport_number),
+    ("District", ClientProfile.district),
+    ("Position Applied For", ClientProfile.position_applied_for),
+    ("Status", ClientProfile.status),
+    ("Application Status", ClientProfile.application_status),
+    ("Lifecycle Status", ClientProfile.client_lifecycle_status),
+    ("Agent Name", ClientProfile.agent_name),
+    ("Created By Admin", ClientProfile.created_by_admin),
+    ("Created At", ClientProfile.created_at),
+)
+CLIENT_EXPORT_BATCH_SIZE = 1000
+
+
+@router.get("/storage/cache-stats")
+def get_storage_cache_stats(super_admin_user: User = Depends(get_super_admin_user)):
+    """In-memory storage read cache counters for this worker process"""
+    return get_read_cache_stats()
+
+
+@router.get("/jobs/cache-stats")
+def get_job_board_cache_stats(super_admin_user: User = Depends(get_super_admin_user)):
+    """Job board listing cache counters for this worker process"""
+    return job_board_cache.stats()
+
 
+@router.post("/jobs/matches/rebuild")
+def rebuild_job_matches(
+    super_admin_user: User = Depends(get_super_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Recompute match scores for every active client against every open job"""
+    written = refresh_matches(db)
+    db.query(MatchRefresh).delete(synchronize_session=False)
+    db.commit()
+    return {"matches": written}
+
+
+@router.get("/jobs/{job_id}/suggested-candidates")
+def get_suggested_candidates(
+    job_id: str,
+    limit: int = Query(20, ge=1, le=200),
+    include_applied: bool = False,
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Best-scoring candidates for a job from the precomputed job_matches table"""
+    if not db.query(JobOpportunity.id).filter(JobOpportunity.id == job_id).scalar():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    # Stored matches lag behind deactivations and lifecycle changes until the worker
+    # refreshes them, so eligibility is checked again here
+    query = (
+        db.query(ClientProfile, JobMatch.score, JobMatch.computed_at)
+        .join(JobMatch, JobMatch.client_id == ClientProfile.id)
+        .join(User, User.id == ClientProfile.user_id)
+        .options(load_only(*APPLICANT_COLUMNS))
+        .filter(JobMatch.job_id == job_id, *matchable_client_conditions())
+    )
+    if not include_applied:
+        applied = db.query(JobApplication.client_id).filter(JobApplication.job_id == job_id)
+        query = query.filter(ClientProfile.id.notin_(applied))
+    rows = query.order_by(JobMatch.score.desc(), ClientProfile.id).limit(limit).all()
+    return [
+        {
+            "client_id": profile.id,
+            "first_name": profile.first_name,
+            "last_name": profile.last_name,
+            "serial_number": profile.serial_number,
+            "contact_1": profile.contact_1,
+            "position_applied_for": profile.position_applied_for,
+            "client_lifecycle_status": profile.client_lifecycle_status,
+            "profile_photo_thumbnail_url": build_thumbnail_url(profile),
+            "match_score": score,
+            "computed_at": computed_at,
+        }
+        for profile, score, computed_at in rows
+    ]
+
+@router.get("/clients", response_model=List[AdminClientListResponse])
+def get_all_clients(
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    application_status: Optional[str] = None,
+    lifecycle_status: Optional[str] = None,
+    search: Optional[str] = None,
+    min_completion: Optional[float] = Query(None, ge=0, le=100),
+    completion_below: Optional[float] = Query(None, ge=0, le=100),
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Get all clients with optional filtering, e.g. completion_below=50 for profiles under half complete"""
+    query = _filter_clients(
+        db.query(ClientProfile, User, ClientProfile.profile_photo_data.isnot(None)),
+        status, application_status, lifecycle_status, search, min_completion, completion_below,
+    )
     clients = query.order_by(ClientProfile.created_at.desc()).offset(skip).limit(limit).all()
+    # Only legacy photos with neither a thumbnail nor a stored key need their blob,
+    # so fetch just those in one query instead of lazy-loading each deferred column.
+    blob_ids = [
+        client.id for client, _, has_blob in clients
+        if has_blob and not client.profile_photo_url and not build_thumbnail_url(client)
+    ]
+    if blob_ids:
+        db.query(ClientProfile).filter(ClientProfile.id.in_(blob_ids)).options(
+            load_only(ClientProfile.id), undefer(ClientProfile.profile_photo_data)
+        ).all()
     result = []
-    for client, user in clients:
+    for client, user, has_blob in clients:
+        thumbnail_url = build_thumbnail_url(client)
+        needs_photo_data = not thumbnail_url and (client.profile_photo_url or has_blob)
         unread_messages = db.query(ChatMessage).filter(
             ChatMessage.client_id == client.id,
             ChatMessage.receiver_id == admin_user.id,
@@ -362,19 +476,59 @@ def get_all_clients(
             first_name=client.first_name,
             last_name=client.last_name,
             profile_photo_url=build_public_url(client.profile_photo_url),
-            profile_photo_data=_get_profile_photo_base64(client),
+            profile_photo_thumbnail_url=thumbnail_url,
+            profile_photo_data=_get_profile_photo_base64(client) if needs_photo_data else None,
             status=client.status,
             application_status=_normalize_application_status(client.application_status),
             client_lifecycle_status=_normalize_lifecycle_status(client.client_lifecycle_status),
             created_by_admin=bool(client.created_by_admin),
             unread_messages=unread_messages,
             interested_job_category=client.position_applied_for,
+            completion_percentage=client.completion_percentage,
             created_at=client.created_at,
             verification_notes=client.verification_notes
         ))
     
     return result
 
+@router.get("/clients/export")
+def export_clients(
+    file_format: str = Query("csv", alias="format"),
+    status: Optional[str] = None,
+    application_status: Optional[str] = None,
+    lifecycle_status: Optional[str] = None,
+    search: Optional[str] = None,
+    min_completion: Optional[float] = Query(None, ge=0, le=100),
+    completion_below: Optional[float] = Query(None, ge=0, le=100),
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Stream the filtered client registry as CSV or XLSX"""
+    if file_format not in {"csv", "xlsx"}:
+        raise HTTPException(status_code=400, detail="Export format must be csv or xlsx")
+    if file_format == "xlsx" and not xlsx_export_available():
+        raise HTTPException(status_code=400, detail="XLSX export is not available on this server")
+
+    headers = [header for header, _ in CLIENT_EXPORT_COLUMNS]
+    query = _filter_clients(
+        db.query(*[column for _, column in CLIENT_EXPORT_COLUMNS]),
+        status, application_status, lifecycle_status, search, min_completion, completion_below,
+    )
+    rows = query.order_by(ClientProfile.created_at.desc()).yield_per(CLIENT_EXPORT_BATCH_SIZE)
+
+    filename = f"clients_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{file_format}"
+    if file_format == "xlsx":
+        content = iter_xlsx(headers, rows, sheet_title="Clients")
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        content = iter_csv(headers, rows)
+        media_type = "text/csv; charset=utf-8"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @router.post("/clients/create", response_model=UserResponse)
 def admin_create_client(
     client_data: AdminClientCreateRequest,
@@ -416,6 +570,7 @@ def admin_create_client(
         db.flush()
         
         # Create comprehensive client profile with system-generated fields
+        serial_number, registration_number = reserve_client_numbers(db)[0]
         profile = ClientProfile(
             id=str(uuid.uuid4()),
             user_id=user.id,
@@ -425,8 +580,8 @@ def admin_create_client(
             contact_1=client_data.phone_number,  # Use phone as primary contact
             # System-generated fields
             registration_date=datetime.utcnow(),
-            serial_number=generate_serial_number(db),
-            registration_number=generate_registration_number(db),
+            serial_number=serial_number,
+            registration_number=registration_number,
             status=ClientStatus.new,
             application_status=ApplicationWorkflowStatusEnum.pending_profile_completion.value,
             client_lifecycle_status=ClientLifecycleStatusEnum.new_lead.value,
@@ -434,6 +589,7 @@ def admin_create_client(
             position_applied_for=client_data.interested_job_category,
             last_modified_by=admin_user.id
         )
+        apply_onboarding_completion(profile)
         db.add(profile)
         _log_admin_action(
             db,
@@ -442,6 +598,7 @@ def admin_create_client(
             target_user=user,
             details=f"Created client account for {client_data.phone_number}",
         )
+        queue_match_refresh(db, client_ids=[profile.id])
         db.commit()
         db.refresh(user)
         
@@ -461,6 +618,25 @@ def admin_create_client(
             detail=f"Failed to create client: {str(e)}"
         )
 
+@router.post("/clients/import")
+async def import_clients(
+    file: UploadFile = File(...),
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Bulk-create client accounts from a CSV or JSON file, streaming NDJSON progress"""
+    contents = await file.read()
+    if len(contents) > IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=400, detail="Import file too large (max 5MB)")
+    try:
+        rows = parse_import_rows(contents, file.filename, file.content_type)
+    except ImportFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if not rows:
+        raise HTTPException(status_code=400, detail="Import file has no rows")
+
+    return StreamingResponse(run_client_import(db, rows, admin_user), media_type="application/x-ndjson")
+
 @router.put("/clients/{client_id}/onboard", response_model=ClientProfileResponse)
 def admin_complete_onboarding(
     client_id: str,
@@ -486,7 +662,7 @@ def admin_complete_onboarding(
     client_profile.last_modified_by = admin_user.id
     client_profile.updated_at = datetime.utcnow()
     
-    if _check_onboarding_complete(client_profile):
+    if apply_onboarding_completion(client_profile).is_complete:
         client_profile.status = ClientStatus.under_review
         client_profile.application_status = ApplicationWorkflowStatusEnum.pending_documents.value
         client_profile.onboarding_completed_at = datetime.utcnow()
@@ -498,12 +674,13 @@ def admin_complete_onboarding(
     client_profile.application_status_updated_by = admin_user.id
     client_profile.lifecycle_status_updated_at = datetime.utcnow()
     client_profile.lifecycle_status_updated_by = admin_user.id
+    queue_match_refresh(db, client_ids=[client_profile.id])
     
     try:
         db.commit()
         db.refresh(client_profile)
         user = db.query(User).filter(User.id == client_profile.user_id).first()
-        return _serialize_client_profile(client_profile, user)
+        return _client_profile_response(client_profile, user)
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -525,8 +702,7 @@ def get_client_profile(
             detail="Client not found"
         )
     user = db.query(User).filter(User.id == client_profile.user_id).first()
-    profile_dict = _serialize_client_profile(client_profile, user)
-    return profile_dict
+    return _client_profile_response(client_profile, user)
 
 @router.put("/clients/{client_id}/verify", response_model=ClientProfileResponse)
 def verify_client(
@@ -554,7 +730,7 @@ def verify_client(
         db.commit()
         db.refresh(client_profile)
         user = db.query(User).filter(User.id == client_profile.user_id).first()
-        return _serialize_client_profile(client_profile, user)
+        return _client_profile_response(client_profile, user)
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -621,28 +797,15 @@ def get_client_onboarding_status(
             detail="Client not found"
         )
     
-    completion_status = _get_onboarding_completion(client_profile)
+    completion = stored_onboarding_completion(client_profile)
     return {
         "client_id": client_id,
-        "is_complete": completion_status["is_complete"],
-        "completion_percentage": completion_status["percentage"],
-        "missing_fields": completion_status["missing_fields"],
+        "is_complete": completion.is_complete,
+        "completion_percentage": completion.percentage,
+        "missing_fields": completion.missing_fields,
         "status": client_profile.status
     }
 
-def _check_onboarding_complete(profile: ClientProfile) -> bool:
-    """Check if onboarding is complete"""
-    required_fields = [
-        'first_name', 'last_name', 'date_of_birth', 'gender', 'nationality',
-        'phone_primary', 'address_current', 'emergency_contact_name',
-        'emergency_contact_phone', 'emergency_contact_relationship'
-    ]
-    
-    for field in required_fields:
-        if not getattr(profile, field, None):
-            return False
-    return True
-
 @router.post("/clients/{client_id}/documents/upload")
 async def admin_upload_client_document(
     client_id: str,
@@ -691,7 +854,7 @@ async def admin_upload_client_document(
     if status not in {item.value for item in DocumentReviewStatus}:
         raise HTTPException(status_code=400, detail="Invalid document status")
 
-    stored_file = save_bytes("client_documents", file.filename, contents, file.content_type)
+    stored_file = await get_async_storage().asave("client_documents", file.filename, contents, file.content_type, db=db)
 
     document = Document(
         id=str(uuid.uuid4()),
@@ -748,6 +911,65 @@ def get_client_documents(
     
     return [_serialize_document(doc) for doc in documents]
 
+def _document_archive_entry(doc: Document, name: str, db: Session) -> ArchiveEntry:
+    async def open_stream():
+        if doc.file_url:
+            async for chunk in get_async_storage().aopen_stream(doc.file_url):
+                yield chunk
+            return
+        legacy_data = await run_in_threadpool(
+            lambda: db.query(Document.file_data).filter(Document.id == doc.id).scalar()
+        )
+        if legacy_data is None:
+            raise FileNotFoundError(f"No stored data for document {doc.id}")
+        yield legacy_data
+
+    return ArchiveEntry(name=name, modified_at=doc.uploaded_at or doc.created_at, open_stream=open_stream)
+
+
+@router.get("/clients/{client_id}/documents/archive")
+def download_client_documents_archive(
+    client_id: str,
+    document_type: Optional[str] = None,
+    status: Optional[str] = None,
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Stream every matching document for a client as a single ZIP file."""
+    client = db.query(ClientProfile).filter(ClientProfile.id == client_id).first()
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    query = db.query(Document).filter(Document.client_id == client_id)
+    if document_type:
+        try:
+            query = query.filter(Document.document_type == DocumentType(document_type))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Invalid document type") from exc
+    if status:
+        if status not in {item.value for item in DocumentReviewStatus}:
+            raise HTTPException(status_code=400, detail="Invalid document status")
+        query = query.filter(Document.status == status)
+
+    used_names = set()
+    entries = []
+    for doc in query.order_by(Document.document_type, Document.uploaded_at).all():
+        folder = doc.document_type.value if hasattr(doc.document_type, "value") else doc.document_type
+        # file_name comes from the uploader; keep only its last component so entries cannot escape the folder
+        base_name = PurePosixPath((doc.file_name or "").replace("\\", "/")).name
+        if base_name in {"", ".", ".."}:
+            base_name = doc.id
+        name = unique_archive_name(f"{folder}/{base_name}", used_names)
+        entries.append(_document_archive_entry(doc, name, db))
+
+    client_name = "_".join(part for part in (client.first_name, client.last_name) if part) or client.id
+    filename = f"{client.serial_number or client_name}_documents.zip".replace(" ", "_")
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @router.delete("/clients/{client_id}/documents/{document_id}")
 def delete_client_document(
     client_id: str,
@@ -776,7 +998,7 @@ def delete_client_document(
             detail="Document not found"
         )
     
-    delete_file(document.file_url)
+    delete_file(document.file_url, db)
     
     # Delete from database
     db.delete(document)
@@ -817,6 +1039,90 @@ def verify_document(
         "status": document.status,
     }
 
+BULK_STATUS_CHUNK_SIZE = 500
+
+# status_type -> (allowed values, status column, notes column, updated_at column, updated_by column)
+BULK_STATUS_COLUMNS = {
+    "application_status": (
+        {item.value for item in ApplicationWorkflowStatusEnum},
+        ClientProfile.application_status,
+        "application_status_notes",
+        "application_status_updated_at",
+        "application_status_updated_by",
+    ),
+    "lifecycle_status": (
+        {item.value for item in ClientLifecycleStatusEnum},
+        ClientProfile.client_lifecycle_status,
+        "lifecycle_status_notes",
+        "lifecycle_status_updated_at",
+        "lifecycle_status_updated_by",
+    ),
+}
+
+
+@router.post("/clients/bulk-status", response_model=BulkStatusUpdateResponse)
+def bulk_update_client_status(
+    status_data: BulkStatusUpdateRequest,
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Move many clients to one application or lifecycle status in a single transaction"""
+    allowed, status_column, notes_field, updated_at_field, updated_by_field = BULK_STATUS_COLUMNS[status_data.status_type]
+    if status_data.status not in allowed:
+        raise HTTPException(status_code=400, detail=f"Invalid {status_data.status_type.replace('_', ' ')}")
+
+    now = datetime.utcnow()
+    outcomes = {}
+    for start in range(0, len(status_data.client_ids), BULK_STATUS_CHUNK_SIZE):
+        chunk = status_data.client_ids[start:start + BULK_STATUS_CHUNK_SIZE]
+        current = dict(db.query(ClientProfile.id, status_column).filter(ClientProfile.id.in_(chunk)).all())
+        changed = [client_id for client_id in chunk if client_id in current and current[client_id] != status_data.status]
+        for client_id in chunk:
+            if client_id not in current:
+                outcomes[client_id] = ("not_found", None)
+            else:
+                outcomes[client_id] = ("updated" if client_id in changed else "unchanged", current[client_id])
+        if not changed:
+            continue
+
+        db.execute(
+            update(ClientProfile)
+            .where(ClientProfile.id.in_(changed))
+            .values({
+                status_column.key: status_data.status,
+                notes_field: status_data.notes,
+                updated_at_field: now,
+                updated_by_field: admin_user.id,
+                "updated_at": now,
+                "last_modified_by": admin_user.id,
+            }),
+            execution_options={"synchronize_session": False},
+        )
+        db.execute(insert(StatusHistory), [
+            {
+                "id": str(uuid.uuid4()),
+                "client_id": client_id,
+                "previous_status": current[client_id],
+                "new_status": status_data.status,
+                "status_type": status_data.status_type,
+                "changed_by": admin_user.id,
+                "notes": status_data.notes,
+                "created_at": now,
+            }
+            for client_id in changed
+        ])
+        if status_data.status_type == "lifecycle_status":
+            queue_match_refresh(db, client_ids=changed)
+    db.commit()
+
+    results = [
+        {"client_id": client_id, "outcome": outcome, "old_status": old_status}
+        for client_id, (outcome, old_status) in outcomes.items()
+    ]
+    counts = {name: sum(1 for item in results if item["outcome"] == name) for name in ("updated", "unchanged", "not_found")}
+    return {"status_type": status_data.status_type, "new_status": status_data.status, **counts, "results": results}
+
+
 @router.put("/clients/{client_id}/status")
 def update_client_status(
     client_id: str,
@@ -919,6 +1225,7 @@ def update_client_lifecycle_status(
         changed_by=admin_user.id,
         notes=status_data.notes,
     )
+    queue_match_refresh(db, client_ids=[client.id])
     db.commit()
     return {
         "client_id": client.id,
@@ -973,31 +1280,7 @@ def delete_client(
         client_name = f"{client.first_name or ''} {client.last_name or ''}".strip() or "Unnamed Client"
         user_email = user.email
         
-        # Delete associated documents first
-        documents = db.query(Document).filter(Document.client_id == client_id).all()
-        for doc in documents:
-            delete_file(doc.file_url)
-            db.delete(doc)
-        
-        delete_file(client.profile_photo_url)
-        
-        # Delete any chat messages
-        chat_messages = db.query(ChatMessage).filter(
-            (ChatMessage.sender_id == user.id) | (ChatMessage.receiver_id == user.id)
-        ).all()
-        for message in chat_messages:
-            db.delete(message)
-        
-        # Delete any job applications
-        applications = db.query(JobApplication).filter(JobApplication.client_id == client_id).all()
-        for app in applications:
-            db.delete(app)
-        
-        # Delete the client profile
-        db.delete(client)
-        
-        # Delete the user account
-        db.delete(user)
+        deleted_records = delete_client_records(db, client, user)
         
         # Commit all deletions
         db.commit()
@@ -1009,6 +1292,7 @@ def delete_client(
                 "name": client_name,
                 "email": user_email
             },
+            "deleted_records": deleted_records,
             "deleted_by": admin_user.email,
             "deleted_at": datetime.utcnow().isoformat()
         }
@@ -1024,6 +1308,7 @@ def delete_client(
 @router.post("/clients/{client_id}/photo")
 async def upload_client_profile_photo_admin(
     client_id: str,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
@@ -1050,9 +1335,14 @@ async def upload_client_profile_photo_admin(
         if not file_bytes:
             raise HTTPException(status_code=400, detail="No file uploaded")
 
-        delete_file(client.profile_photo_url)
-        stored_file = save_bytes("profile_photos", file.filename, file_bytes, file.content_type)
-        client.profile_photo_url = stored_file.key
+        stored_file = await get_async_storage().asave("profile_photos", file.filename, file_bytes, file.content_type, db=db)
+        if client.profile_photo_url == stored_file.key:
+            # Identical re-upload of a content-addressed photo: drop the extra reference.
+            await get_async_storage().adelete(stored_file.key, db)
+        else:
+            await run_in_threadpool(delete_profile_photo, client, db)
+            client.profile_photo_url = stored_file.key
+            background_tasks.add_task(generate_profile_thumbnails, client.id, stored_file.key, file_bytes)
         client.profile_photo_data = None
         client.updated_at = datetime.utcnow()
         client.last_modified_by = admin_user.id
@@ -1073,41 +1363,6 @@ async def upload_client_profile_photo_admin(
             detail=f"Failed to upload client profile photo: {str(e)}"
         )
 
-def _get_onboarding_completion(profile: ClientProfile) -> dict:
-    """Get detailed onboarding completion status"""
-    required_fields = [
-        'first_name', 'last_name', 'date_of_birth', 'gender', 'nationality',
-        'phone_primary', 'address_current', 'emergency_contact_name',
-        'emergency_contact_phone', 'emergency_contact_relationship'
-    ]
-    
-    optional_fields = [
-        'middle_name', 'nin', 'passport_number', 'passport_expiry',
-        'phone_secondary', 'address_permanent'
-    ]
-    
-    filled_required = 0
-    missing_fields = []
-    
-    for field in required_fields:
-        if getattr(profile, field, None):
-            filled_required += 1
-        else:
-            missing_fields.append(field)
-    
-    filled_optional = sum(1 for field in optional_fields if getattr(profile, field, None))
-    
-    total_fields = len(required_fields) + len(optional_fields)
-    total_filled = filled_required + filled_optional
-    
-    return {
-        "is_complete": len(missing_fields) == 0,
-        "percentage": round((total_filled / total_fields) * 100, 1),
-        "missing_fields": missing_fields,
-        "required_completed": filled_required,
-        "optional_completed": filled_optional
-    }
-
 @router.get("/clients/by_user/{user_id}", response_model=ClientProfileResponse)
 def get_client_profile_by_user_id(
     user_id: str,
@@ -1122,7 +1377,7 @@ def get_client_profile_by_user_id(
             detail="Client not found"
         )
     user = db.query(User).filter(User.id == client_profile.user_id).first()
-    return _serialize_client_profile(client_profile, user)
+    return _client_profile_response(client_profile, user)
 
 @router.get("/clients/{client_id}/photo")
 def get_client_photo(
@@ -1130,7 +1385,12 @@ def get_client_photo(
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    profile = db.query(ClientProfile).filter(ClientProfile.id == client_id).first()
+    profile = (
+        db.query(ClientProfile)
+        .options(undefer(ClientProfile.profile_photo_data))
+        .filter(ClientProfile.id == client_id)
+        .first()
+    )
     if not profile:
         raise HTTPException(status_code=404, detail="Photo not found")
     if profile.profile_photo_data:
@@ -1153,7 +1413,7 @@ def get_document_file(
     """
     Return the file data for a document as base64, along with its mime type and file name.
     """
-    doc = db.query(Document).filter(Document.id == document_id).first()
+    doc = db.query(Document).options(undefer(Document.file_data)).filter(Document.id == document_id).first()
     if not doc:
         raise HTTPException(status_code=404, detail="File not found")
     if doc.file_data:
@@ -1168,23 +1428,54 @@ def get_document_file(
         "allow_download": True,
     }
 
+def _serialize_application(application: JobApplication) -> dict:
+    client = application.client
+    client_name = f"{client.first_name or ''} {client.last_name or ''}".strip() if client else ""
+    return {
+        "id": application.id,
+        "job_id": application.job_id,
+        "job": {"title": application.job.title, "company_name": application.job.company_name} if application.job else None,
+        "client_id": application.client_id,
+        "client_name": client_name or None,
+        "application_status": (
+            application.application_status.value
+            if hasattr(application.application_status, "value") else application.application_status
+        ),
+        "applied_date": application.applied_date,
+        "interview_date": application.interview_date,
+        "notes": application.notes,
+        "created_at": application.created_at,
+        "cursor": encode_cursor(application.created_at, application.id),
+    }
+
+
 @router.get("/applications")
 def get_all_applications(
+    response: Response,
+    job_id: Optional[str] = None,
+    application_status: Optional[str] = Query(None, alias="status"),
+    applied_from: Optional[date] = None,
+    applied_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Get all job applications (admin only)"""
-    applications = db.query(JobApplication).all()
-    result = []
-    for app in applications:
-        job = db.query(JobOpportunity).filter(JobOpportunity.id == app.job_id).first()
-        result.append({
-            "id": app.id,
-            "job_id": app.job_id,
-            "job": {"title": job.title} if job else None,
-            "client_id": app.client_id,
-            "application_status": app.application_status,
-            "applied_date": app.applied_date,
-            "notes": app.notes,
-        })
-    return result
+    """
+    Get job applications with job and client details, newest first (admin only).
+
+    Every application is returned unless limit or cursor is given; paged
+    requests get the next page's cursor in X-Next-Cursor.
+    """
+    limit = application_page_limit(cursor, limit)
+    try:
+        applications = list_job_applications(
+            db, job_id=job_id, status=application_status, applied_from=applied_from,
+            applied_to=applied_to, cursor=cursor, limit=limit,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid application status or cursor") from exc
+    next_cursor = next_application_cursor(applications, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_serialize_application(application) for application in applications]
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models import ClientProfile, ClientStatus, User, UserRole
+from app.onboarding import apply_onboarding_completion
 from app.schemas import (
     ApplicationWorkflowStatusEnum,
     AuthResponse,
@@ -102,6 +103,7 @@ def register_client(client_data: ClientCreate, db: Session = Depends(get_db)):
         position_applied_for=client_data.interested_job_category,
         registration_date=datetime.utcnow(),
     )
+    apply_onboarding_completion(profile)
     db.add(profile)
     db.commit()
     db.refresh(user)
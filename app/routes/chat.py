@@ -14,14 +14,16 @@ from app.schemas import (
     ChatMessageResponse,
     ChatUnreadCountResponse,
 )
+from app.queries import get_client_profile_summary
 from app.storage import build_public_url
+from app.thumbnails import build_thumbnail_url
 
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
 def _get_client_profile_for_user(db: Session, user_id: str) -> ClientProfile | None:
-    return db.query(ClientProfile).filter(ClientProfile.user_id == user_id).first()
+    return get_client_profile_summary(db, user_id)
 
 
 def _serialize_message(message: ChatMessage) -> ChatMessageResponse:
@@ -196,6 +198,7 @@ def get_conversations(
                 "latest_message": _serialize_message(message),
                 "unread_count": 0,
                 "profile_photo_url": build_public_url(other_profile.profile_photo_url) if other_profile else None,
+                "profile_photo_thumbnail_url": build_thumbnail_url(other_profile),
             }
         if message.receiver_id == current_user.id and not message.is_read:
             conversations[other_user_id]["unread_count"] += 1
@@ -1,15 +1,16 @@
 import base64
+import mimetypes
 import uuid
 from io import BytesIO
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 
+from app.async_storage import get_async_storage
 from app.database import get_db
 from app.dependencies import get_client_user, get_current_user, get_user_role_value
 from app.models import (
-    ClientProfile,
     Document,
     DocumentAccessLevel,
     DocumentReviewStatus,
@@ -17,8 +18,9 @@ from app.models import (
     DocumentVisibility,
     User,
 )
+from app.queries import get_client_profile_id
 from app.schemas import DocumentPreviewResponse, DocumentUploadResponse
-from app.storage import build_public_url, read_bytes, save_bytes
+from app.storage import build_public_url, read_bytes
 
 
 router = APIRouter(prefix="/documents", tags=["documents"])
@@ -49,13 +51,14 @@ def _serialize_document(document: Document) -> dict:
 
 
 def _get_document_for_user(document_id: str, current_user: User, db: Session) -> Document:
-    document = db.query(Document).filter(Document.id == document_id).first()
+    # Callers serve the file itself, so legacy rows need their blob.
+    document = db.query(Document).options(undefer(Document.file_data)).filter(Document.id == document_id).first()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
     if get_user_role_value(current_user) == "client":
-        profile = db.query(ClientProfile).filter(ClientProfile.user_id == current_user.id).first()
-        if not profile or profile.id != document.client_id:
+        profile_id = get_client_profile_id(db, current_user.id)
+        if not profile_id or profile_id != document.client_id:
             raise HTTPException(status_code=403, detail="Access denied")
         if document.visibility == DocumentVisibility.admin_only.value:
             raise HTTPException(status_code=403, detail="Access denied")
@@ -92,14 +95,14 @@ async def upload_document(
     if len(contents) > max_file_size:
         raise HTTPException(status_code=400, detail="File too large (max 5MB)")
 
-    profile = db.query(ClientProfile).filter(ClientProfile.user_id == current_user.id).first()
-    if not profile:
+    profile_id = get_client_profile_id(db, current_user.id)
+    if not profile_id:
         raise HTTPException(status_code=404, detail="Profile not found")
 
-    stored_file = save_bytes("client_documents", file.filename, contents, file.content_type)
+    stored_file = await get_async_storage().asave("client_documents", file.filename, contents, file.content_type, db=db)
     document = Document(
         id=str(uuid.uuid4()),
-        client_id=profile.id,
+        client_id=profile_id,
         document_type=document_type_enum,
         file_name=file.filename,
         file_url=stored_file.key,
@@ -130,11 +133,11 @@ def get_my_documents(
     current_user: User = Depends(get_client_user),
     db: Session = Depends(get_db)
 ):
-    profile = db.query(ClientProfile).filter(ClientProfile.user_id == current_user.id).first()
-    if not profile:
+    profile_id = get_client_profile_id(db, current_user.id)
+    if not profile_id:
         raise HTTPException(status_code=404, detail="Profile not found")
 
-    documents = db.query(Document).filter(Document.client_id == profile.id).all()
+    documents = db.query(Document).filter(Document.client_id == profile_id).all()
     return [_serialize_document(document) for document in documents]
 
 
@@ -151,15 +154,12 @@ async def download_document(
     ):
         raise HTTPException(status_code=403, detail="This document is view-only")
 
+    headers = {"Content-Disposition": f'attachment; filename="{document.file_name}"'}
     if document.file_data:
-        file_bytes = document.file_data
-        mime_type = document.mime_type
-    else:
-        file_bytes, detected_mime_type = read_bytes(document.file_url)
-        mime_type = document.mime_type or detected_mime_type or "application/octet-stream"
+        return StreamingResponse(BytesIO(document.file_data), media_type=document.mime_type, headers=headers)
 
-    headers = {"Content-Disposition": f'attachment; filename="{document.file_name}"'}
-    return StreamingResponse(BytesIO(file_bytes), media_type=mime_type, headers=headers)
+    mime_type = document.mime_type or mimetypes.guess_type(document.file_name)[0] or "application/octet-stream"
+    return StreamingResponse(get_async_storage().aopen_stream(document.file_url), media_type=mime_type, headers=headers)
 
 
 @router.get("/{document_id}/preview", response_model=DocumentPreviewResponse)
@@ -1,13 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 import uuid
-from datetime import datetime
+from datetime import date, datetime
+from typing import Optional
 
-from app.models import User, JobOpportunity, JobApplication, ClientProfile
+from app.models import User, ApplicationStatus, JobOpportunity, JobApplication, ClientProfile, JobMatch, MatchRefresh
 from app.schemas import ApplicationWorkflowStatusEnum, ClientLifecycleStatusEnum
-from app.schemas import JobOpportunityCreate, JobOpportunityResponse, JobApplicationResponse
-from app.database import get_db
+from app.schemas import (
+    AdminJobOpportunityResponse,
+    JobApplicationResponse,
+    JobOpportunityCreate,
+    JobOpportunityResponse,
+    RecommendedJobResponse,
+)
+from app.database import get_db, insert_ignoring_conflicts
 from app.dependencies import get_admin_user, get_client_user
+from app.job_board import JOB_BOARD_CACHE_CONTROL, JOB_BOARD_MAX_LIMIT, etag_matches, job_board_cache
+from app.job_counters import record_job_application
+from app.job_search import JOB_SEARCH_PAGE_SIZE, build_job_search_text, next_job_search_cursor, search_jobs
+from app.matching import queue_match_refresh
+from app.queries import (
+    APPLICANT_COLUMNS,
+    APPLICATION_PAGE_SIZE,
+    application_page_limit,
+    encode_cursor,
+    get_client_profile_id,
+    list_job_applications,
+    next_application_cursor,
+)
+from app.thumbnails import build_thumbnail_url
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
@@ -23,24 +45,92 @@ def create_job(
         created_by=admin_user.id,
         is_active=True
     )
+    job.search_text = build_job_search_text(job)
     db.add(job)
+    queue_match_refresh(db, job_ids=[job.id])
     db.commit()
+    job_board_cache.invalidate()
     db.refresh(job)
     return {"message": "Job created successfully", "job_id": job.id}
 
-@router.get("/")
+@router.get("/", response_model=list[JobOpportunityResponse])
 def get_jobs(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=JOB_BOARD_MAX_LIMIT),
     is_active: bool = True,
     db: Session = Depends(get_db)
 ):
-    jobs = db.query(JobOpportunity).filter(
-        JobOpportunity.is_active == is_active
-    ).offset(skip).limit(limit).all()
+    def render():
+        jobs = db.query(JobOpportunity).filter(
+            JobOpportunity.is_active == is_active
+        ).order_by(JobOpportunity.created_at.desc(), JobOpportunity.id).offset(skip).limit(limit).all()
+        return [JobOpportunityResponse.model_validate(job) for job in jobs]
+
+    body, etag = job_board_cache.get_or_render((skip, limit, is_active), render)
+    headers = {"ETag": etag, "Cache-Control": JOB_BOARD_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/search", response_model=list[JobOpportunityResponse])
+def search_job_board(
+    response: Response,
+    q: Optional[str] = None,
+    country: Optional[str] = None,
+    city: Optional[str] = None,
+    job_type: Optional[str] = None,
+    salary_min: Optional[float] = None,
+    salary_max: Optional[float] = None,
+    open_only: bool = True,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    limit: int = JOB_SEARCH_PAGE_SIZE,
+    db: Session = Depends(get_db)
+):
+    """Search active jobs; sort is newest, deadline or salary. The next page's cursor is in X-Next-Cursor."""
+    try:
+        jobs = search_jobs(
+            db, q=q, country=country, city=city, job_type=job_type, salary_min=salary_min,
+            salary_max=salary_max, open_only=open_only, sort=sort, cursor=cursor, limit=limit,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid job type, sort or cursor") from exc
+    next_cursor = next_job_search_cursor(jobs, sort, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return jobs
 
-@router.put("/{job_id}", response_model=JobOpportunityResponse)
+@router.get("/recommended", response_model=list[RecommendedJobResponse])
+def get_recommended_jobs(
+    limit: int = Query(10, ge=1, le=50),
+    user: User = Depends(get_client_user),
+    db: Session = Depends(get_db)
+):
+    """Open jobs best matching the current client's profile that they have not applied for yet"""
+    client_profile_id = get_client_profile_id(db, user.id)
+    if not client_profile_id:
+        raise HTTPException(status_code=400, detail="User does not have a client profile.")
+    applied = db.query(JobApplication.job_id).filter(JobApplication.client_id == client_profile_id)
+    rows = (
+        db.query(JobOpportunity, JobMatch.score)
+        .join(JobMatch, JobMatch.job_id == JobOpportunity.id)
+        .filter(
+            JobMatch.client_id == client_profile_id,
+            JobOpportunity.is_active == True,
+            or_(JobOpportunity.application_deadline.is_(None), JobOpportunity.application_deadline >= date.today()),
+            JobOpportunity.id.notin_(applied),
+        )
+        .order_by(JobMatch.score.desc(), JobOpportunity.id)
+        .limit(limit)
+        .all()
+    )
+    return [
+        RecommendedJobResponse(**JobOpportunityResponse.model_validate(job).model_dump(), match_score=score)
+        for job, score in rows
+    ]
+
+@router.put("/{job_id}", response_model=AdminJobOpportunityResponse)
 def update_job(
     job_id: str,
     job_data: JobOpportunityCreate,
@@ -53,7 +143,10 @@ def update_job(
     # Update fields
     for field, value in job_data.dict(exclude_unset=True).items():
         setattr(job, field, value)
+    job.search_text = build_job_search_text(job)
+    queue_match_refresh(db, job_ids=[job.id])
     db.commit()
+    job_board_cache.invalidate()
     db.refresh(job)
     return job
 
@@ -64,24 +157,36 @@ def apply_for_job(
     user: User = Depends(get_client_user),
     db: Session = Depends(get_db)
 ):
+    """
+    Apply the current client to a job.
+
+    Retries carrying an Idempotency-Key are replayed by IdempotencyMiddleware.
+    The unique (job_id, client_id) index decides races, so concurrent duplicates
+    never create a second application.
+    """
+
     job = db.query(JobOpportunity).filter(JobOpportunity.id == job_id, JobOpportunity.is_active == True).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found or inactive")
-    # Check if user already applied (use JobApplication model)
-    from app.models import JobApplication, ClientProfile
     client_profile = db.query(ClientProfile).filter(ClientProfile.user_id == user.id).first()
     if not client_profile:
         raise HTTPException(status_code=400, detail="User does not have a client profile.")
-    existing = db.query(JobApplication).filter(JobApplication.job_id == job_id, JobApplication.client_id == client_profile.id).first()
-    if existing:
+
+    application_id = str(uuid.uuid4())
+    insert_ignoring_conflicts(db, JobApplication, [{
+        "id": application_id,
+        "job_id": job_id,
+        "client_id": client_profile.id,
+        "application_status": ApplicationStatus.applied,
+    }])
+    stored_id = db.query(JobApplication.id).filter(
+        JobApplication.job_id == job_id, JobApplication.client_id == client_profile.id
+    ).scalar()
+    if stored_id != application_id:
+        db.rollback()
         raise HTTPException(status_code=400, detail="You have already applied for this job.")
-    application = JobApplication(
-        id=str(uuid.uuid4()),
-        job_id=job_id,
-        client_id=client_profile.id,
-        application_status="applied"
-    )
-    db.add(application)
+
+    record_job_application(db, job_id, datetime.utcnow())
     client_profile.application_status = ApplicationWorkflowStatusEnum.submitted.value
     client_profile.application_status_updated_at = datetime.utcnow()
     client_profile.application_status_updated_by = user.id
@@ -90,8 +195,7 @@ def apply_for_job(
         client_profile.lifecycle_status_updated_at = datetime.utcnow()
         client_profile.lifecycle_status_updated_by = user.id
     db.commit()
-    db.refresh(application)
-    return {"message": "Application submitted successfully", "application_id": application.id}
+    return {"message": "Application submitted successfully", "application_id": application_id}
 
 @router.delete("/{job_id}", response_model=dict)
 def delete_job(
@@ -102,8 +206,11 @@ def delete_job(
     job = db.query(JobOpportunity).filter(JobOpportunity.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    db.query(JobMatch).filter(JobMatch.job_id == job_id).delete(synchronize_session=False)
+    db.query(MatchRefresh).filter(MatchRefresh.entity_type == "job", MatchRefresh.entity_id == job_id).delete(synchronize_session=False)
     db.delete(job)
     db.commit()
+    job_board_cache.invalidate()
     return {"message": "Job deleted successfully"}
 
 
@@ -113,17 +220,106 @@ def get_my_applications(
     user: User = Depends(get_client_user),
     db: Session = Depends(get_db)
 ):
-    client_profile = db.query(ClientProfile).filter(ClientProfile.user_id == user.id).first()
-    if not client_profile:
+    client_profile_id = get_client_profile_id(db, user.id)
+    if not client_profile_id:
         raise HTTPException(status_code=400, detail="User does not have a client profile.")
-    applications = db.query(JobApplication).filter(JobApplication.client_id == client_profile.id).order_by(JobApplication.created_at.desc()).all()
+    applications = db.query(JobApplication).filter(JobApplication.client_id == client_profile_id).order_by(JobApplication.created_at.desc()).all()
     return applications
 
+# Get jobs with their application counters (admin only)
+@router.get("/admin/jobs", response_model=list[AdminJobOpportunityResponse])
+def get_admin_jobs(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=JOB_BOARD_MAX_LIMIT),
+    is_active: Optional[bool] = None,
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """The job board plus application_count and last_applied_at, which the public listing does not expose"""
+    query = db.query(JobOpportunity)
+    if is_active is not None:
+        query = query.filter(JobOpportunity.is_active == is_active)
+    return query.order_by(JobOpportunity.created_at.desc(), JobOpportunity.id).offset(skip).limit(limit).all()
+
 # Get all job applications (admin only)
 @router.get("/admin/applications", response_model=list[JobApplicationResponse])
 def get_all_applications(
+    response: Response,
+    job_id: Optional[str] = None,
+    application_status: Optional[str] = Query(None, alias="status"),
+    applied_from: Optional[date] = None,
+    applied_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    applications = db.query(JobApplication).order_by(JobApplication.created_at.desc()).all()
+    limit = application_page_limit(cursor, limit)
+    try:
+        applications = list_job_applications(
+            db, job_id=job_id, status=application_status, applied_from=applied_from,
+            applied_to=applied_to, cursor=cursor, limit=limit, include_details=False,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid application status or cursor") from exc
+    next_cursor = next_application_cursor(applications, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return applications
+
+
+def _serialize_applicant(application: JobApplication) -> dict:
+    client = application.client
+    return {
+        "application_id": application.id,
+        "client_id": application.client_id,
+        "application_status": (
+            application.application_status.value
+            if hasattr(application.application_status, "value") else application.application_status
+        ),
+        "applied_date": application.applied_date,
+        "created_at": application.created_at,
+        "first_name": client.first_name if client else None,
+        "last_name": client.last_name if client else None,
+        "serial_number": client.serial_number if client else None,
+        "contact_1": client.contact_1 if client else None,
+        "position_applied_for": client.position_applied_for if client else None,
+        "client_lifecycle_status": client.client_lifecycle_status if client else None,
+        "profile_photo_thumbnail_url": build_thumbnail_url(client),
+        "cursor": encode_cursor(application.created_at, application.id),
+    }
+
+
+# Get the applicants for one job (admin only)
+@router.get("/{job_id}/applicants")
+def get_job_applicants(
+    job_id: str,
+    response: Response,
+    application_status: Optional[str] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = APPLICATION_PAGE_SIZE,
+    admin_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Applicants of one job; X-Total-Count is the number matching the status filter across all pages."""
+    application_count = db.query(JobOpportunity.application_count).filter(JobOpportunity.id == job_id).scalar()
+    if application_count is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        applications = list_job_applications(
+            db, job_id=job_id, status=application_status, cursor=cursor, limit=limit,
+            client_columns=APPLICANT_COLUMNS,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid application status or cursor") from exc
+    if application_status:
+        # The stored counter covers every status, so a filtered total has to be counted
+        application_count = db.query(JobApplication).filter(
+            JobApplication.job_id == job_id,
+            JobApplication.application_status == ApplicationStatus(application_status),
+        ).count()
+    response.headers["X-Total-Count"] = str(application_count)
+    next_cursor = next_application_cursor(applications, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_serialize_applicant(application) for application in applications]
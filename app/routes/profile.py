@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status, UploadFile, File
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
@@ -11,40 +11,41 @@ from app.schemas import ApplicationWorkflowStatusEnum, ClientLifecycleStatusEnum
 from app.schemas import ClientProfileUpdate, ClientProfileResponse, ClientProfileCreate
 from app.database import get_db
 from app.dependencies import get_client_user
+from app.matching import queue_match_refresh
+from app.onboarding import REQUIRED_ONBOARDING_FIELDS, apply_onboarding_completion, stored_onboarding_completion
+from app.profile_serializer import client_profile_response
 from app.storage import build_public_url, delete_file, read_bytes, save_bytes
+from app.thumbnails import build_thumbnail_url, delete_profile_photo, generate_profile_thumbnails
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/profile", tags=["profile"])
 
 
-def _serialize_profile(profile: ClientProfile, user: User) -> dict:
-    profile_dict = {
-        column.name: getattr(profile, column.name)
-        for column in ClientProfile.__table__.columns
-    }
-    profile_dict["user_email"] = user.email
-    profile_dict["profile_photo_url"] = build_public_url(profile.profile_photo_url)
-    profile_dict["profile_photo_data"] = None
-    if profile.profile_photo_data and not profile.profile_photo_url:
-        profile_dict["profile_photo_data"] = base64.b64encode(profile.profile_photo_data).decode("utf-8")
-    elif profile.profile_photo_url and not profile_dict["profile_photo_url"]:
+def _profile_response(profile: ClientProfile, user: User) -> Response:
+    photo_url = build_public_url(profile.profile_photo_url)
+    photo_data = None
+    if not profile.profile_photo_url and profile.profile_photo_data:
+        photo_data = base64.b64encode(profile.profile_photo_data).decode("utf-8")
+    elif profile.profile_photo_url and not photo_url:
         try:
             file_bytes, _ = read_bytes(profile.profile_photo_url)
-            profile_dict["profile_photo_data"] = base64.b64encode(file_bytes).decode("utf-8")
+            photo_data = base64.b64encode(file_bytes).decode("utf-8")
         except Exception:
-            profile_dict["profile_photo_data"] = None
-    if not profile_dict.get("application_status"):
-        profile_dict["application_status"] = ApplicationWorkflowStatusEnum.draft.value
-    if not profile_dict.get("client_lifecycle_status"):
-        profile_dict["client_lifecycle_status"] = ClientLifecycleStatusEnum.new_lead.value
-    return profile_dict
+            photo_data = None
+    return client_profile_response(
+        profile,
+        user_email=user.email,
+        profile_photo_url=photo_url,
+        profile_photo_thumbnail_url=build_thumbnail_url(profile, 256),
+        profile_photo_data=photo_data,
+    )
 
 
 def _sync_profile_progress(profile: ClientProfile, actor_user_id: str) -> None:
-    completion = _get_onboarding_completion(profile)
+    completion = apply_onboarding_completion(profile)
     has_documents = bool(getattr(profile, "documents", []))
 
-    if completion["is_complete"]:
+    if completion.is_complete:
         profile.onboarding_completed_at = profile.onboarding_completed_at or datetime.utcnow()
         next_status = (
             ApplicationWorkflowStatusEnum.submitted.value
@@ -60,7 +61,7 @@ def _sync_profile_progress(profile: ClientProfile, actor_user_id: str) -> None:
 
     if not profile.client_lifecycle_status:
         profile.client_lifecycle_status = ClientLifecycleStatusEnum.new_lead.value
-    if completion["is_complete"] and profile.client_lifecycle_status == ClientLifecycleStatusEnum.new_lead.value:
+    if completion.is_complete and profile.client_lifecycle_status == ClientLifecycleStatusEnum.new_lead.value:
         profile.client_lifecycle_status = ClientLifecycleStatusEnum.applicant.value
         profile.lifecycle_status_updated_at = datetime.utcnow()
         profile.lifecycle_status_updated_by = actor_user_id
@@ -88,13 +89,14 @@ def get_my_profile(
                 application_status=ApplicationWorkflowStatusEnum.pending_profile_completion.value,
                 client_lifecycle_status=ClientLifecycleStatusEnum.new_lead.value,
             )
+            apply_onboarding_completion(profile)
             db.add(profile)
             db.commit()
             db.refresh(profile)
             logger.info(f"Created new profile for user: {current_user.id}")
         
         logger.info(f"Successfully fetched profile for user: {current_user.id}")
-        return _serialize_profile(profile, current_user)
+        return _profile_response(profile, current_user)
         
     except SQLAlchemyError as e:
         logger.error(f"Database error fetching profile for user {current_user.id}: {e}")
@@ -147,16 +149,17 @@ def update_my_profile(
         profile.last_modified_by = current_user.id
         
         # Check if onboarding is complete and update status accordingly
-        if profile.status == ClientStatus.new and _check_onboarding_complete(profile):
+        if profile.status == ClientStatus.new and apply_onboarding_completion(profile).is_complete:
             profile.status = ClientStatus.under_review
             logger.info(f"Profile onboarding completed for user: {current_user.id}")
         _sync_profile_progress(profile, current_user.id)
         
+        queue_match_refresh(db, client_ids=[profile.id])
         db.commit()
         db.refresh(profile)
         
         logger.info(f"Successfully updated profile for user: {current_user.id}")
-        return _serialize_profile(profile, current_user)
+        return _profile_response(profile, current_user)
         
     except SQLAlchemyError as e:
         logger.error(f"Database error updating profile for user {current_user.id}: {e}")
@@ -204,18 +207,19 @@ def complete_onboarding(
                 setattr(profile, field, value)
         
         # Set onboarding completion status
-        if _check_onboarding_complete(profile):
+        if apply_onboarding_completion(profile).is_complete:
             profile.status = ClientStatus.under_review
         _sync_profile_progress(profile, current_user.id)
         
         profile.updated_at = datetime.utcnow()
         profile.last_modified_by = current_user.id
         
+        queue_match_refresh(db, client_ids=[profile.id])
         db.commit()
         db.refresh(profile)
         
         logger.info(f"Onboarding completed for user: {current_user.id}")
-        return _serialize_profile(profile, current_user)
+        return _profile_response(profile, current_user)
         
     except Exception as e:
         logger.error(f"Error completing onboarding for user {current_user.id}: {e}")
@@ -241,19 +245,19 @@ def get_onboarding_status(
                 "needs_onboarding": True,
                 "is_complete": False,
                 "completion_percentage": 0,
-                "missing_fields": _get_required_fields(),
+                "missing_fields": list(REQUIRED_ONBOARDING_FIELDS),
                 "status": "new",
                 "application_status": ApplicationWorkflowStatusEnum.pending_profile_completion.value,
                 "client_lifecycle_status": ClientLifecycleStatusEnum.new_lead.value,
             }
         
-        completion_status = _get_onboarding_completion(profile)
+        completion = stored_onboarding_completion(profile)
         
         return {
-            "needs_onboarding": not completion_status["is_complete"],
-            "is_complete": completion_status["is_complete"],
-            "completion_percentage": completion_status["percentage"],
-            "missing_fields": completion_status["missing_fields"],
+            "needs_onboarding": not completion.is_complete,
+            "is_complete": completion.is_complete,
+            "completion_percentage": completion.percentage,
+            "missing_fields": completion.missing_fields,
             "status": profile.status.value if profile.status else "new",
             "application_status": profile.application_status or ApplicationWorkflowStatusEnum.draft.value,
             "client_lifecycle_status": profile.client_lifecycle_status or ClientLifecycleStatusEnum.new_lead.value,
@@ -299,10 +303,11 @@ def update_basic_info(
         profile.last_modified_by = current_user.id
         _sync_profile_progress(profile, current_user.id)
         
+        queue_match_refresh(db, client_ids=[profile.id])
         db.commit()
         db.refresh(profile)
         
-        return _serialize_profile(profile, current_user)
+        return _profile_response(profile, current_user)
         
     except Exception as e:
         logger.error(f"Error updating basic info for user {current_user.id}: {e}")
@@ -312,25 +317,9 @@ def update_basic_info(
             detail="Failed to update basic information"
         )
 
-def _check_onboarding_complete(profile: ClientProfile) -> bool:
-    """Check if onboarding is complete"""
-    required_fields = _get_required_fields()
-    
-    for field in required_fields:
-        if not getattr(profile, field, None):
-            return False
-    return True
-
-def _get_required_fields() -> list:
-    """Get list of required onboarding fields"""
-    return [
-        'first_name', 'last_name', 'date_of_birth', 'gender', 'nationality',
-        'phone_primary', 'address_current', 'emergency_contact_name',
-        'emergency_contact_phone', 'emergency_contact_relationship'
-    ]
-
 @router.post("/me/photo")
 def upload_profile_photo(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_user: User = Depends(get_client_user),
     db: Session = Depends(get_db)
@@ -364,11 +353,14 @@ def upload_profile_photo(
             )
             db.add(profile)
 
-        if profile.profile_photo_url:
-            delete_file(profile.profile_photo_url)
-
-        stored_file = save_bytes("profile_photos", file.filename, file_bytes, file.content_type)
-        profile.profile_photo_url = stored_file.key
+        stored_file = save_bytes("profile_photos", file.filename, file_bytes, file.content_type, db=db)
+        if profile.profile_photo_url == stored_file.key:
+            # Identical re-upload of a content-addressed photo: drop the extra reference.
+            delete_file(stored_file.key, db)
+        else:
+            delete_profile_photo(profile, db)
+            profile.profile_photo_url = stored_file.key
+            background_tasks.add_task(generate_profile_thumbnails, profile.id, stored_file.key, file_bytes)
         profile.updated_at = datetime.utcnow()
         profile.last_modified_by = current_user.id
         profile.profile_photo_data = None
@@ -392,34 +384,3 @@ def upload_profile_photo(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to upload profile photo: {str(e)}"
         )
-
-def _get_onboarding_completion(profile: ClientProfile) -> dict:
-    """Get detailed onboarding completion status"""
-    required_fields = _get_required_fields()
-    
-    optional_fields = [
-        'middle_name', 'nin', 'passport_number',
-        'phone_secondary', 'address_permanent'
-    ]
-    
-    filled_required = 0
-    missing_fields = []
-    
-    for field in required_fields:
-        if getattr(profile, field, None):
-            filled_required += 1
-        else:
-            missing_fields.append(field)
-    
-    filled_optional = sum(1 for field in optional_fields if getattr(profile, field, None))
-    
-    total_fields = len(required_fields) + len(optional_fields)
-    total_filled = filled_required + filled_optional
-    
-    return {
-        "is_complete": len(missing_fields) == 0,
-        "percentage": round((total_filled / total_fields) * 100, 1),
-        "missing_fields": missing_fields,
-        "required_completed": filled_required,
-        "optional_completed": filled_optional
-    }
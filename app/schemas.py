@@ -412,6 +412,7 @@ class ClientProfileResponse(BaseModel):
     
     # Profile Management
     profile_photo_url: Optional[str] = None
+    profile_photo_thumbnail_url: Optional[str] = None
     profile_photo_data: Optional[str] = None
     status: ClientStatusEnum
     application_status: Optional[ApplicationWorkflowStatusEnum] = ApplicationWorkflowStatusEnum.draft
@@ -539,6 +540,13 @@ class JobOpportunityResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AdminJobOpportunityResponse(JobOpportunityResponse):
+    application_count: int = 0
+    last_applied_at: Optional[datetime] = None
+
+class RecommendedJobResponse(JobOpportunityResponse):
+    match_score: float
+
 # Job Application schemas
 class JobApplicationCreate(BaseModel):
     job_id: str
@@ -567,6 +575,7 @@ class AdminClientListResponse(BaseModel):
     first_name: Optional[str]
     last_name: Optional[str]
     profile_photo_url: Optional[str] = None
+    profile_photo_thumbnail_url: Optional[str] = None
     profile_photo_data: Optional[str] = None
     status: ClientStatusEnum
     application_status: Optional[ApplicationWorkflowStatusEnum] = ApplicationWorkflowStatusEnum.draft
@@ -574,6 +583,7 @@ class AdminClientListResponse(BaseModel):
     created_by_admin: bool = False
     unread_messages: int = 0
     interested_job_category: Optional[str] = None
+    completion_percentage: Optional[float] = None
     created_at: datetime
     verification_notes: Optional[str]
     
@@ -605,6 +615,42 @@ class StatusUpdateRequest(BaseModel):
     notes: Optional[str] = None
 
 
+class BulkStatusUpdateRequest(BaseModel):
+    client_ids: List[str]
+    status: str
+    status_type: str = "application_status"
+    notes: Optional[str] = None
+
+    @validator('client_ids')
+    def validate_client_ids(cls, v):
+        if not v:
+            raise ValueError('At least one client id is required')
+        if len(v) > 1000:
+            raise ValueError('At most 1000 clients can be updated at once')
+        return list(dict.fromkeys(v))
+
+    @validator('status_type')
+    def validate_status_type(cls, v):
+        if v not in {'application_status', 'lifecycle_status'}:
+            raise ValueError('status_type must be application_status or lifecycle_status')
+        return v
+
+
+class BulkStatusUpdateResult(BaseModel):
+    client_id: str
+    outcome: str
+    old_status: Optional[str] = None
+
+
+class BulkStatusUpdateResponse(BaseModel):
+    status_type: str
+    new_status: str
+    updated: int
+    unchanged: int
+    not_found: int
+    results: List[BulkStatusUpdateResult]
+
+
 class StatusHistoryResponse(BaseModel):
     id: str
     client_id: str
@@ -650,6 +696,7 @@ class ChatConversationResponse(BaseModel):
     latest_message: ChatMessageResponse
     unread_count: int = 0
     profile_photo_url: Optional[str] = None
+    profile_photo_thumbnail_url: Optional[str] = None
 
 class ChatUnreadCountResponse(BaseModel):
     unread_count: int
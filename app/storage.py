@@ -1,10 +1,15 @@
+import hashlib
+import logging
 import mimetypes
 import os
+import threading
 import uuid
+from collections import OrderedDict
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 from io import BytesIO
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 try:
     import boto3
@@ -13,6 +18,13 @@ except ImportError:  # pragma: no cover - optional dependency in local fallback
     boto3 = None
     Config = None
 
+from sqlalchemy.orm import Session
+
+from app.database import insert_ignoring_conflicts
+from app.models import StorageDeletion, StoredBlob
+
+logger = logging.getLogger(__name__)
+
 
 def _normalize_storage_provider(value: Optional[str]) -> str:
     provider = (value or "local").strip().lower()
@@ -38,6 +50,12 @@ R2_ENDPOINT_URL = os.getenv("CLOUDFLARE_R2_ENDPOINT_URL")
 R2_ACCESS_KEY_ID = os.getenv("CLOUDFLARE_R2_ACCESS_KEY_ID")
 R2_SECRET_ACCESS_KEY = os.getenv("CLOUDFLARE_R2_SECRET_ACCESS_KEY")
 R2_PUBLIC_BASE_URL = os.getenv("CLOUDFLARE_R2_PUBLIC_BASE_URL", "").rstrip("/")
+STORAGE_CONTENT_ADDRESSED = os.getenv("STORAGE_CONTENT_ADDRESSED", "false").strip().lower() in {"1", "true", "yes"}
+STORAGE_CACHE_MB = float(os.getenv("STORAGE_CACHE_MB", "64"))
+STORAGE_CACHE_MAX_ENTRY_MB = float(os.getenv("STORAGE_CACHE_MAX_ENTRY_MB", "4"))
+STREAM_CHUNK_SIZE = 256 * 1024
+STORAGE_DELETION_BATCH_SIZE = 1000  # S3 DeleteObjects limit
+STORAGE_DELETION_MAX_ATTEMPTS = int(os.getenv("STORAGE_DELETION_MAX_ATTEMPTS", "8"))
 
 
 @dataclass
@@ -46,6 +64,84 @@ class StoredFile:
     public_url: Optional[str]
 
 
+@dataclass
+class StoredObject:
+    key: str
+    size: int
+    last_modified: datetime
+
+
+class ReadCache:
+    """Byte-budgeted LRU cache of stored objects keyed by storage key."""
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[str]]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, content: bytes, content_type: Optional[str]) -> None:
+        if len(content) > self.max_entry_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[key] = (content, content_type)
+            self._size += len(content)
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= len(entry[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "max_entry_bytes": self.max_entry_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_read_cache = ReadCache(
+    max_bytes=int(STORAGE_CACHE_MB * 1024 * 1024),
+    max_entry_bytes=int(STORAGE_CACHE_MAX_ENTRY_MB * 1024 * 1024),
+)
+
+
+def get_read_cache_stats() -> dict:
+    return _read_cache.stats()
+
+
 def is_local_storage() -> bool:
     return STORAGE_PROVIDER == "local"
 
@@ -84,13 +180,19 @@ def _get_extension(filename: Optional[str], content_type: Optional[str]) -> str:
     return "bin"
 
 
-def _build_storage_key(category: str, filename: Optional[str], content_type: Optional[str]) -> str:
+def _build_storage_key(
+    category: str,
+    filename: Optional[str],
+    content_type: Optional[str],
+    digest: Optional[str] = None,
+) -> str:
     extension = _get_extension(filename, content_type)
-    parts = [part for part in [R2_PREFIX, category, f"{uuid.uuid4().hex}.{extension}"] if part]
+    name = digest or uuid.uuid4().hex
+    parts = [part for part in [R2_PREFIX, category, f"{name}.{extension}"] if part]
     return "/".join(parts)
 
 
-def _normalize_key(value: Optional[str]) -> Optional[str]:
+def normalize_key(value: Optional[str]) -> Optional[str]:
     if not value:
         return None
 
@@ -121,7 +223,7 @@ def _normalize_key(value: Optional[str]) -> Optional[str]:
 
 
 def build_public_url(value: Optional[str]) -> Optional[str]:
-    key = _normalize_key(value)
+    key = normalize_key(value)
     if not key:
         return None
 
@@ -158,45 +260,166 @@ def _get_r2_client():
     )
 
 
-def save_bytes(category: str, filename: Optional[str], content: bytes, content_type: Optional[str]) -> StoredFile:
-    key = _build_storage_key(category, filename, content_type)
+def create_storage_client():
+    """
+    Build one R2 client up front for callers that upload from several threads.
+
+    boto3 clients are thread-safe, but creating them on the default session is
+    not. Returns None for local storage.
+    """
+    if STORAGE_PROVIDER != "cloudflare_r2":
+        return None
+    return _get_r2_client()
+
+
+def is_remote_key(key: str) -> bool:
+    return STORAGE_PROVIDER == "cloudflare_r2" and not key.startswith(("http://", "https://"))
+
+
+def _increment_blob(db: Session, key: str) -> int:
+    return (
+        db.query(StoredBlob)
+        .filter(StoredBlob.key == key)
+        .update(
+            {StoredBlob.ref_count: StoredBlob.ref_count + 1, StoredBlob.updated_at: datetime.utcnow()},
+            synchronize_session=False,
+        )
+    )
+
+
+def _acquire_blob(db: Session, key: str, digest: str, size: int, content_type: Optional[str]) -> bool:
+    """Take a reference on a content-addressed blob. Returns True when it is already stored.
+
+    A new key is inserted with no references, ignoring a concurrent insert of
+    the same content, and then counted like any other; only the caller whose
+    increment brings it to 1 uploads the object.
+    """
+    if _increment_blob(db, key):
+        return True
+
+    now = datetime.utcnow()
+    insert_ignoring_conflicts(db, StoredBlob, [{
+        "key": key,
+        "sha256": digest,
+        "size": size,
+        "content_type": content_type,
+        "ref_count": 0,
+        "created_at": now,
+        "updated_at": now,
+    }])
+    _increment_blob(db, key)
+    return db.query(StoredBlob.ref_count).filter(StoredBlob.key == key).scalar() > 1
+
+
+def _release_blob(db: Session, key: str) -> bool:
+    """Drop a reference on a blob. Returns True when nothing references the key any more."""
+    updated = (
+        db.query(StoredBlob)
+        .filter(StoredBlob.key == key, StoredBlob.ref_count > 1)
+        .update(
+            {StoredBlob.ref_count: StoredBlob.ref_count - 1, StoredBlob.updated_at: datetime.utcnow()},
+            synchronize_session=False,
+        )
+    )
+    if updated:
+        return False
+
+    db.query(StoredBlob).filter(StoredBlob.key == key).delete(synchronize_session=False)
+    return True
 
+
+def put_bytes(key: str, content: bytes, content_type: Optional[str], client=None) -> None:
+    """Store content under key; pass a client from create_storage_client() when calling from worker threads."""
+    _read_cache.invalidate(key)
     if STORAGE_PROVIDER == "cloudflare_r2":
-        client = _get_r2_client()
+        client = client or _get_r2_client()
         extra_args = {}
         if content_type:
             extra_args["ContentType"] = content_type
         client.upload_fileobj(BytesIO(content), R2_BUCKET, key, ExtraArgs=extra_args)
-        return StoredFile(key=key, public_url=build_public_url(key))
+        return
 
     full_path = LOCAL_UPLOAD_DIR / key
     full_path.parent.mkdir(parents=True, exist_ok=True)
     full_path.write_bytes(content)
+
+
+def allocate_key(
+    category: str,
+    filename: Optional[str],
+    content: bytes,
+    content_type: Optional[str],
+    db: Optional[Session] = None,
+) -> Tuple[str, bool]:
+    """Pick the storage key for an upload. Returns (key, needs_upload).
+
+    With STORAGE_CONTENT_ADDRESSED enabled and a session supplied, the key is
+    derived from the SHA-256 of the content and tracked in ``stored_blobs`` so
+    identical uploads share one object. The reference is recorded in the
+    caller's transaction.
+    """
+    if STORAGE_CONTENT_ADDRESSED and db is not None:
+        digest = hashlib.sha256(content).hexdigest()
+        key = _build_storage_key(category, filename, content_type, digest)
+        return key, not _acquire_blob(db, key, digest, len(content), content_type)
+    return _build_storage_key(category, filename, content_type), True
+
+
+def save_bytes(
+    category: str,
+    filename: Optional[str],
+    content: bytes,
+    content_type: Optional[str],
+    db: Optional[Session] = None,
+) -> StoredFile:
+    key, needs_upload = allocate_key(category, filename, content, content_type, db)
+    if needs_upload:
+        put_bytes(key, content, content_type)
     return StoredFile(key=key, public_url=build_public_url(key))
 
 
 def read_bytes(value: Optional[str]) -> Tuple[bytes, Optional[str]]:
-    key = _normalize_key(value)
+    key = normalize_key(value)
     if not key:
         raise FileNotFoundError("No storage key provided")
 
-    if STORAGE_PROVIDER == "cloudflare_r2" and not key.startswith(("http://", "https://")):
+    cached = _read_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if is_remote_key(key):
         client = _get_r2_client()
         response = client.get_object(Bucket=R2_BUCKET, Key=key)
-        return response["Body"].read(), response.get("ContentType")
+        content, content_type = response["Body"].read(), response.get("ContentType")
+    else:
+        full_path = LOCAL_UPLOAD_DIR / key
+        if not full_path.exists():
+            raise FileNotFoundError(f"Stored file not found: {key}")
+        content, content_type = full_path.read_bytes(), mimetypes.guess_type(full_path.name)[0]
+
+    _read_cache.put(key, content, content_type)
+    return content, content_type
 
-    full_path = LOCAL_UPLOAD_DIR / key
-    if not full_path.exists():
-        raise FileNotFoundError(f"Stored file not found: {key}")
-    return full_path.read_bytes(), mimetypes.guess_type(full_path.name)[0]
 
+def release_key(value: Optional[str], db: Optional[Session] = None) -> Optional[str]:
+    """Drop a reference to a stored file. Returns the key to remove, if nothing references it.
 
-def delete_file(value: Optional[str]) -> None:
-    key = _normalize_key(value)
+    When a session is supplied, content-addressed blobs are reference counted
+    and the key is only returned once the last reference is released.
+    """
+    key = normalize_key(value)
     if not key:
-        return
+        return None
+
+    if db is not None and not _release_blob(db, key):
+        return None
+
+    _read_cache.invalidate(key)
+    return key
 
-    if STORAGE_PROVIDER == "cloudflare_r2" and not key.startswith(("http://", "https://")):
+
+def _remove_object(key: str) -> None:
+    if is_remote_key(key):
         client = _get_r2_client()
         client.delete_object(Bucket=R2_BUCKET, Key=key)
         return
@@ -204,3 +427,196 @@ def delete_file(value: Optional[str]) -> None:
     full_path = LOCAL_UPLOAD_DIR / key
     if full_path.exists():
         full_path.unlink()
+
+
+def delete_file(value: Optional[str], db: Optional[Session] = None) -> bool:
+    """Release a stored file. Returns True when the underlying object is going away.
+
+    With a session, the removal is written to the ``storage_deletions`` outbox in
+    the caller's transaction and carried out by the background worker after
+    commit. Without one, the object is removed immediately.
+    """
+    key = release_key(value, db)
+    if not key:
+        return False
+
+    if db is not None:
+        enqueue_deletion(db, key)
+    else:
+        _remove_object(key)
+    return True
+
+
+def enqueue_deletion(db: Session, key: str) -> None:
+    db.add(StorageDeletion(id=str(uuid.uuid4()), key=key, attempts=0, next_attempt_at=datetime.utcnow()))
+
+
+def _remove_objects(keys: List[str]) -> Dict[str, str]:
+    """Remove a batch of objects. Returns the keys that failed with their error."""
+    failures = {}
+    remote_keys = [key for key in keys if is_remote_key(key)]
+    if remote_keys:
+        client = _get_r2_client()
+        response = client.delete_objects(
+            Bucket=R2_BUCKET,
+            Delete={"Objects": [{"Key": key} for key in remote_keys], "Quiet": True},
+        )
+        for error in response.get("Errors", []):
+            failures[error.get("Key")] = error.get("Message") or error.get("Code") or "Delete failed"
+
+    for key in keys:
+        if is_remote_key(key):
+            continue
+        try:
+            _remove_object(key)
+        except OSError as e:
+            failures[key] = str(e)
+    return failures
+
+
+def drain_deletion_queue(db: Session, batch_size: int = STORAGE_DELETION_BATCH_SIZE) -> int:
+    """Carry out one batch of due deletions from the outbox. Returns the number of rows handled."""
+    now = datetime.utcnow()
+    pending = (
+        db.query(StorageDeletion)
+        .filter(
+            StorageDeletion.next_attempt_at <= now,
+            StorageDeletion.attempts < STORAGE_DELETION_MAX_ATTEMPTS,
+        )
+        .order_by(StorageDeletion.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not pending:
+        return 0
+
+    keys = list({deletion.key for deletion in pending})
+    # A content-addressed key can be re-acquired by a new upload after it was queued.
+    # Claiming every key with an unreferenced stored_blobs row until commit makes a
+    # concurrent first upload of the same content wait for this batch, and locking
+    # the rows shows which keys an upload took first.
+    insert_ignoring_conflicts(db, StoredBlob, [
+        {"key": key, "sha256": "", "size": 0, "ref_count": 0, "created_at": now, "updated_at": now}
+        for key in keys
+    ])
+    referenced = {
+        key for (key,) in db.query(StoredBlob.key)
+        .filter(StoredBlob.key.in_(keys), StoredBlob.ref_count > 0)
+        .with_for_update()
+    }
+    try:
+        failures = _remove_objects([key for key in keys if key not in referenced])
+    except Exception as e:
+        failures = {key: str(e) for key in keys if key not in referenced}
+    db.query(StoredBlob).filter(StoredBlob.key.in_(keys), StoredBlob.ref_count == 0).delete(synchronize_session=False)
+
+    for deletion in pending:
+        error = failures.get(deletion.key)
+        if error is None:
+            db.delete(deletion)
+            continue
+        deletion.attempts += 1
+        deletion.last_error = error
+        deletion.next_attempt_at = now + timedelta(seconds=min(3600, 30 * 2 ** deletion.attempts))
+        if deletion.attempts >= STORAGE_DELETION_MAX_ATTEMPTS:
+            logger.error(
+                f"Giving up on deleting {deletion.key} after {deletion.attempts} attempts: {error}; "
+                "run reconcile_storage.py --retry-failed to queue it again"
+            )
+    db.commit()
+    return len(pending)
+
+
+def reset_failed_deletions(db: Session) -> int:
+    """Queue deletions that reached STORAGE_DELETION_MAX_ATTEMPTS again. Returns the number reset."""
+    reset = (
+        db.query(StorageDeletion)
+        .filter(StorageDeletion.attempts >= STORAGE_DELETION_MAX_ATTEMPTS)
+        .update(
+            {StorageDeletion.attempts: 0, StorageDeletion.next_attempt_at: datetime.utcnow()},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return reset
+
+
+def file_exists(value: Optional[str]) -> bool:
+    key = normalize_key(value)
+    if not key:
+        return False
+
+    if is_remote_key(key):
+        client = _get_r2_client()
+        try:
+            client.head_object(Bucket=R2_BUCKET, Key=key)
+        except client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                return False
+            raise
+        return True
+
+    return (LOCAL_UPLOAD_DIR / key).exists()
+
+
+def open_stream(value: Optional[str], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a stored file in chunks without loading it into memory."""
+    key = normalize_key(value)
+    if not key:
+        raise FileNotFoundError("No storage key provided")
+
+    cached = _read_cache.get(key)
+    if cached is not None:
+        content = cached[0]
+        for offset in range(0, len(content), chunk_size):
+            yield content[offset:offset + chunk_size]
+        return
+
+    if is_remote_key(key):
+        client = _get_r2_client()
+        try:
+            response = client.get_object(Bucket=R2_BUCKET, Key=key)
+        except client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                raise FileNotFoundError(f"Stored file not found: {key}") from e
+            raise
+        yield from response["Body"].iter_chunks(chunk_size)
+        return
+
+    full_path = LOCAL_UPLOAD_DIR / key
+    if not full_path.exists():
+        raise FileNotFoundError(f"Stored file not found: {key}")
+    with full_path.open("rb") as stored:
+        while True:
+            chunk = stored.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def iter_objects(page_size: int = 1000) -> Iterator[StoredObject]:
+    """List every stored object under the configured prefix, one page at a time."""
+    if STORAGE_PROVIDER == "cloudflare_r2":
+        client = _get_r2_client()
+        paginator = client.get_paginator("list_objects_v2")
+        prefix = f"{R2_PREFIX}/" if R2_PREFIX else ""
+        for page in paginator.paginate(Bucket=R2_BUCKET, Prefix=prefix, PaginationConfig={"PageSize": page_size}):
+            for item in page.get("Contents", []):
+                yield StoredObject(
+                    key=item["Key"],
+                    size=item["Size"],
+                    last_modified=item["LastModified"].replace(tzinfo=None),
+                )
+        return
+
+    for directory, subdirectories, filenames in os.walk(LOCAL_UPLOAD_DIR):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            full_path = Path(directory) / filename
+            stat = full_path.stat()
+            yield StoredObject(
+                key=full_path.relative_to(LOCAL_UPLOAD_DIR).as_posix(),
+                size=stat.st_size,
+                last_modified=datetime.utcfromtimestamp(stat.st_mtime),
+            )
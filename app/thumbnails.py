@@ -0,0 +1,87 @@
+import asyncio
+import logging
+from contextlib import closing
+from datetime import datetime
+from io import BytesIO
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency, thumbnails are skipped without it
+    Image = None
+    ImageOps = None
+
+from app.database import SessionLocal
+from app.models import ClientProfile
+from app.storage import build_public_url, delete_file, put_bytes
+from app.workers import get_process_pool
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = (64, 256)
+LIST_THUMBNAIL_SIZE = 64
+THUMBNAIL_CONTENT_TYPE = "image/webp"
+
+
+def thumbnail_key(photo_key: str, size: int) -> str:
+    stem, dot, _ = photo_key.rpartition(".")
+    return f"{stem if dot else photo_key}_{size}.webp"
+
+
+def build_thumbnail_url(profile: Optional[ClientProfile], size: int = LIST_THUMBNAIL_SIZE) -> Optional[str]:
+    if not profile or not profile.profile_photo_url or not profile.profile_photo_thumbnails_at:
+        return None
+    return build_public_url(thumbnail_key(profile.profile_photo_url, size))
+
+
+def render_thumbnails(content: bytes) -> Dict[int, bytes]:
+    """Render square WebP thumbnails. Runs inside the worker process pool."""
+    variants = {}
+    with Image.open(BytesIO(content)) as source:
+        image = ImageOps.exif_transpose(source).convert("RGB")
+    for size in THUMBNAIL_SIZES:
+        output = BytesIO()
+        ImageOps.fit(image, (size, size), Image.LANCZOS).save(output, format="WEBP", quality=80)
+        variants[size] = output.getvalue()
+    return variants
+
+
+def _store_thumbnails(profile_id: str, photo_key: str, variants: Dict[int, bytes]) -> None:
+    for size, data in variants.items():
+        put_bytes(thumbnail_key(photo_key, size), data, THUMBNAIL_CONTENT_TYPE)
+
+    with closing(SessionLocal()) as db:
+        (
+            db.query(ClientProfile)
+            .filter(ClientProfile.id == profile_id, ClientProfile.profile_photo_url == photo_key)
+            .update({ClientProfile.profile_photo_thumbnails_at: datetime.utcnow()}, synchronize_session=False)
+        )
+        db.commit()
+
+
+async def generate_profile_thumbnails(profile_id: str, photo_key: str, content: bytes) -> None:
+    """Background task: build thumbnails in the process pool and record them on the profile."""
+    if Image is None:
+        logger.warning("Pillow is not installed; skipping profile photo thumbnails")
+        return
+
+    loop = asyncio.get_running_loop()
+    try:
+        variants = await loop.run_in_executor(get_process_pool(), render_thumbnails, content)
+        await run_in_threadpool(_store_thumbnails, profile_id, photo_key, variants)
+    except Exception as e:
+        logger.error(f"Failed to generate thumbnails for profile {profile_id}: {e}")
+
+
+def delete_profile_photo(profile: ClientProfile, db: Session) -> None:
+    """Release a profile's photo and, once the photo object is gone, its thumbnails."""
+    photo_key = profile.profile_photo_url
+    if not photo_key:
+        return
+    if delete_file(photo_key, db) and profile.profile_photo_thumbnails_at:
+        for size in THUMBNAIL_SIZES:
+            delete_file(thumbnail_key(photo_key, size), db)
+    profile.profile_photo_thumbnails_at = None
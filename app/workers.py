@@ -0,0 +1,23 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+
+PROCESS_POOL_WORKERS = max(1, int(os.getenv("PROCESS_POOL_WORKERS", "2")))
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Shared pool for CPU-bound work that must stay off the request threads."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS)
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
@@ -1,9 +1,13 @@
 import React, { useEffect, useState } from 'react';
 import APIService from '../services/APIService';
 
+const PAGE_SIZE = 100;
+
 const AdminApplicationsTab = () => {
   const [applications, setApplications] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [hasMore, setHasMore] = useState(false);
   const [error, setError] = useState(null);
 
   useEffect(() => {
@@ -11,8 +15,9 @@ const AdminApplicationsTab = () => {
       setLoading(true);
       setError(null);
       try {
-        const data = await APIService.getAllApplications();
+        const data = await APIService.getAllApplications({ limit: PAGE_SIZE });
         setApplications(data);
+        setHasMore(data.length === PAGE_SIZE);
       } catch (err) {
         setError(err.message || 'Failed to fetch applications');
       } finally {
@@ -22,6 +27,21 @@ const AdminApplicationsTab = () => {
     fetchApplications();
   }, []);
 
+  const loadMore = async () => {
+    const last = applications[applications.length - 1];
+    if (!last) return;
+    setLoadingMore(true);
+    try {
+      const data = await APIService.getAllApplications({ cursor: last.cursor, limit: PAGE_SIZE });
+      setApplications(prev => [...prev, ...data]);
+      setHasMore(data.length === PAGE_SIZE);
+    } catch (err) {
+      setError(err.message || 'Failed to fetch applications');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <div className="bg-white rounded-lg shadow p-6">
       <h2 className="text-2xl font-bold text-gray-900 mb-6">All Job Applications</h2>
@@ -40,10 +60,19 @@ const AdminApplicationsTab = () => {
                 <span className="text-sm bg-blue-100 text-blue-800 px-2 py-1 rounded-full">{app.application_status}</span>
               </div>
               <div className="text-gray-600 text-sm">Applied: {new Date(app.applied_date).toLocaleDateString()}</div>
-              <div className="text-gray-600 text-sm">Client ID: {app.client_id}</div>
+              <div className="text-gray-600 text-sm">Client: {app.client_name || app.client_id}</div>
               {app.notes && <div className="text-gray-700 text-sm mt-2">Notes: {app.notes}</div>}
             </div>
           ))}
+          {hasMore && (
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="w-full py-2 text-sm font-medium text-blue-600 border border-blue-200 rounded-lg hover:bg-blue-50 disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          )}
         </div>
       )}
     </div>
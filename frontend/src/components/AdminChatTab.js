@@ -140,7 +140,7 @@ const AdminChatTab = () => {
                   <div className="flex-shrink-0">
                     {conversation.profile_photo_url ? (
                       <img
-                        src={APIService.getAssetUrl(conversation.profile_photo_url)}
+                        src={APIService.getAssetUrl(conversation.profile_photo_thumbnail_url || conversation.profile_photo_url)}
                         alt={conversation.display_name}
                         className="w-10 h-10 rounded-full object-cover border"
                       />
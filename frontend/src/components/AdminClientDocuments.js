@@ -101,6 +101,16 @@ const AdminClientDocuments = ({ clientId, clientName, isOpen, onClose }) => {
     }
   };
 
+  const handleDownloadAll = async () => {
+    try {
+      const safeName = (clientName || 'client').replace(/\s+/g, '_');
+      await APIService.downloadClientDocumentsArchive(clientId, `${safeName}_documents.zip`);
+    } catch (err) {
+      console.error('Document archive download error:', err);
+      alert('Failed to download documents');
+    }
+  };
+
   const formatFileSize = (bytes) => {
     if (bytes === 0) return '0 Bytes';
     const k = 1024;
@@ -152,12 +162,24 @@ const AdminClientDocuments = ({ clientId, clientName, isOpen, onClose }) => {
               <h2 className="text-xl font-semibold">Client Documents</h2>
               <p className="text-blue-100 text-sm">{clientName}</p>
             </div>
-            <button
-              onClick={onClose}
-              className="text-white hover:text-gray-200 transition-colors"
-            >
-              <X className="h-6 w-6" />
-            </button>
+            <div className="flex items-center space-x-4">
+              {documents.length > 0 && (
+                <button
+                  onClick={handleDownloadAll}
+                  className="flex items-center px-3 py-1.5 text-sm bg-white bg-opacity-20 rounded-lg hover:bg-opacity-30 transition-colors"
+                  title="Download all documents as ZIP"
+                >
+                  <Download className="h-4 w-4 mr-1" />
+                  Download All
+                </button>
+              )}
+              <button
+                onClick={onClose}
+                className="text-white hover:text-gray-200 transition-colors"
+              >
+                <X className="h-6 w-6" />
+              </button>
+            </div>
           </div>
         </div>
 
@@ -3,7 +3,7 @@ import { useNavigate } from 'react-router-dom';
 import { 
   Users, UserPlus, Search, Eye, Edit, Check, X, 
   ChevronDown, Mail, Calendar, 
-  RefreshCw, MoreHorizontal, Upload, FileText, Trash2
+  RefreshCw, MoreHorizontal, Upload, FileText, Trash2, Download
 } from 'lucide-react';
 import APIService from '../services/APIService';
 import AdminClientCreation from './AdminClientCreation';
@@ -54,6 +54,14 @@ const AdminClientsTab = () => {
     loadClients();
   }, [loadClients]);
 
+  const handleExportClients = async () => {
+    try {
+      await APIService.exportClients({ status: statusFilter, search: searchTerm });
+    } catch (err) {
+      setError('Failed to export clients');
+    }
+  };
+
   const handleClientCreated = (newClient) => {
     setSuccess(`Client account created successfully for ${newClient.email || newClient.phone_number || 'the new client'}`);
     loadClients(); // Refresh the list
@@ -157,7 +165,7 @@ const AdminClientsTab = () => {
     if (client.profile_photo_data) {
       return `data:image/jpeg;base64,${client.profile_photo_data}`;
     }
-    return APIService.getAssetUrl(client.profile_photo_url);
+    return APIService.getAssetUrl(client.profile_photo_thumbnail_url || client.profile_photo_url);
   };
 
   const getDisplayName = (client) => {
@@ -187,13 +195,22 @@ const AdminClientsTab = () => {
             Manage client accounts, onboarding, and verification status
           </p>
         </div>
-        <button
-          onClick={() => setShowCreateModal(true)}
-          className="flex items-center px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors shadow-sm"
-        >
-          <UserPlus className="h-5 w-5 mr-2" />
-          Create Client
-        </button>
+        <div className="flex items-center space-x-2">
+          <button
+            onClick={handleExportClients}
+            className="flex items-center px-4 py-2 bg-white text-gray-700 border border-gray-300 rounded-lg hover:bg-gray-50 transition-colors shadow-sm"
+          >
+            <Download className="h-5 w-5 mr-2" />
+            Export CSV
+          </button>
+          <button
+            onClick={() => setShowCreateModal(true)}
+            className="flex items-center px-4 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors shadow-sm"
+          >
+            <UserPlus className="h-5 w-5 mr-2" />
+            Create Client
+          </button>
+        </div>
       </div>
 
       {/* Filters and Search */}
@@ -29,6 +29,8 @@ const AdminJobsTab = () => {
   const [editingId, setEditingId] = useState(null);
   const [editForm, setEditForm] = useState(initialJobForm);
   const [deletingId, setDeletingId] = useState(null);
+  const [applicantsJobId, setApplicantsJobId] = useState(null);
+  const [applicants, setApplicants] = useState([]);
 
   useEffect(() => {
     fetchJobs();
@@ -38,7 +40,7 @@ const AdminJobsTab = () => {
     setLoading(true);
     setError(null);
     try {
-      const jobsData = await APIService.getJobs({ is_active: true });
+      const jobsData = await APIService.getAdminJobs({ isActive: true });
       setJobs(jobsData);
     } catch (err) {
       setError('Failed to fetch jobs');
@@ -81,6 +83,21 @@ const AdminJobsTab = () => {
     }
   };
 
+  const toggleApplicants = async (jobId) => {
+    if (applicantsJobId === jobId) {
+      setApplicantsJobId(null);
+      return;
+    }
+    setError(null);
+    try {
+      const applicantsData = await APIService.getJobApplicants(jobId);
+      setApplicants(applicantsData);
+      setApplicantsJobId(jobId);
+    } catch (err) {
+      setError(err.message || 'Failed to fetch applicants');
+    }
+  };
+
   // Edit job
   const startEditJob = (job) => {
     setEditingId(job.id);
@@ -217,7 +234,23 @@ const AdminJobsTab = () => {
                   <div className="text-gray-700 text-sm mb-1">Deadline: {job.application_deadline ? new Date(job.application_deadline).toLocaleDateString() : 'N/A'}</div>
                   <div className="text-gray-700 text-sm mb-1">Requirements: {job.requirements || 'N/A'}</div>
                   <div className="text-gray-700 text-sm mb-1">Benefits: {job.benefits || 'N/A'}</div>
+                  <div className="text-gray-700 text-sm mb-1">
+                    Applicants: {job.application_count || 0}
+                    {job.last_applied_at && ` (last ${new Date(job.last_applied_at).toLocaleDateString()})`}
+                  </div>
+                  {applicantsJobId === job.id && (
+                    <ul className="text-sm text-gray-700 border-t border-gray-100 mt-2 pt-2">
+                      {applicants.length === 0 && <li>No applicants yet.</li>}
+                      {applicants.map(applicant => (
+                        <li key={applicant.application_id} className="flex justify-between py-1">
+                          <span>{[applicant.first_name, applicant.last_name].filter(Boolean).join(' ') || applicant.serial_number || 'Unnamed client'}</span>
+                          <span className="text-gray-500">{applicant.application_status} &middot; {new Date(applicant.applied_date).toLocaleDateString()}</span>
+                        </li>
+                      ))}
+                    </ul>
+                  )}
                   <div className="flex gap-2 mt-2">
+                    <button onClick={() => toggleApplicants(job.id)} disabled={!job.application_count} className="bg-blue-600 text-white px-3 py-1 rounded-lg hover:bg-blue-700 disabled:opacity-50">{applicantsJobId === job.id ? 'Hide Applicants' : 'View Applicants'}</button>
                     <button onClick={() => startEditJob(job)} className="bg-yellow-500 text-white px-3 py-1 rounded-lg hover:bg-yellow-600">Edit</button>
                     <button onClick={() => startDeleteJob(job.id)} className="bg-red-600 text-white px-3 py-1 rounded-lg hover:bg-red-700">Delete</button>
                   </div>
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { Search, MapPin } from 'lucide-react';
 import APIService from '../services/APIService';
 
@@ -8,15 +8,32 @@ const JobsTab = ({ jobs }) => {
   const [applyingId, setApplyingId] = useState(null);
   const [applySuccess, setApplySuccess] = useState(null);
   const [applyError, setApplyError] = useState(null);
+  const [searchResults, setSearchResults] = useState(null);
 
   const countries = [...new Set(jobs.map(job => job.country))];
-  
-  const filteredJobs = jobs.filter(job => {
-    const matchesSearch = job.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         job.company_name.toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesCountry = !filterCountry || job.country === filterCountry;
-    return matchesSearch && matchesCountry && job.is_active;
-  });
+
+  // Filtering happens on the server; the unfiltered board comes from the dashboard's job list
+  useEffect(() => {
+    if (!searchTerm.trim() && !filterCountry) {
+      setSearchResults(null);
+      return undefined;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const results = await APIService.searchJobs({ q: searchTerm.trim(), country: filterCountry });
+        if (!cancelled) setSearchResults(results);
+      } catch (err) {
+        if (!cancelled) setSearchResults([]);
+      }
+    }, 300);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchTerm, filterCountry]);
+
+  const filteredJobs = searchResults || jobs.filter(job => job.is_active);
 
   // Handle job application
   const handleApply = async (jobId) => {
@@ -233,8 +233,8 @@ class APIServiceClass {
 
     const requestOptions = {
       method: 'GET',
-      headers: this.createHeaders(options.headers),
-      ...options
+      ...options,
+      headers: this.createHeaders(options.headers)
     };
 
     // Don't set Content-Type for FormData
@@ -397,13 +397,33 @@ class APIServiceClass {
     return this.request(`/jobs?skip=${skip}&limit=${limit}`);
   }
 
+  async searchJobs({ q, country, limit = 50 } = {}) {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (q) params.append('q', q);
+    if (country) params.append('country', country);
+    return this.request(`/jobs/search?${params.toString()}`);
+  }
+
   async getJob(jobId) {
     return this.request(`/jobs/${jobId}`);
   }
 
+  async getAdminJobs({ isActive = true, skip = 0, limit = 100 } = {}) {
+    const params = new URLSearchParams({ skip: String(skip), limit: String(limit), is_active: String(isActive) });
+    return this.request(`/jobs/admin/jobs?${params.toString()}`);
+  }
+
+  async getJobApplicants(jobId, { cursor, limit = 100 } = {}) {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor) params.append('cursor', cursor);
+    return this.request(`/jobs/${jobId}/applicants?${params.toString()}`);
+  }
+
   async applyForJob(jobId, applicationData = {}) {
+    // One key per submission, reused by the retry loop so a retried request is not applied twice
     return this.request(`/jobs/${jobId}/apply`, {
       method: 'POST',
+      headers: { 'Idempotency-Key': crypto.randomUUID() },
       body: JSON.stringify(applicationData)
     });
   }
@@ -554,8 +574,10 @@ class APIServiceClass {
     return this.request('/chat/admin/inbox');
   }
 
-  async getAllApplications() {
-    return this.request('/admin/applications');
+  async getAllApplications({ cursor, limit = 100 } = {}) {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor) params.append('cursor', cursor);
+    return this.request(`/admin/applications?${params.toString()}`);
   }
 
   async getAdminUsers() {
@@ -631,7 +653,22 @@ class APIServiceClass {
   }
 
   async downloadDocument(documentId, fileName = 'document') {
-    const url = `${this.baseURL}/documents/download/${documentId}`;
+    return this.downloadFile(`/documents/download/${documentId}`, fileName, 'Failed to download document');
+  }
+
+  async downloadClientDocumentsArchive(clientId, fileName = 'documents.zip') {
+    return this.downloadFile(`/admin/clients/${clientId}/documents/archive`, fileName, 'Failed to download documents');
+  }
+
+  async exportClients({ format = 'csv', status, search } = {}) {
+    const params = new URLSearchParams({ format });
+    if (status) params.append('status', status);
+    if (search) params.append('search', search);
+    return this.downloadFile(`/admin/clients/export?${params.toString()}`, `clients.${format}`, 'Failed to export clients');
+  }
+
+  async downloadFile(endpoint, fileName, errorMessage) {
+    const url = `${this.baseURL}${endpoint}`;
     const headers = {};
 
     if (this.authToken) {
@@ -644,7 +681,7 @@ class APIServiceClass {
     });
 
     if (!response.ok) {
-      let message = 'Failed to download document';
+      let message = errorMessage;
       try {
         const errorData = await response.json();
         message = errorData.detail || message;
@@ -6,7 +6,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 from app.database import Base, engine
+from app.async_storage import close_async_storage, start_async_storage
+from app.background import start_background_workers, stop_background_workers
 from app.bootstrap import ensure_auth_schema, ensure_default_super_admin, ensure_platform_schema
+from app.compression import CompressionMiddleware
+from app.idempotency import IdempotencyMiddleware
+from app.responses import ORJSONResponse
 # Import routers
 from app.routes.auth import router as auth_router
 from app.routes.profile import router as profile_router
@@ -16,6 +21,7 @@ from app.routes.jobs import router as jobs_router
 from app.routes.chat import router as chat_router
 from app.storage import get_local_upload_dir, is_local_storage, validate_storage_config
 from app.utils import get_environment
+from app.workers import shutdown_process_pool
 
 load_dotenv()
 
@@ -36,7 +42,7 @@ ensure_auth_schema(engine)
 ensure_platform_schema(engine)
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Job Placement System API", version="1.0.0")
+app = FastAPI(title="Job Placement System API", version="1.0.0", default_response_class=ORJSONResponse)
 
 default_origins = [
     "https://gulf-app.vercel.app",
@@ -54,6 +60,8 @@ cors_origins = [
     if origin.strip()
 ]
 
+# Added before CORS so replayed responses still get CORS headers
+app.add_middleware(IdempotencyMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
@@ -65,12 +73,14 @@ app.add_middleware(
         "Accept",
         "Origin",
         "X-Requested-With",
+        "Idempotency-Key",
         "Access-Control-Request-Method",
         "Access-Control-Request-Headers"
     ],
     expose_headers=["*"],
     max_age=3600,  # Cache preflight requests for 1 hour
 )
+app.add_middleware(CompressionMiddleware)
 
 # Include routers with /api prefix for Kubernetes ingress
 app.include_router(auth_router, prefix="/api")
@@ -80,6 +90,17 @@ app.include_router(admin_router, prefix="/api")
 app.include_router(jobs_router, prefix="/api")
 app.include_router(chat_router, prefix="/api")
 
+@app.on_event("startup")
+async def startup_workers():
+    await start_async_storage()
+    start_background_workers()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    await stop_background_workers()
+    shutdown_process_pool()
+    await close_async_storage()
+
 # Health check endpoint
 @app.get("/api/health")
 def health_check():
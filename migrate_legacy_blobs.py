@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Move legacy binary blobs out of the database and into the configured storage backend.
+
+Document.file_data and ClientProfile.profile_photo_data are uploaded to storage
+(local uploads directory or R2), file_url / profile_photo_url is pointed at the
+new key and the binary column is nulled. Rows are handled in id-ordered batches
+that each commit on their own, so the migration can be stopped and re-run at any
+time and picks up where it left off. Uploads within a batch run in parallel.
+
+Usage:
+    python migrate_legacy_blobs.py [--batch-size 100] [--workers 4] [--only documents|photos] [--dry-run]
+"""
+
+import argparse
+import mimetypes
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
+
+from app.database import SessionLocal
+from app.models import ClientProfile, Document
+from app.storage import allocate_key, create_storage_client, file_exists, put_bytes, release_key
+
+
+def _sniff_image_type(data):
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    return None
+
+
+class LegacyBlobSource:
+    def __init__(self, label, model, blob_attr, url_attr, category, columns):
+        self.label = label
+        self.model = model
+        self.blob_attr = blob_attr
+        self.url_attr = url_attr
+        self.category = category
+        self.columns = columns
+
+    @property
+    def blob_column(self):
+        return getattr(self.model, self.blob_attr)
+
+    def describe(self, row):
+        """Return (filename, content_type) for a row's blob."""
+        data = getattr(row, self.blob_attr)
+        if self.model is Document:
+            content_type = row.mime_type or mimetypes.guess_type(row.file_name or "")[0]
+            return row.file_name, content_type
+        return None, _sniff_image_type(data) or "image/jpeg"
+
+
+SOURCES = {
+    "documents": LegacyBlobSource(
+        "documents", Document, "file_data", "file_url", "client_documents",
+        [Document.id, Document.file_name, Document.mime_type, Document.file_url, Document.file_data],
+    ),
+    "photos": LegacyBlobSource(
+        "photos", ClientProfile, "profile_photo_data", "profile_photo_url", "profile_photos",
+        [ClientProfile.id, ClientProfile.profile_photo_url, ClientProfile.profile_photo_data],
+    ),
+}
+
+
+def migrate_source(source, batch_size, workers, dry_run):
+    with closing(SessionLocal()) as db:
+        total = db.query(func.count(source.model.id)).filter(source.blob_column.isnot(None)).scalar()
+    print(f"{source.label}: {total} rows with legacy blobs")
+    if not total or dry_run:
+        return 0, 0
+
+    migrated = 0
+    failed = 0
+    migrated_bytes = 0
+    last_id = ""
+    started = time.monotonic()
+    # Shared by the upload threads: boto3 clients are thread-safe, creating them is not
+    storage_client = create_storage_client()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, closing(SessionLocal()) as db:
+        while True:
+            rows = (
+                db.query(source.model)
+                .options(load_only(*source.columns))
+                .filter(source.blob_column.isnot(None), source.model.id > last_id)
+                .order_by(source.model.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            uploads = []
+            for row in rows:
+                existing_url = getattr(row, source.url_attr)
+                if existing_url and file_exists(existing_url):
+                    setattr(row, source.blob_attr, None)
+                    continue
+                data = getattr(row, source.blob_attr)
+                filename, content_type = source.describe(row)
+                key, needs_upload = allocate_key(source.category, filename, data, content_type, db)
+                future = pool.submit(put_bytes, key, data, content_type, storage_client) if needs_upload else None
+                uploads.append((row, key, len(data), future))
+
+            # Keys whose upload failed; later rows sharing the content never got an object either
+            failed_keys = set()
+            for row, key, size, future in uploads:
+                try:
+                    if future is not None:
+                        future.result()
+                    elif key in failed_keys:
+                        raise RuntimeError("upload of identical content failed")
+                except Exception as e:
+                    failed += 1
+                    failed_keys.add(key)
+                    print(f"  failed {source.label} {row.id}: {e}")
+                    # Drop the blob reference allocate_key took, so it never points at a missing object
+                    release_key(key, db)
+                    db.expunge(row)
+                    continue
+                setattr(row, source.url_attr, key)
+                setattr(row, source.blob_attr, None)
+                migrated += 1
+                migrated_bytes += size
+
+            db.commit()
+            db.expunge_all()
+
+            elapsed = max(time.monotonic() - started, 1e-6)
+            done = migrated + failed
+            print(
+                f"  {source.label}: {done}/{total} "
+                f"({migrated_bytes / (1024 * 1024):.1f} MB, {done / elapsed:.1f} rows/s)"
+            )
+
+    return migrated, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move legacy LargeBinary blobs into object storage")
+    parser.add_argument("--batch-size", type=int, default=100, help="Rows per committed batch (default: 100)")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel uploads per batch (default: 4)")
+    parser.add_argument("--only", choices=sorted(SOURCES), help="Migrate only documents or profile photos")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many rows would be migrated")
+    args = parser.parse_args()
+
+    failures = 0
+    for name, source in SOURCES.items():
+        if args.only and name != args.only:
+            continue
+        migrated, failed = migrate_source(source, args.batch_size, args.workers, args.dry_run)
+        failures += failed
+        if not args.dry_run:
+            print(f"{source.label}: migrated {migrated}, failed {failed}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Storage reconciliation tool.
+
+Pages through the storage listing (local uploads directory or the R2 prefix)
+and through the database references in fixed-size batches, so memory use does
+not grow with the number of objects. Reports:
+
+1. Orphans: stored objects that no Document.file_url, ClientProfile.profile_photo_url
+   or stored_blobs row points at (profile photo thumbnails count as referenced
+   while their source photo is).
+2. Dangling references: rows whose file_url / profile_photo_url points at a
+   missing object.
+3. Failed deletions: storage_deletions rows the worker gave up on after
+   STORAGE_DELETION_MAX_ATTEMPTS. Their keys are not reported as orphans.
+
+With --delete, orphans older than the grace period are queued in the
+storage_deletions outbox and removed by the deletion worker. With
+--retry-failed, failed deletions are queued again.
+
+Usage:
+    python reconcile_storage.py [--delete] [--retry-failed] [--grace-hours 24] [--page-size 1000] [--skip-dangling]
+"""
+
+import argparse
+import re
+import sys
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import or_, true
+
+from app.background import drain_pending_deletions
+from app.database import SessionLocal
+from app.models import ClientProfile, Document, StorageDeletion, StoredBlob
+from app.storage import (
+    STORAGE_DELETION_MAX_ATTEMPTS,
+    build_public_url,
+    enqueue_deletion,
+    file_exists,
+    get_local_upload_dir,
+    iter_objects,
+    reset_failed_deletions,
+)
+
+THUMBNAIL_PATTERN = re.compile(r"^(?P<stem>.+)_\d+\.webp$")
+
+
+def _reference_candidates(key):
+    """Every form a key may have been persisted in by older code paths."""
+    candidates = {
+        key,
+        f"/api/uploads/{key}",
+        f"/uploads/{key}",
+        f"uploads/{key}",
+        f"./uploads/{key}",
+        str(get_local_upload_dir() / key),
+    }
+    public_url = build_public_url(key)
+    if public_url:
+        candidates.add(public_url)
+    return candidates
+
+
+def _referenced_keys(db, keys):
+    candidate_to_key = {}
+    for key in keys:
+        for candidate in _reference_candidates(key):
+            candidate_to_key[candidate] = key
+    candidates = list(candidate_to_key)
+
+    referenced = set()
+    for column in (Document.file_url, ClientProfile.profile_photo_url, StoredBlob.key, StorageDeletion.key):
+        rows = db.query(column).filter(column.in_(candidates)).all()
+        referenced.update(candidate_to_key[value] for (value,) in rows)
+
+    thumbnail_stems = {}
+    for key in keys:
+        match = THUMBNAIL_PATTERN.match(key)
+        if match and key not in referenced:
+            thumbnail_stems.setdefault(match.group("stem"), []).append(key)
+    if thumbnail_stems:
+        photo_filters = []
+        for stem in thumbnail_stems:
+            # Keys contain "_" (and may contain "%"), which LIKE would treat as wildcards
+            escaped = stem.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            photo_filters.append(ClientProfile.profile_photo_url.like(f"{escaped}.%", escape="\\"))
+            photo_filters.append(ClientProfile.profile_photo_url == stem)
+        rows = db.query(ClientProfile.profile_photo_url).filter(or_(*photo_filters)).all()
+        for (photo_url,) in rows:
+            stem, dot, _ = photo_url.rpartition(".")
+            referenced.update(thumbnail_stems.get(stem if dot else photo_url, []))
+    return referenced
+
+
+def _pages(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        page = list(islice(iterator, size))
+        if not page:
+            return
+        yield page
+
+
+def find_orphans(db, page_size, grace_cutoff, delete):
+    stats = {"scanned": 0, "scanned_bytes": 0, "orphans": 0, "orphan_bytes": 0, "queued": 0}
+    for page in _pages(iter_objects(page_size), page_size):
+        referenced = _referenced_keys(db, [item.key for item in page])
+        for item in page:
+            stats["scanned"] += 1
+            stats["scanned_bytes"] += item.size
+            if item.key in referenced:
+                continue
+            stats["orphans"] += 1
+            stats["orphan_bytes"] += item.size
+            expired = item.last_modified < grace_cutoff
+            print(f"ORPHAN    {item.key} ({item.size} bytes, modified {item.last_modified.isoformat()})")
+            if delete and expired:
+                enqueue_deletion(db, item.key)
+                stats["queued"] += 1
+        if delete:
+            db.commit()
+    return stats
+
+
+def find_dangling_references(db, page_size):
+    stats = {"references_checked": 0, "dangling": 0}
+    sources = (
+        ("document", Document.id, Document.file_url, Document.file_data.is_(None)),
+        ("profile_photo", ClientProfile.id, ClientProfile.profile_photo_url, true()),
+    )
+    for label, id_column, url_column, extra_filter in sources:
+        last_id = ""
+        while True:
+            rows = (
+                db.query(id_column, url_column)
+                .filter(url_column.isnot(None), id_column > last_id, extra_filter)
+                .order_by(id_column)
+                .limit(page_size)
+                .all()
+            )
+            if not rows:
+                break
+            for row_id, value in rows:
+                stats["references_checked"] += 1
+                if not file_exists(value):
+                    stats["dangling"] += 1
+                    print(f"DANGLING  {label} {row_id} -> {value}")
+            last_id = rows[-1][0]
+    return stats
+
+
+def find_failed_deletions(db, page_size):
+    stats = {"failed_deletions": 0}
+    last_id = ""
+    while True:
+        rows = (
+            db.query(StorageDeletion)
+            .filter(StorageDeletion.attempts >= STORAGE_DELETION_MAX_ATTEMPTS, StorageDeletion.id > last_id)
+            .order_by(StorageDeletion.id)
+            .limit(page_size)
+            .all()
+        )
+        if not rows:
+            return stats
+        for deletion in rows:
+            stats["failed_deletions"] += 1
+            print(f"FAILED    {deletion.key} ({deletion.attempts} attempts: {deletion.last_error})")
+        last_id = rows[-1].id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile stored objects with database references")
+    parser.add_argument("--delete", action="store_true", help="Queue orphans older than the grace period for deletion")
+    parser.add_argument("--grace-hours", type=float, default=24, help="Never delete orphans newer than this (default: 24)")
+    parser.add_argument("--page-size", type=int, default=1000, help="Objects and rows handled per batch (default: 1000)")
+    parser.add_argument("--skip-dangling", action="store_true", help="Only look for orphaned objects")
+    parser.add_argument("--retry-failed", action="store_true", help="Queue deletions the worker gave up on again")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    grace_cutoff = datetime.utcnow() - timedelta(hours=args.grace_hours)
+    with closing(SessionLocal()) as db:
+        stats = find_orphans(db, args.page_size, grace_cutoff, args.delete)
+        if not args.skip_dangling:
+            stats.update(find_dangling_references(db, args.page_size))
+        stats.update(find_failed_deletions(db, args.page_size))
+        if args.retry_failed:
+            stats["requeued"] = reset_failed_deletions(db)
+    if (args.delete and stats["queued"]) or stats.get("requeued"):
+        drain_pending_deletions()
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    print("\nReconciliation summary")
+    for name, value in stats.items():
+        print(f"  {name}: {value}")
+    print(f"  elapsed_seconds: {elapsed:.2f}")
+    print(f"  objects_per_second: {stats['scanned'] / elapsed:.1f}")
+    print(f"  megabytes_per_second: {stats['scanned_bytes'] / elapsed / (1024 * 1024):.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark client deletion: the old row-by-row ORM delete against delete_client_records.
+
+Seeds a client with many chat messages (and some status history and documents)
+into a throwaway SQLite database unless --database-url is given, then times
+both strategies and reports peak Python memory.
+
+Usage:
+    python scripts/benchmark_client_delete.py [--messages 10000] [--database-url URL]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark set-based client deletion")
+    parser.add_argument("--messages", type=int, default=10000, help="Chat messages per client (default: 10000)")
+    parser.add_argument("--history", type=int, default=200, help="Status history rows per client (default: 200)")
+    parser.add_argument("--documents", type=int, default=20, help="Documents per client (default: 20)")
+    parser.add_argument("--database-url", help="Database to benchmark against (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def seed_client(db, models, args):
+    from sqlalchemy import insert
+
+    admin_id = str(uuid.uuid4())
+    user_id = str(uuid.uuid4())
+    client_id = str(uuid.uuid4())
+    db.execute(insert(models.User), [
+        {"id": admin_id, "email": f"admin-{admin_id}@example.com", "password_hash": "x", "role": models.UserRole.admin},
+        {"id": user_id, "phone_number": user_id[:12], "password_hash": "x", "role": models.UserRole.client},
+    ])
+    db.execute(insert(models.ClientProfile), [{"id": client_id, "user_id": user_id, "first_name": "Bench"}])
+    db.execute(insert(models.ChatMessage), [
+        {
+            "id": str(uuid.uuid4()),
+            "sender_id": user_id if index % 2 else admin_id,
+            "receiver_id": admin_id if index % 2 else user_id,
+            "client_id": client_id,
+            "content": f"message {index}",
+            "sent_at": datetime.utcnow(),
+        }
+        for index in range(args.messages)
+    ])
+    db.execute(insert(models.StatusHistory), [
+        {"id": str(uuid.uuid4()), "client_id": client_id, "new_status": "submitted", "status_type": "application", "changed_by": admin_id}
+        for _ in range(args.history)
+    ])
+    db.execute(insert(models.Document), [
+        {"id": str(uuid.uuid4()), "client_id": client_id, "document_type": models.DocumentType.other, "file_name": f"doc{index}.pdf"}
+        for index in range(args.documents)
+    ])
+    db.commit()
+    return client_id
+
+
+def delete_row_by_row(db, models, client, user):
+    """The previous implementation, kept here as the baseline."""
+    for doc in db.query(models.Document).filter(models.Document.client_id == client.id).all():
+        db.delete(doc)
+    messages = db.query(models.ChatMessage).filter(
+        (models.ChatMessage.sender_id == user.id) | (models.ChatMessage.receiver_id == user.id)
+    ).all()
+    for message in messages:
+        db.delete(message)
+    for application in db.query(models.JobApplication).filter(models.JobApplication.client_id == client.id).all():
+        db.delete(application)
+    for record in db.query(models.StatusHistory).filter(models.StatusHistory.client_id == client.id).all():
+        db.delete(record)
+    db.delete(client)
+    db.delete(user)
+
+
+def run(label, strategy, db_factory, models, args):
+    with db_factory() as db:
+        client_id = seed_client(db, models, args)
+    with db_factory() as db:
+        tracemalloc.start()
+        started = time.perf_counter()
+        client = db.get(models.ClientProfile, client_id)
+        user = db.get(models.User, client.user_id)
+        strategy(db, client, user)
+        db.commit()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(f"{label:<14} {elapsed * 1000:9.1f} ms   peak {peak / (1024 * 1024):7.2f} MB")
+
+
+def main():
+    args = parse_args()
+    temp_dir = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(temp_dir.name) / 'benchmark.db'}"
+
+    from app import models
+    from app.client_deletion import delete_client_records
+    from app.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    print(f"Deleting a client with {args.messages} messages, {args.history} status rows, {args.documents} documents")
+    run("row-by-row", lambda db, client, user: delete_row_by_row(db, models, client, user), SessionLocal, models, args)
+    run("set-based", delete_client_records, SessionLocal, models, args)
+
+    if temp_dir:
+        engine.dispose()
+        temp_dir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
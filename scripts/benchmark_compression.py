@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark response compression: bytes saved and CPU spent per payload for
+gzip levels and, when the Brotli package is installed, Brotli qualities.
+
+Reuses the seeding from benchmark_json_responses.py to fetch real bodies from
+/admin/clients, /chat/history and /jobs/search, adds a base64 document preview,
+and prints compressed size, compression time and the transfer time saved on a
+slow mobile link.
+
+Usage:
+    python scripts/benchmark_compression.py [--clients 1000] [--messages 5000] [--link-kbps 1000]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark gzip and Brotli response compression")
+    parser.add_argument("--clients", type=int, default=1000, help="Client profiles to seed (default: 1000)")
+    parser.add_argument("--messages", type=int, default=5000, help="Messages in the benchmarked conversation (default: 5000)")
+    parser.add_argument("--jobs", type=int, default=100, help="Job listings to seed (default: 100)")
+    parser.add_argument("--link-kbps", type=int, default=1000, help="Link speed used for transfer times (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the fastest is reported (default: 5)")
+    return parser.parse_args()
+
+
+def best_of(repeat, work):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        work()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def fetch_payloads(args):
+    from fastapi.testclient import TestClient
+
+    import main as app_main
+    from app import models
+    from app.database import SessionLocal
+    from app.utils import create_access_token
+    from benchmark_json_responses import seed
+
+    with SessionLocal() as db:
+        admin_id, client_user_id = seed(db, models, args)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': admin_id})}", "Accept-Encoding": "identity"}
+    client = TestClient(app_main.app)
+    payloads = {}
+    for path, params in (
+        ("/api/admin/clients", {"limit": args.clients}),
+        ("/api/chat/history", {"with_user_id": client_user_id}),
+        ("/api/jobs/search", {"limit": args.jobs}),
+    ):
+        response = client.get(path, params=params, headers=headers)
+        response.raise_for_status()
+        payloads[path] = response.content
+    # Document previews carry the file as base64; the PDF itself is mostly compressed streams
+    preview = os.urandom(300 * 1024)
+    payloads["document preview"] = json.dumps({
+        "document_id": "preview",
+        "mime_type": "application/pdf",
+        "data": base64.b64encode(preview).decode("ascii"),
+    }).encode("utf-8")
+    return payloads
+
+
+def main():
+    args = parse_args()
+    temp_dir = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(temp_dir.name) / 'benchmark.db'}"
+    os.environ["UPLOAD_DIR"] = str(Path(temp_dir.name) / "uploads")
+    os.environ.setdefault("STORAGE_PROVIDER", "local")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-1234567890abcdef")
+
+    from app.compression import brotli, compress_body
+
+    settings = [("gzip", level) for level in (1, 6, 9)]
+    if brotli is not None:
+        settings += [("br", quality) for quality in (1, 4, 11)]
+    else:
+        print("Brotli is not installed; only gzip is measured\n")
+
+    payloads = fetch_payloads(args)
+    bytes_per_second = args.link_kbps * 1000 / 8
+    print(f"{'payload':<20} {'codec':<8} {'size':>9} {'ratio':>6} {'compress':>9} {'transfer':>9}")
+    for name, body in payloads.items():
+        print(f"{name:<20} {'identity':<8} {len(body) / 1024:7.0f}KB {1:6.2f} {0:7.1f}ms {len(body) / bytes_per_second * 1000:7.0f}ms")
+        for encoding, level in settings:
+            compressed = compress_body(encoding, body, level, level)
+            seconds = best_of(args.repeat, lambda: compress_body(encoding, body, level, level))
+            print(
+                f"{'':<20} {f'{encoding}-{level}':<8} {len(compressed) / 1024:7.0f}KB"
+                f" {len(compressed) / len(body):6.2f} {seconds * 1000:7.1f}ms"
+                f" {len(compressed) / bytes_per_second * 1000:7.0f}ms"
+            )
+
+    temp_dir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON encoding per endpoint: FastAPI's stdlib JSONResponse against
+app.responses.ORJSONResponse, the app's default response class.
+
+Seeds a throwaway SQLite database with clients, a long conversation and job
+listings, then for each endpoint reports the time to encode its payload
+(render only) and the full request time through the ASGI app with each
+response class.
+
+Usage:
+    python scripts/benchmark_json_responses.py [--clients 1000] [--messages 5000] [--jobs 100]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the orjson default response class")
+    parser.add_argument("--clients", type=int, default=1000, help="Client profiles to seed (default: 1000)")
+    parser.add_argument("--messages", type=int, default=5000, help="Messages in the benchmarked conversation (default: 5000)")
+    parser.add_argument("--jobs", type=int, default=100, help="Job listings to seed (default: 100)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the fastest is reported (default: 5)")
+    return parser.parse_args()
+
+
+def seed(db, models, args):
+    from sqlalchemy import insert
+
+    now = datetime.utcnow()
+    admin_id = str(uuid.uuid4())
+    users = [{"id": admin_id, "email": f"bench-{admin_id}@example.com", "password_hash": "x", "role": models.UserRole.super_admin}]
+    profiles = []
+    for index in range(args.clients):
+        user_id = str(uuid.uuid4())
+        users.append({"id": user_id, "phone_number": f"2567{index:08d}", "password_hash": "x", "role": models.UserRole.client})
+        profiles.append({
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "first_name": f"Client{index}",
+            "last_name": "Bench",
+            "status": models.ClientStatus.under_review,
+            "position_applied_for": "Housekeeper",
+            "created_at": now - timedelta(minutes=index),
+        })
+    db.execute(insert(models.User), users)
+    db.execute(insert(models.ClientProfile), profiles)
+
+    client_user_id, client_id = profiles[0]["user_id"], profiles[0]["id"]
+    db.execute(insert(models.ChatMessage), [
+        {
+            "id": str(uuid.uuid4()),
+            "sender_id": client_user_id if index % 2 else admin_id,
+            "receiver_id": admin_id if index % 2 else client_user_id,
+            "client_id": client_id,
+            "content": f"Message {index} about the visa and medical appointment schedule",
+            "is_read": True,
+            "sent_at": now - timedelta(seconds=args.messages - index),
+        }
+        for index in range(args.messages)
+    ])
+    db.execute(insert(models.JobOpportunity), [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Housekeeper {index}",
+            "company_name": "Gulf Hospitality",
+            "country": "UAE",
+            "city": "Dubai",
+            "description": "Housekeeping for a hotel group",
+            "requirements": "Two years of experience, English",
+            "salary_range_min": Decimal("1200.00"),
+            "salary_range_max": Decimal("1850.50"),
+            "job_type": models.JobType.full_time,
+            "application_deadline": date.today() + timedelta(days=30),
+            "is_active": True,
+            "search_text": "housekeeper gulf hospitality",
+            "created_at": now - timedelta(minutes=index),
+        }
+        for index in range(args.jobs)
+    ])
+    db.commit()
+    return admin_id, client_user_id
+
+
+def use_response_class(app, response_class, current_class):
+    """Rebuild the handlers of routes using current_class so they render with response_class."""
+    from fastapi.routing import APIRoute
+    from starlette.routing import request_response
+
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.response_class is current_class:
+            route.response_class = response_class
+            route.app = request_response(route.get_route_handler())
+
+
+def best_of(repeat, work):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        work()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    args = parse_args()
+    temp_dir = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(temp_dir.name) / 'benchmark.db'}"
+    os.environ["UPLOAD_DIR"] = str(Path(temp_dir.name) / "uploads")
+    os.environ.setdefault("STORAGE_PROVIDER", "local")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-1234567890abcdef")
+
+    from fastapi.responses import JSONResponse
+    from fastapi.testclient import TestClient
+
+    import main as app_main
+    from app import models
+    from app.database import SessionLocal, engine
+    from app.responses import ORJSONResponse
+    from app.utils import create_access_token
+
+    with SessionLocal() as db:
+        admin_id, client_user_id = seed(db, models, args)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': admin_id})}"}
+    endpoints = [
+        ("/api/admin/clients", {"limit": args.clients}),
+        ("/api/chat/history", {"with_user_id": client_user_id}),
+        ("/api/jobs/search", {"limit": args.jobs}),
+    ]
+
+    client = TestClient(app_main.app)
+    print(f"{args.clients} clients, {args.messages} messages, {args.jobs} jobs\n")
+    print(f"{'endpoint':<22} {'payload':>9} {'render json':>12} {'render orjson':>14} {'request json':>13} {'request orjson':>15}")
+    for path, params in endpoints:
+        response = client.get(path, params=params, headers=headers)
+        response.raise_for_status()
+        # What the route hands its response class once FastAPI has validated and encoded it
+        content = response.json()
+        render_json = best_of(args.repeat, lambda: JSONResponse(content))
+        render_orjson = best_of(args.repeat, lambda: ORJSONResponse(content))
+
+        requests = {}
+        for response_class, previous in ((JSONResponse, ORJSONResponse), (ORJSONResponse, JSONResponse)):
+            use_response_class(app_main.app, response_class, previous)
+            requests[response_class] = best_of(args.repeat, lambda: client.get(path, params=params, headers=headers))
+        print(
+            f"{path:<22} {len(response.content) / 1024:7.0f}KB"
+            f" {render_json * 1000:10.1f}ms {render_orjson * 1000:12.1f}ms"
+            f" {requests[JSONResponse] * 1000:11.1f}ms {requests[ORJSONResponse] * 1000:13.1f}ms"
+            f"   render x{render_json / render_orjson:.1f}"
+        )
+
+    engine.dispose()
+    temp_dir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
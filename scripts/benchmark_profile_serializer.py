@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark client profile serialization: the previous column-walk plus
+ClientProfileResponse validation against app.profile_serializer.
+
+Builds filled-in ClientProfile objects in memory (no database rows), then
+times encoding one profile and a batch of profiles to JSON bytes, the way
+the profile routes hand them to the response.
+
+Usage:
+    python scripts/benchmark_profile_serializer.py [--batch 1000] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the precompiled client profile serializer")
+    parser.add_argument("--batch", type=int, default=1000, help="Profiles per batch (default: 1000)")
+    parser.add_argument("--single", type=int, default=2000, help="Single-profile encodes per run (default: 2000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per strategy; the fastest is reported (default: 5)")
+    return parser.parse_args()
+
+
+def build_profiles(models, count):
+    now = datetime.utcnow()
+    profiles = []
+    for index in range(count):
+        profile = models.ClientProfile(id=str(uuid.uuid4()), user_id=str(uuid.uuid4()))
+        for column in models.ClientProfile.__table__.columns:
+            if column.name in {"id", "user_id", "profile_photo_data"}:
+                continue
+            python_type = column.type.python_type
+            if column.name == "status":
+                value = models.ClientStatus.under_review
+            elif column.name in {"application_status", "client_lifecycle_status"}:
+                value = None
+            elif python_type is datetime:
+                value = now
+            elif python_type is date:
+                value = date(1990, 1, 1 + index % 28)
+            elif python_type is bool:
+                value = bool(index % 2)
+            elif python_type is int:
+                value = index % 50
+            elif python_type is float:
+                value = 66.7
+            else:
+                value = f"{column.name} {index}"
+            setattr(profile, column.name, value)
+        profiles.append(profile)
+    return profiles
+
+
+COMPUTED = {
+    "user_email": "client@example.com",
+    "profile_photo_url": None,
+    "profile_photo_thumbnail_url": None,
+    "profile_photo_data": None,
+}
+
+
+def legacy_encode(models, schemas, profile):
+    """The previous path: walk the table's columns, then let the response model validate and dump."""
+    profile_dict = {
+        column.name: getattr(profile, column.name)
+        for column in models.ClientProfile.__table__.columns
+        if column.name != "profile_photo_data"
+    }
+    profile_dict.update(COMPUTED)
+    if not profile_dict.get("application_status"):
+        profile_dict["application_status"] = schemas.ApplicationWorkflowStatusEnum.draft.value
+    if not profile_dict.get("client_lifecycle_status"):
+        profile_dict["client_lifecycle_status"] = schemas.ClientLifecycleStatusEnum.new_lead.value
+    content = schemas.ClientProfileResponse.model_validate(profile_dict).model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def compiled_encode(serializer, profile):
+    return serializer.dumps(serializer.client_profile_payload(profile, **COMPUTED))
+
+
+def compiled_stdlib_encode(serializer, profile):
+    payload = serializer.client_profile_payload(profile, **COMPUTED)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def best_of(repeat, work):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        work()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    args = parse_args()
+    temp_dir = tempfile.TemporaryDirectory()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(temp_dir.name) / 'benchmark.db'}")
+
+    from app import models, profile_serializer, schemas
+
+    profiles = build_profiles(models, args.batch)
+    single = profiles[0]
+    assert json.loads(legacy_encode(models, schemas, single)) == json.loads(compiled_encode(profile_serializer, single))
+
+    strategies = [
+        ("legacy", lambda profile: legacy_encode(models, schemas, profile)),
+        ("compiled+json", lambda profile: compiled_stdlib_encode(profile_serializer, profile)),
+        ("compiled+orjson", lambda profile: compiled_encode(profile_serializer, profile)),
+    ]
+
+    print(f"{'strategy':<16} {'single (us/op)':>15} {f'batch of {args.batch} (ms)':>22}")
+    baseline = None
+    for label, encode in strategies:
+        single_seconds = best_of(args.repeat, lambda: [encode(single) for _ in range(args.single)]) / args.single
+        batch_seconds = best_of(args.repeat, lambda: [encode(profile) for profile in profiles])
+        baseline = baseline or batch_seconds
+        print(f"{label:<16} {single_seconds * 1e6:15.1f} {batch_seconds * 1000:22.1f}   x{baseline / batch_seconds:.1f}")
+
+    temp_dir.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,19 @@
+import asyncio
+import base64
+import contextlib
+import csv
+import hashlib
+import io
+import json
 import os
 import unittest
 import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
 from pathlib import Path
+from unittest import mock
 
 
 TEST_DB_PATH = Path(__file__).with_name("test_api_smoke.db")
@@ -16,9 +28,43 @@ os.environ["DEFAULT_ADMIN_PASSWORD"] = "admin12345"
 os.environ["STORAGE_PROVIDER"] = "local"
 os.environ["UPLOAD_DIR"] = "uploads"
 
+import orjson
 from fastapi.testclient import TestClient
+from sqlalchemy import event, update
+from sqlalchemy.exc import IntegrityError
 
 import main
+import migrate_legacy_blobs
+import reconcile_storage
+from app import async_storage, exports, storage, thumbnails
+from app.compression import negotiate_encoding
+from app.idempotency import IdempotencyMiddleware, MemoryIdempotencyStore, StoredResponse
+from app.job_board import JobBoardCache
+from app.matching import queue_match_refresh
+from app.onboarding import backfill_onboarding_completion, evaluate_onboarding
+from app.profile_serializer import client_profile_payload
+from app.responses import ORJSONResponse
+from app.numbering import allocate_sequence, reserve_client_numbers
+from app.background import drain_pending_deletions, drain_pending_matches
+from app.database import SessionLocal, engine
+from app.models import (
+    AdminAuditLog,
+    ApplicationStatus,
+    ChatMessage,
+    ClientProfile,
+    ClientStatus,
+    Document,
+    EducationRecord,
+    EmploymentRecord,
+    JobApplication,
+    JobOpportunity,
+    StatusHistory,
+    StorageDeletion,
+    StoredBlob,
+    User,
+)
+from app.schemas import ClientProfileResponse, JobOpportunityResponse
+from app.utils import create_access_token
 
 
 client = TestClient(main.app)
@@ -54,6 +100,20 @@ class APISmokeTests(unittest.TestCase):
                 return body["access_token"]
         self.fail("Unable to log in as super admin")
 
+    def _register_client(self):
+        phone_number = f"2567{uuid.uuid4().int % 1_000_0000:07d}"
+        response = client.post(
+            "/api/auth/register/client",
+            json={
+                "first_name": "Test",
+                "last_name": "Client",
+                "phone_number": phone_number,
+                "password": "Client123",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["access_token"]
+
     def test_health_check(self):
         response = client.get("/api/health")
 
@@ -210,6 +270,1080 @@ class APISmokeTests(unittest.TestCase):
         self.assertEqual(lifecycle_response.status_code, 200)
         self.assertEqual(lifecycle_response.json()["new_status"], "visa_processing")
 
+    def test_content_addressed_uploads_share_one_blob(self):
+        token = self._register_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        content = f"passport scan {uuid.uuid4()}".encode()
+
+        original_setting = storage.STORAGE_CONTENT_ADDRESSED
+        storage.STORAGE_CONTENT_ADDRESSED = True
+        try:
+            for _ in range(2):
+                response = client.post(
+                    "/api/documents/upload",
+                    data={"document_type": "passport"},
+                    files={"file": ("passport.pdf", content, "application/pdf")},
+                    headers=headers,
+                )
+                self.assertEqual(response.status_code, 200)
+        finally:
+            storage.STORAGE_CONTENT_ADDRESSED = original_setting
+
+        documents = client.get("/api/documents/me", headers=headers).json()
+        self.assertEqual(len(documents), 2)
+        self.assertEqual(documents[0]["file_url"], documents[1]["file_url"])
+
+        key = documents[0]["file_url"][len("/api/uploads/"):]
+        with SessionLocal() as db:
+            blob = db.query(StoredBlob).filter(StoredBlob.key == key).one()
+            self.assertEqual(blob.ref_count, 2)
+            # A concurrent upload whose first increment missed the row: its insert must not fail
+            real_increment = storage._increment_blob
+            misses = [0]
+            with mock.patch.object(
+                storage, "_increment_blob", side_effect=lambda db, key: misses.pop() if misses else real_increment(db, key)
+            ):
+                self.assertTrue(storage._acquire_blob(db, key, blob.sha256, blob.size, blob.content_type))
+            self.assertEqual(db.query(StoredBlob.ref_count).filter(StoredBlob.key == key).scalar(), 3)
+            db.rollback()
+            self.assertEqual(db.query(StoredBlob).filter(StoredBlob.key == key).one().ref_count, 2)
+            self.assertFalse(storage.delete_file(key, db))
+            db.commit()
+            self.assertTrue((storage.get_local_upload_dir() / key).exists())
+            self.assertTrue(storage.delete_file(key, db))
+            db.commit()
+            self.assertIsNone(db.query(StoredBlob).filter(StoredBlob.key == key).first())
+        drain_pending_deletions()
+        self.assertFalse((storage.get_local_upload_dir() / key).exists())
+
+    def test_failed_legacy_blob_upload_releases_its_blob_reference(self):
+        headers = {"Authorization": f"Bearer {self._register_client()}"}
+        for _ in range(2):
+            response = client.post(
+                "/api/documents/upload",
+                data={"document_type": "cv"},
+                files={"file": ("legacy.pdf", b"placeholder", "application/pdf")},
+                headers=headers,
+            )
+            self.assertEqual(response.status_code, 200)
+        document_ids = [document["id"] for document in client.get("/api/documents/me", headers=headers).json()]
+        legacy_content = f"legacy cv {uuid.uuid4()}".encode()
+        with SessionLocal() as db:
+            db.query(Document).filter(Document.id.in_(document_ids)).update(
+                {"file_data": legacy_content, "file_url": None}, synchronize_session=False
+            )
+            db.commit()
+
+        original_setting = storage.STORAGE_CONTENT_ADDRESSED
+        storage.STORAGE_CONTENT_ADDRESSED = True
+        try:
+            with mock.patch.object(migrate_legacy_blobs, "put_bytes", side_effect=OSError("storage unavailable")):
+                migrated, failed = migrate_legacy_blobs.migrate_source(
+                    migrate_legacy_blobs.SOURCES["documents"], batch_size=100, workers=2, dry_run=False
+                )
+            self.assertEqual(migrated, 0)
+            self.assertGreaterEqual(failed, 2)
+            with SessionLocal() as db:
+                self.assertIsNone(db.query(StoredBlob).filter(StoredBlob.sha256 == hashlib.sha256(legacy_content).hexdigest()).first())
+                self.assertEqual(db.query(Document).filter(Document.id.in_(document_ids), Document.file_url.is_(None)).count(), 2)
+
+            migrated, failed = migrate_legacy_blobs.migrate_source(
+                migrate_legacy_blobs.SOURCES["documents"], batch_size=100, workers=2, dry_run=False
+            )
+            self.assertGreaterEqual(migrated, 2)
+        finally:
+            storage.STORAGE_CONTENT_ADDRESSED = original_setting
+
+        with SessionLocal() as db:
+            blob = db.query(StoredBlob).filter(StoredBlob.sha256 == hashlib.sha256(legacy_content).hexdigest()).one()
+            self.assertEqual(blob.ref_count, 2)
+            self.assertTrue((storage.get_local_upload_dir() / blob.key).exists())
+
+    def test_reconcile_storage_deletes_only_unreferenced_objects(self):
+        token = self._register_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        for _ in range(2):
+            response = client.post(
+                "/api/documents/upload",
+                data={"document_type": "cv"},
+                files={"file": ("cv.pdf", b"placeholder", "application/pdf")},
+                headers=headers,
+            )
+            self.assertEqual(response.status_code, 200)
+        document_ids = [document["id"] for document in client.get("/api/documents/me", headers=headers).json()]
+
+        prefix = f"reconcile_{uuid.uuid4().hex}"
+        keys = {
+            "document": f"{prefix}/document.pdf",
+            "photo": f"{prefix}/photo_1.jpg",
+            "thumbnail_64": f"{prefix}/photo_1_64.webp",
+            "thumbnail_256": f"{prefix}/photo_1_256.webp",
+            "blob": f"{prefix}/blob.pdf",
+            "pending": f"{prefix}/pending.pdf",
+            "orphan": f"{prefix}/orphan.pdf",
+            # "_" in a LIKE pattern would let this match photo_1.jpg's stem "photo_1"
+            "lookalike_thumbnail": f"{prefix}/photox1_64.webp",
+            "young_orphan": f"{prefix}/young.pdf",
+        }
+        upload_dir = storage.get_local_upload_dir()
+        for name, key in keys.items():
+            path = upload_dir / key
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(name.encode())
+            if name != "young_orphan":
+                os.utime(path, (946684800, 946684800))  # 2000-01-01, well past the grace period
+        missing_key = f"{prefix}/missing.pdf"
+
+        with SessionLocal() as db:
+            db.query(Document).filter(Document.id == document_ids[0]).update(
+                {"file_url": f"/api/uploads/{keys['document']}"}, synchronize_session=False
+            )
+            db.query(Document).filter(Document.id == document_ids[1]).update(
+                {"file_url": missing_key}, synchronize_session=False
+            )
+            client_id = db.query(Document.client_id).filter(Document.id == document_ids[0]).scalar()
+            profile = db.query(ClientProfile).filter(ClientProfile.id == client_id).one()
+            profile.profile_photo_url = keys["photo"]
+            db.add(StoredBlob(key=keys["blob"], sha256="0" * 64, size=4, ref_count=1))
+            db.add(StorageDeletion(
+                id=str(uuid.uuid4()), key=keys["pending"], attempts=0, next_attempt_at=datetime(2100, 1, 1)
+            ))
+            db.commit()
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), SessionLocal() as db:
+            stats = reconcile_storage.find_orphans(db, page_size=3, grace_cutoff=datetime(2001, 1, 1), delete=True)
+            stats.update(reconcile_storage.find_dangling_references(db, page_size=3))
+        drain_pending_deletions()
+
+        report = output.getvalue()
+        orphans = {name for name, key in keys.items() if f"ORPHAN    {key} " in report}
+        self.assertEqual(orphans, {"orphan", "lookalike_thumbnail", "young_orphan"})
+        self.assertIn(f"DANGLING  document {document_ids[1]} -> {missing_key}", report)
+        self.assertGreaterEqual(stats["queued"], 2)
+        remaining = {name for name, key in keys.items() if (upload_dir / key).exists()}
+        self.assertEqual(remaining, set(keys) - {"orphan", "lookalike_thumbnail"})
+
+        with SessionLocal() as db:
+            db.query(StorageDeletion).filter(StorageDeletion.key == keys["pending"]).delete(synchronize_session=False)
+            db.query(StoredBlob).filter(StoredBlob.key == keys["blob"]).delete(synchronize_session=False)
+            db.commit()
+
+    def test_failed_storage_deletions_are_reported_and_retried(self):
+        key = f"deletions_{uuid.uuid4().hex}/stuck.pdf"
+        path = storage.get_local_upload_dir() / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"stuck")
+        with SessionLocal() as db:
+            db.add(StorageDeletion(
+                id=str(uuid.uuid4()), key=key, attempts=storage.STORAGE_DELETION_MAX_ATTEMPTS,
+                last_error="access denied", next_attempt_at=datetime.utcnow(),
+            ))
+            db.commit()
+        drain_pending_deletions()
+        self.assertTrue(path.exists())
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), SessionLocal() as db:
+            stats = reconcile_storage.find_failed_deletions(db, page_size=10)
+            self.assertEqual(storage.reset_failed_deletions(db), stats["failed_deletions"])
+        self.assertIn(f"FAILED    {key} ({storage.STORAGE_DELETION_MAX_ATTEMPTS} attempts: access denied)", output.getvalue())
+
+        drain_pending_deletions()
+        self.assertFalse(path.exists())
+        with SessionLocal() as db:
+            self.assertEqual(db.query(StorageDeletion).filter(StorageDeletion.key == key).count(), 0)
+            # The rows that held keys during the drain are gone again
+            self.assertEqual(db.query(StoredBlob).filter(StoredBlob.ref_count == 0).count(), 0)
+
+    @unittest.skipIf(thumbnails.Image is None, "Pillow is not installed")
+    def test_profile_photo_upload_generates_thumbnails(self):
+        from io import BytesIO
+
+        token = self._register_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        image_buffer = BytesIO()
+        thumbnails.Image.new("RGB", (640, 480), (200, 30, 30)).save(image_buffer, format="PNG")
+
+        response = client.post(
+            "/api/profile/me/photo",
+            files={"file": ("me.png", image_buffer.getvalue(), "image/png")},
+            headers=headers,
+        )
+        self.assertEqual(response.status_code, 200)
+
+        profile = client.get("/api/profile/me", headers=headers).json()
+        self.assertTrue(profile["profile_photo_thumbnail_url"].endswith("_256.webp"))
+        photo_key = profile["profile_photo_url"][len("/api/uploads/"):]
+        for size in thumbnails.THUMBNAIL_SIZES:
+            thumbnail_path = storage.get_local_upload_dir() / thumbnails.thumbnail_key(photo_key, size)
+            with thumbnails.Image.open(thumbnail_path) as thumbnail:
+                self.assertEqual(thumbnail.size, (size, size))
+
+    @unittest.skipIf(async_storage.get_session is None, "aiobotocore is not installed")
+    def test_r2_async_storage_reuses_one_client(self):
+        async def exercise():
+            backend = async_storage.R2AsyncStorage()
+            first = await backend._get_client()
+            self.assertIs(await backend._get_client(), first)
+            await backend.close()
+            self.assertIsNone(backend._client)
+            reopened = await backend.open()
+            self.assertIsNot(reopened, first)
+            await backend.close()
+
+        with mock.patch.multiple(
+            storage, R2_ENDPOINT_URL="http://127.0.0.1:9", R2_ACCESS_KEY_ID="key", R2_SECRET_ACCESS_KEY="secret"
+        ):
+            asyncio.run(exercise())
+
+    def test_read_cache_evicts_least_recently_used_entries(self):
+        cache = storage.ReadCache(max_bytes=10, max_entry_bytes=6)
+        cache.put("a", b"aaaa", None)
+        cache.put("b", b"bbbb", None)
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", b"cccc", None)
+        cache.put("too-big", b"x" * 7, None)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNone(cache.get("too-big"))
+        self.assertEqual(cache.get("c"), (b"cccc", None))
+        cache.invalidate("c")
+        self.assertIsNone(cache.get("c"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 3, 1))
+        self.assertEqual(stats["size_bytes"], 4)
+
+    def test_document_download_streams_stored_file(self):
+        token = self._register_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        content = os.urandom(600 * 1024)
+
+        upload_response = client.post(
+            "/api/documents/upload",
+            data={"document_type": "cv"},
+            files={"file": ("cv.pdf", content, "application/pdf")},
+            headers=headers,
+        )
+        self.assertEqual(upload_response.status_code, 200)
+
+        download_response = client.get(f"/api/documents/download/{upload_response.json()['id']}", headers=headers)
+        self.assertEqual(download_response.status_code, 200)
+        self.assertEqual(download_response.headers["content-type"], "application/pdf")
+        self.assertEqual(download_response.content, content)
+
+    def test_blob_columns_are_only_fetched_when_the_file_is_served(self):
+        token = self._register_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        upload_response = client.post(
+            "/api/documents/upload",
+            data={"document_type": "cv"},
+            files={"file": ("legacy.pdf", b"placeholder", "application/pdf")},
+            headers=headers,
+        )
+        self.assertEqual(upload_response.status_code, 200)
+        document_id = upload_response.json()["id"]
+        legacy_content = os.urandom(256 * 1024)
+        with SessionLocal() as db:
+            db.query(Document).filter(Document.id == document_id).update({"file_data": legacy_content})
+            db.commit()
+
+        selected_columns = []
+
+        def record_columns(conn, cursor, statement, parameters, context, executemany):
+            if cursor.description:
+                selected_columns.extend(column[0] for column in cursor.description)
+
+        event.listen(engine, "after_cursor_execute", record_columns)
+        try:
+            self.assertEqual(client.get("/api/documents/me", headers=headers).status_code, 200)
+            listed_columns = list(selected_columns)
+            preview_response = client.get(f"/api/documents/{document_id}/preview", headers=headers)
+        finally:
+            event.remove(engine, "after_cursor_execute", record_columns)
+
+        self.assertTrue(listed_columns)
+        self.assertNotIn("documents_file_data", listed_columns)
+        self.assertEqual(preview_response.status_code, 200)
+        self.assertIn("documents_file_data", selected_columns)
+
+    def test_admin_client_list_fetches_only_needed_photo_blobs(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        marker = f"Blob{uuid.uuid4().hex[:8]}"
+        for _ in range(4):
+            self._register_client()
+        with SessionLocal() as db:
+            profiles = db.query(ClientProfile).order_by(ClientProfile.created_at.desc()).limit(4).all()
+            for profile in profiles:
+                profile.last_name = marker
+            profiles[0].profile_photo_data = b"legacy-photo"
+            legacy_id = profiles[0].id
+            db.commit()
+
+        blob_statements = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            if "profile_photo_data" in statement and "IS NOT NULL" not in statement:
+                blob_statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record_statement)
+        try:
+            response = client.get("/api/admin/clients", params={"search": marker}, headers=admin_headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", record_statement)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 4)
+        photos = {item["id"]: item["profile_photo_data"] for item in response.json()}
+        self.assertEqual(photos.pop(legacy_id), base64.b64encode(b"legacy-photo").decode("ascii"))
+        self.assertEqual(set(photos.values()), {None})
+        self.assertEqual(len(blob_statements), 1)
+
+    def test_admin_can_download_client_documents_as_zip(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        headers = {"Authorization": f"Bearer {self._register_client()}"}
+        cv_content = os.urandom(300 * 1024)
+        for document_type, name, content in (
+            ("cv", "cv.pdf", cv_content),
+            ("medical", "report.pdf", b"medical report"),
+            ("medical", "report.pdf", b"second medical report"),
+        ):
+            response = client.post(
+                "/api/documents/upload",
+                data={"document_type": document_type},
+                files={"file": (name, content, "application/pdf")},
+                headers=headers,
+            )
+            self.assertEqual(response.status_code, 200)
+        client_id = client.get("/api/documents/me", headers=headers).json()[0]["client_id"]
+        with SessionLocal() as db:
+            db.query(Document).filter(Document.client_id == client_id, Document.file_name == "cv.pdf").update(
+                {"file_name": "../../cv.pdf"}
+            )
+            db.commit()
+
+        response = client.get(f"/api/admin/clients/{client_id}/documents/archive", headers=admin_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/zip")
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()),
+                ["cv/cv.pdf", "medical/report (1).pdf", "medical/report.pdf"],
+            )
+            self.assertEqual(archive.read("cv/cv.pdf"), cv_content)
+            self.assertIsNone(archive.testzip())
+
+        filtered = client.get(
+            f"/api/admin/clients/{client_id}/documents/archive",
+            params={"document_type": "medical", "status": "pending"},
+            headers=admin_headers,
+        )
+        with zipfile.ZipFile(io.BytesIO(filtered.content)) as archive:
+            self.assertEqual(len(archive.namelist()), 2)
+
+        invalid = client.get(
+            f"/api/admin/clients/{client_id}/documents/archive",
+            params={"document_type": "unknown"},
+            headers=admin_headers,
+        )
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_admin_can_export_filtered_clients(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        self._register_client()
+
+        response = client.get("/api/admin/clients/export", params={"search": "test"}, headers=admin_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/csv"))
+        rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+        self.assertEqual(rows[0][:3], ["Client ID", "Serial Number", "Registration Number"])
+        self.assertGreaterEqual(len(rows), 2)
+        self.assertTrue(all(row[4] == "Test" for row in rows[1:]))
+
+        # Client-entered text that a spreadsheet would evaluate is exported as text
+        formula_headers = {"Authorization": f"Bearer {self._register_client()}"}
+        marker = uuid.uuid4().hex[:8]
+        self.assertEqual(
+            client.put("/api/profile/me", json={"last_name": f"=HYPERLINK(\"{marker}\")"}, headers=formula_headers).status_code,
+            200,
+        )
+        exported = client.get("/api/admin/clients/export", params={"search": marker}, headers=admin_headers)
+        formula_rows = list(csv.reader(io.StringIO(exported.content.decode("utf-8-sig"))))
+        self.assertEqual(len(formula_rows), 2)
+        self.assertIn(f"'=HYPERLINK(\"{marker}\")", formula_rows[1])
+
+        # XLSX cells are typed: phone numbers keep their "+" and formulas stay text
+        if exports.xlsx_export_available():
+            from openpyxl import load_workbook
+
+            phone_number = f"+2567{uuid.uuid4().int % 1_000_0000:07d}"
+            with SessionLocal() as db:
+                db.query(User).filter(User.phone_number == formula_rows[1][8]).update(
+                    {"phone_number": phone_number}, synchronize_session=False
+                )
+                db.commit()
+            workbook_response = client.get(
+                "/api/admin/clients/export", params={"search": marker, "format": "xlsx"}, headers=admin_headers
+            )
+            self.assertEqual(workbook_response.status_code, 200)
+            sheet_rows = list(load_workbook(io.BytesIO(workbook_response.content)).active.iter_rows())
+            self.assertEqual(sheet_rows[1][8].value, phone_number)
+            self.assertEqual(sheet_rows[1][6].value, f"=HYPERLINK(\"{marker}\")")
+            self.assertEqual(sheet_rows[1][6].data_type, "s")
+
+        empty = client.get("/api/admin/clients/export", params={"search": "no-such-client"}, headers=admin_headers)
+        self.assertEqual(len(list(csv.reader(io.StringIO(empty.content.decode("utf-8-sig"))))), 1)
+
+        invalid = client.get("/api/admin/clients/export", params={"format": "pdf"}, headers=admin_headers)
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_admin_can_bulk_import_clients(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        phones = [f"2568{uuid.uuid4().int % 1_000_0000:07d}" for _ in range(3)]
+        csv_content = "\n".join([
+            "first_name,last_name,phone_number,password,email",
+            f"Amina,Nakato,{phones[0]},Import123,",
+            f"Brian,Okello,{phones[1]},Import123,brian.{phones[1]}@example.com",
+            f"Carol,Auma,{phones[2]},short,",
+            f"Dup,Row,{phones[0]},Import123,",
+        ])
+
+        response = client.post(
+            "/api/admin/clients/import",
+            files={"file": ("clients.csv", csv_content.encode("utf-8"), "text/csv")},
+            headers=admin_headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        statuses = {line["row"]: line["status"] for line in lines if line["type"] == "row"}
+        self.assertEqual(statuses, {1: "created", 2: "created", 3: "invalid", 4: "duplicate"})
+        self.assertEqual(lines[-1], {"type": "summary", "total": 4, "created": 2, "invalid": 1, "duplicate": 1, "failed": 0})
+        created = [line for line in lines if line.get("status") == "created"]
+        self.assertEqual(len({line["serial_number"] for line in created}), 2)
+
+        login = client.post("/api/auth/login", json={"identifier": phones[1], "password": "Import123"})
+        self.assertEqual(login.status_code, 200)
+        self.assertTrue(login.json()["user"]["must_change_password"])
+
+        repeat = client.post(
+            "/api/admin/clients/import",
+            files={"file": ("clients.json", json.dumps([{"first_name": "A", "last_name": "B", "phone_number": phones[0], "password": "Import123"}]), "application/json")},
+            headers=admin_headers,
+        )
+        self.assertEqual(json.loads(repeat.text.splitlines()[0])["status"], "duplicate")
+
+    def test_client_numbers_stay_unique_under_parallel_creators(self):
+        def reserve(count):
+            with SessionLocal() as db:
+                numbers = reserve_client_numbers(db, count)
+                db.commit()
+                return numbers
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            batches = list(pool.map(reserve, [1, 3] * 12))
+
+        numbers = [pair for batch in batches for pair in batch]
+        self.assertEqual(len(numbers), 48)
+        serials = sorted(int(serial.rsplit("-", 1)[1]) for serial, _ in numbers)
+        registrations = sorted(int(registration.rsplit("-", 1)[1]) for _, registration in numbers)
+        self.assertEqual(serials, list(range(serials[0], serials[0] + 48)))
+        self.assertEqual(registrations, list(range(registrations[0], registrations[0] + 48)))
+
+        with SessionLocal() as db:
+            reserve_client_numbers(db, 5)
+            db.rollback()
+        next_serial = int(reserve(1)[0][0].rsplit("-", 1)[1])
+        self.assertEqual(next_serial, serials[-1] + 1)
+
+        # A new counter continues after the numerically highest issued number, past a digit boundary
+        for _ in range(2):
+            self._register_client()
+        with SessionLocal() as db:
+            profiles = db.query(ClientProfile).order_by(ClientProfile.created_at.desc()).limit(2).all()
+            profiles[0].serial_number = "SN-19990101-9999"
+            profiles[1].serial_number = "SN-19990101-10000"
+            db.flush()
+            self.assertEqual(allocate_sequence(db, "SN-19990101", 1, ClientProfile.serial_number), 10001)
+            db.rollback()
+
+    def test_deleting_a_client_removes_all_dependent_rows(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        headers = {"Authorization": f"Bearer {self._register_client()}"}
+        upload_response = client.post(
+            "/api/documents/upload",
+            data={"document_type": "cv"},
+            files={"file": ("cv.pdf", os.urandom(2048), "application/pdf")},
+            headers=headers,
+        )
+        self.assertEqual(upload_response.status_code, 200)
+        document = client.get("/api/documents/me", headers=headers).json()[0]
+        client_id = document["client_id"]
+        stored_key = document["file_url"][len("/api/uploads/"):]
+        status_response = client.put(
+            f"/api/admin/clients/{client_id}/application-status",
+            json={"status": "under_review", "notes": "checking"},
+            headers=admin_headers,
+        )
+        self.assertEqual(status_response.status_code, 200)
+
+        with SessionLocal() as db:
+            profile = db.get(ClientProfile, client_id)
+            user_id = profile.user_id
+            admin_id = db.query(User.id).filter(User.email == "admin@example.com").scalar()
+            db.add(EducationRecord(id=str(uuid.uuid4()), client_id=client_id, school_name="Makerere"))
+            db.add_all(
+                ChatMessage(id=str(uuid.uuid4()), sender_id=user_id, receiver_id=admin_id, client_id=client_id, content=f"m{i}")
+                for i in range(50)
+            )
+            db.add(AdminAuditLog(id=str(uuid.uuid4()), actor_user_id=admin_id, target_user_id=user_id, action="note"))
+            db.commit()
+
+        response = client.delete(f"/api/admin/clients/{client_id}", headers=admin_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["deleted_records"]["chat_messages"], 50)
+
+        with SessionLocal() as db:
+            self.assertIsNone(db.get(ClientProfile, client_id))
+            self.assertIsNone(db.get(User, user_id))
+            for model in (Document, ChatMessage, StatusHistory, EducationRecord):
+                self.assertEqual(db.query(model).filter(model.client_id == client_id).count(), 0)
+            self.assertEqual(db.query(AdminAuditLog).filter(AdminAuditLog.target_user_id == user_id).count(), 0)
+            self.assertEqual(db.query(StorageDeletion).filter(StorageDeletion.key == stored_key).count(), 1)
+
+    def test_admin_can_bulk_update_application_status(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        client_ids = []
+        for _ in range(3):
+            headers = {"Authorization": f"Bearer {self._register_client()}"}
+            client_ids.append(client.get("/api/profile/me", headers=headers).json()["id"])
+        client.put(
+            f"/api/admin/clients/{client_ids[0]}/application-status",
+            json={"status": "approved"},
+            headers=admin_headers,
+        )
+
+        response = client.post(
+            "/api/admin/clients/bulk-status",
+            json={"client_ids": client_ids + ["missing-client"], "status": "approved", "notes": "Batch cleared"},
+            headers=admin_headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["updated"], body["unchanged"], body["not_found"]), (2, 1, 1))
+        self.assertEqual([item["outcome"] for item in body["results"]], ["unchanged", "updated", "updated", "not_found"])
+
+        history = client.get(f"/api/admin/clients/{client_ids[1]}/status-history", headers=admin_headers).json()
+        self.assertEqual(history[0]["new_status"], "approved")
+        self.assertEqual(history[0]["notes"], "Batch cleared")
+        profile = client.get(f"/api/admin/clients/{client_ids[2]}", headers=admin_headers).json()
+        self.assertEqual(profile["application_status"], "approved")
+
+        invalid = client.post(
+            "/api/admin/clients/bulk-status",
+            json={"client_ids": client_ids, "status": "not-a-status"},
+            headers=admin_headers,
+        )
+        self.assertEqual(invalid.status_code, 400)
+
+    def _create_job(self, admin_headers, **overrides):
+        payload = {"title": "Warehouse Associate", "company_name": "Gulf Logistics", "country": "UAE"}
+        payload.update(overrides)
+        response = client.post("/api/jobs/", json=payload, headers=admin_headers)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["job_id"]
+
+    def test_admin_application_listing_uses_one_query_per_page(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        job_id = self._create_job(admin_headers)
+        for _ in range(3):
+            headers = {"Authorization": f"Bearer {self._register_client()}"}
+            self.assertEqual(client.post(f"/api/jobs/{job_id}/apply", headers=headers).status_code, 200)
+
+        statements = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        def count_statements(limit):
+            statements.clear()
+            event.listen(engine, "before_cursor_execute", record_statement)
+            try:
+                response = client.get("/api/admin/applications", params={"job_id": job_id, "limit": limit}, headers=admin_headers)
+            finally:
+                event.remove(engine, "before_cursor_execute", record_statement)
+            self.assertEqual(response.status_code, 200)
+            return len(statements), response
+
+        single_count, _ = count_statements(1)
+        page_count, page = count_statements(3)
+        self.assertEqual(single_count, page_count)
+        self.assertEqual(sum("job_opportunities" in statement for statement in statements), 1)
+        self.assertEqual(page.json()[0]["job"]["title"], "Warehouse Associate")
+        self.assertEqual(page.json()[0]["client_name"], "Test Client")
+
+        first = client.get("/api/admin/applications", params={"job_id": job_id, "limit": 2}, headers=admin_headers)
+        cursor = first.headers["X-Next-Cursor"]
+        second = client.get(
+            "/api/admin/applications",
+            params={"job_id": job_id, "limit": 2, "cursor": cursor},
+            headers=admin_headers,
+        )
+        self.assertNotIn("X-Next-Cursor", second.headers)
+        ids = [item["id"] for item in first.json() + second.json()]
+        self.assertEqual(len(set(ids)), 3)
+
+        # Without limit or cursor both listings still return every row, whatever the page size
+        with mock.patch("app.queries.APPLICATION_PAGE_SIZE", 2), mock.patch("app.queries.APPLICATION_MAX_PAGE_SIZE", 2):
+            for path in ("/api/admin/applications", "/api/jobs/admin/applications"):
+                listing = client.get(path, params={"job_id": job_id}, headers=admin_headers)
+                self.assertEqual(listing.status_code, 200)
+                self.assertEqual(len(listing.json()), 3)
+                self.assertNotIn("X-Next-Cursor", listing.headers)
+            paged = client.get("/api/admin/applications", params={"job_id": job_id, "cursor": cursor}, headers=admin_headers)
+            self.assertEqual(len(paged.json()), 1)
+
+        filtered = client.get("/api/admin/applications", params={"job_id": job_id, "status": "interview"}, headers=admin_headers)
+        self.assertEqual(filtered.json(), [])
+        invalid = client.get("/api/admin/applications", params={"cursor": "not-a-cursor"}, headers=admin_headers)
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_job_application_counters_and_applicants(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        job_id = self._create_job(admin_headers)
+        client_headers = [{"Authorization": f"Bearer {self._register_client()}"} for _ in range(3)]
+        for headers in client_headers:
+            self.assertEqual(client.post(f"/api/jobs/{job_id}/apply", headers=headers).status_code, 200)
+
+        public_job = next(item for item in client.get("/api/jobs/").json() if item["id"] == job_id)
+        self.assertNotIn("application_count", public_job)
+        self.assertNotIn("last_applied_at", public_job)
+        self.assertEqual(client.get("/api/jobs/admin/jobs", headers=client_headers[0]).status_code, 403)
+        job = next(item for item in client.get("/api/jobs/admin/jobs", headers=admin_headers).json() if item["id"] == job_id)
+        self.assertEqual(job["application_count"], 3)
+        self.assertIsNotNone(job["last_applied_at"])
+
+        first = client.get(f"/api/jobs/{job_id}/applicants", params={"limit": 2}, headers=admin_headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers["X-Total-Count"], "3")
+        with SessionLocal() as db:
+            screened = db.query(JobApplication).filter(JobApplication.job_id == job_id).first()
+            screened.application_status = ApplicationStatus.screening
+            db.commit()
+        screening = client.get(f"/api/jobs/{job_id}/applicants", params={"status": "screening"}, headers=admin_headers)
+        self.assertEqual(screening.headers["X-Total-Count"], "1")
+        self.assertEqual(len(screening.json()), 1)
+        self.assertEqual(first.json()[0]["first_name"], "Test")
+        second = client.get(
+            f"/api/jobs/{job_id}/applicants",
+            params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]},
+            headers=admin_headers,
+        )
+        self.assertEqual(len({item["client_id"] for item in first.json() + second.json()}), 3)
+        self.assertEqual(client.get("/api/jobs/missing/applicants", headers=admin_headers).status_code, 404)
+        self.assertEqual(client.get(f"/api/jobs/{job_id}/applicants", headers=client_headers[0]).status_code, 403)
+
+        client_id = second.json()[0]["client_id"]
+        self.assertEqual(client.delete(f"/api/admin/clients/{client_id}", headers=admin_headers).status_code, 200)
+        with SessionLocal() as db:
+            self.assertEqual(db.get(JobOpportunity, job_id).application_count, 2)
+
+    def test_job_application_is_idempotent(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        job_id = self._create_job(admin_headers)
+        headers = {"Authorization": f"Bearer {self._register_client()}"}
+        keyed = {**headers, "Idempotency-Key": str(uuid.uuid4())}
+
+        first = client.post(f"/api/jobs/{job_id}/apply", headers=keyed)
+        self.assertEqual(first.status_code, 200)
+        retry = client.post(f"/api/jobs/{job_id}/apply", headers=keyed)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(client.post(f"/api/jobs/{job_id}/apply", headers=headers).status_code, 400)
+
+        other_job_id = self._create_job(admin_headers)
+        self.assertEqual(client.post(f"/api/jobs/{other_job_id}/apply", headers=keyed).status_code, 200)
+
+        with SessionLocal() as db:
+            self.assertEqual(db.query(JobApplication).filter(JobApplication.job_id == job_id).count(), 1)
+            self.assertEqual(db.get(JobOpportunity, job_id).application_count, 1)
+            profile_id = db.query(JobApplication.client_id).filter(JobApplication.job_id == job_id).scalar()
+            db.add(JobApplication(id=str(uuid.uuid4()), job_id=job_id, client_id=profile_id))
+            with self.assertRaises(IntegrityError):
+                db.commit()
+
+    def test_onboarding_completion_is_stored_and_filterable(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        headers = {"Authorization": f"Bearer {self._register_client()}"}
+
+        status_response = client.get("/api/profile/me/onboarding-status", headers=headers)
+        self.assertEqual(status_response.status_code, 200)
+        self.assertEqual(status_response.json()["completion_percentage"], 13.3)
+        self.assertNotIn("first_name", status_response.json()["missing_fields"])
+        self.assertIn("nationality", status_response.json()["missing_fields"])
+        profile_id = client.get("/api/profile/me", headers=headers).json()["id"]
+        incomplete = client.get("/api/admin/clients", params={"completion_below": 50, "limit": 1000}, headers=admin_headers)
+        self.assertIn(profile_id, [row["id"] for row in incomplete.json()])
+
+        update_response = client.put(
+            "/api/profile/me/basic",
+            json={
+                "date_of_birth": "1995-04-02",
+                "gender": "female",
+                "nationality": "Ugandan",
+                "phone_primary": "256700000001",
+                "address_current": "Kampala",
+                "emergency_contact_name": "Jane",
+                "emergency_contact_phone": "256700000002",
+                "emergency_contact_relationship": "Sister",
+            },
+            headers=headers,
+        )
+        self.assertEqual(update_response.status_code, 200)
+        status_response = client.get(f"/api/admin/clients/{profile_id}/onboarding-status", headers=admin_headers)
+        self.assertTrue(status_response.json()["is_complete"])
+        self.assertEqual(status_response.json()["completion_percentage"], 66.7)
+        self.assertEqual(status_response.json()["missing_fields"], [])
+        incomplete = client.get("/api/admin/clients", params={"completion_below": 50, "limit": 1000}, headers=admin_headers)
+        self.assertNotIn(profile_id, [row["id"] for row in incomplete.json()])
+
+        # Rows from before the columns existed are backfilled in SQL to the same values
+        with engine.begin() as connection:
+            connection.execute(
+                update(ClientProfile).where(ClientProfile.id == profile_id).values(completion_percentage=None, missing_fields=None)
+            )
+            backfill_onboarding_completion(connection)
+        with SessionLocal() as db:
+            profile = db.get(ClientProfile, profile_id)
+            self.assertEqual(evaluate_onboarding(profile), (0, 66.7))
+            self.assertEqual((profile.missing_fields, profile.completion_percentage), (0, 66.7))
+
+    def test_profile_serializer_matches_response_model(self):
+        headers = {"Authorization": f"Bearer {self._register_client()}"}
+        self.assertEqual(
+            client.put("/api/profile/me/basic", json={"date_of_birth": "1990-01-31", "nationality": "Ugandan"}, headers=headers).status_code,
+            200,
+        )
+        response = client.get("/api/profile/me", headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+        with SessionLocal() as db:
+            profile = db.get(ClientProfile, response.json()["id"])
+            computed = {"user_email": None, "profile_photo_url": None, "profile_photo_thumbnail_url": None, "profile_photo_data": None}
+            legacy = {column.name: getattr(profile, column.name) for column in ClientProfile.__table__.columns}
+            expected = ClientProfileResponse.model_validate({**legacy, **computed}).model_dump(mode="json")
+            self.assertEqual(client_profile_payload(profile, **computed), expected)
+        self.assertEqual(response.json(), expected)
+
+    def test_default_response_class_encodes_with_orjson(self):
+        self.assertIs(main.app.router.default_response_class, ORJSONResponse)
+        content = {
+            "salary": Decimal("1850.50"),
+            "whole": Decimal("1200"),
+            "deadline": date(2030, 1, 31),
+            "sent_at": datetime(2030, 1, 31, 8, 30, 15, 120000),
+            "status": ClientStatus.under_review,
+            "job": JobOpportunityResponse.model_construct(id="job-1", title="Cook"),
+        }
+        decoded = json.loads(ORJSONResponse(content).body)
+        self.assertEqual(decoded["salary"], 1850.5)
+        self.assertEqual(decoded["whole"], 1200)
+        self.assertEqual(decoded["deadline"], "2030-01-31")
+        self.assertEqual(decoded["sent_at"], "2030-01-31T08:30:15.120000")
+        self.assertEqual(decoded["status"], "under_review")
+        self.assertEqual(decoded["job"]["title"], "Cook")
+
+        response = client.get("/api/health")
+        self.assertEqual(response.headers["content-type"], "application/json")
+        self.assertEqual(response.content, orjson.dumps(response.json()))
+
+    def test_responses_are_compressed_when_worthwhile(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        for index in range(3):
+            self._create_job(admin_headers, title=f"Compressed Cook {index}", requirements="Food safety certificate " * 20)
+
+        listing = client.get("/api/jobs/", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(listing.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", listing.headers["Vary"])
+        self.assertLess(int(listing.headers["Content-Length"]), len(listing.content))
+        self.assertIn("Compressed Cook 0", [job["title"] for job in listing.json()])
+        # The compressed representation gets a weak ETag, which still revalidates
+        self.assertTrue(listing.headers["ETag"].startswith('W/"'))
+        revalidated = client.get("/api/jobs/", headers={"Accept-Encoding": "gzip", "If-None-Match": listing.headers["ETag"]})
+        self.assertEqual(revalidated.status_code, 304)
+
+        identity = client.get("/api/jobs/", headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("Content-Encoding", identity.headers)
+        self.assertEqual(identity.json(), listing.json())
+        self.assertNotIn("Content-Encoding", client.get("/api/health", headers={"Accept-Encoding": "gzip"}).headers)
+
+        headers = {"Authorization": f"Bearer {self._register_client()}"}
+        upload = client.post(
+            "/api/documents/upload",
+            data={"document_type": "cv"},
+            files={"file": ("cv.pdf", b"%PDF-1.4 " + b"0" * 4096, "application/pdf")},
+            headers=headers,
+        )
+        self.assertEqual(upload.status_code, 200)
+        file_url = client.get("/api/documents/me", headers=headers).json()[0]["file_url"]
+        self.assertNotIn("Content-Encoding", client.get(file_url, headers={"Accept-Encoding": "gzip"}).headers)
+
+        self.assertEqual(negotiate_encoding("gzip;q=0, identity"), None)
+        self.assertEqual(negotiate_encoding("deflate, gzip;q=0.5"), "gzip")
+        self.assertIn(negotiate_encoding("*"), ("br", "gzip"))
+
+    def test_idempotency_key_replays_any_mutating_request(self):
+        headers = {"Authorization": f"Bearer {self._register_client()}"}
+        with SessionLocal() as db:
+            admin_id = db.query(User.id).filter(User.email == "admin@example.com").scalar()
+        keyed = {**headers, "Idempotency-Key": str(uuid.uuid4())}
+        payload = {"receiver_id": admin_id, "content": "Is my visa ready?"}
+
+        first = client.post("/api/chat/send", json=payload, headers=keyed)
+        self.assertEqual(first.status_code, 200)
+        retry = client.post("/api/chat/send", json=payload, headers=keyed)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        with SessionLocal() as db:
+            self.assertEqual(db.query(ChatMessage).filter(ChatMessage.content == "Is my visa ready?").count(), 1)
+
+        changed = client.post("/api/chat/send", json={**payload, "content": "Another"}, headers=keyed)
+        self.assertEqual(changed.status_code, 422)
+        self.assertEqual(client.post("/api/chat/send", json=payload, headers={**headers, "Idempotency-Key": ""}).status_code, 400)
+        # Client errors are final, so they are replayed too
+        failing = {**headers, "Idempotency-Key": str(uuid.uuid4())}
+        self.assertEqual(client.post("/api/chat/send", json={**payload, "receiver_id": "nobody"}, headers=failing).status_code, 404)
+        missing = client.post("/api/chat/send", json={**payload, "receiver_id": "nobody"}, headers=failing)
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(missing.headers["Idempotent-Replayed"], "true")
+
+        # Each send of a multipart body picks a new boundary; a retried upload still replays
+        upload_key = {**headers, "Idempotency-Key": str(uuid.uuid4())}
+        files = {"file": ("cv.pdf", b"%PDF-1.4 retry", "application/pdf")}
+        first_upload = client.post("/api/documents/upload", data={"document_type": "cv"}, files=files, headers=upload_key)
+        self.assertEqual(first_upload.status_code, 200)
+        retried_upload = client.post("/api/documents/upload", data={"document_type": "cv"}, files=files, headers=upload_key)
+        self.assertEqual(retried_upload.status_code, 200)
+        self.assertEqual(retried_upload.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(len(client.get("/api/documents/me", headers=headers).json()), 1)
+        other_file = {"file": ("cv.pdf", b"%PDF-1.4 other", "application/pdf")}
+        self.assertEqual(
+            client.post("/api/documents/upload", data={"document_type": "cv"}, files=other_file, headers=upload_key).status_code,
+            422,
+        )
+
+        # Login responses carry tokens, so they are never stored or replayed
+        login_key = {"Idempotency-Key": str(uuid.uuid4())}
+        credentials = {"identifier": "admin@example.com", "password": "wrong-password"}
+        for _ in range(2):
+            login = client.post("/api/auth/login", json=credentials, headers=login_key)
+            self.assertNotIn("Idempotent-Replayed", login.headers)
+
+        store = MemoryIdempotencyStore(ttl=60, max_entries=2)
+        token = store.reserve("user", "key", "POST /x")
+        self.assertIsNone(store.reserve("user", "key", "POST /x"))
+        store.complete("user", "key", "POST /x", token, StoredResponse("hash", 201, [], b"{}"))
+        self.assertEqual(store.reserve("user", "key", "POST /x").status_code, 201)
+        released = store.reserve("user", "other", "POST /x")
+        store.release("user", "other", "POST /x", released)
+        self.assertIsInstance(store.reserve("user", "other", "POST /x"), str)
+
+        # A handler running past the reservation window keeps its key; a retry still gets 409
+        slow_store = MemoryIdempotencyStore(ttl=60)
+        retries = []
+
+        async def slow_handler(scope, receive, send):
+            await asyncio.sleep(0.5)
+            retries.append(slow_store.reserve("slow-user", "slow-key", "POST /api/clients/import"))
+            await ORJSONResponse({"ok": True})(scope, receive, send)
+
+        async def run_slow_request():
+            sent = []
+
+            async def receive():
+                return {"type": "http.request", "body": b"{}", "more_body": False}
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {
+                "type": "http",
+                "method": "POST",
+                "path": "/api/clients/import",
+                "query_string": b"",
+                "headers": [
+                    (b"authorization", f"Bearer {create_access_token(data={'sub': 'slow-user'})}".encode()),
+                    (b"idempotency-key", b"slow-key"),
+                ],
+            }
+            await IdempotencyMiddleware(slow_handler, store=slow_store)(scope, receive, send)
+            return sent
+
+        with mock.patch("app.idempotency.IDEMPOTENCY_PENDING_SECONDS", 0.15):
+            sent = asyncio.run(run_slow_request())
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertEqual(retries, [None])
+        self.assertEqual(slow_store.reserve("slow-user", "slow-key", "POST /api/clients/import").status_code, 200)
+
+    def test_job_board_is_cached_and_revalidated(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        job_id = self._create_job(admin_headers, title="Cached Cook")
+
+        first = client.get("/api/jobs/")
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+        self.assertEqual(first.headers["Cache-Control"], "public, no-cache")
+        self.assertIn("Cached Cook", [job["title"] for job in first.json()])
+
+        statements = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record_statement)
+        try:
+            not_modified = client.get("/api/jobs/", headers={"If-None-Match": etag})
+        finally:
+            event.remove(engine, "before_cursor_execute", record_statement)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+        self.assertEqual(statements, [])
+
+        update_response = client.put(
+            f"/api/jobs/{job_id}",
+            json={"title": "Head Cook", "company_name": "Gulf Logistics", "country": "UAE"},
+            headers=admin_headers,
+        )
+        self.assertEqual(update_response.status_code, 200)
+        refreshed = client.get("/api/jobs/", headers={"If-None-Match": etag})
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertNotEqual(refreshed.headers["ETag"], etag)
+        self.assertIn("Head Cook", [job["title"] for job in refreshed.json()])
+
+        self.assertEqual(client.get("/api/jobs/", params={"limit": 10_000}).status_code, 422)
+        bounded = JobBoardCache(ttl=60, max_entries=2)
+        for page in range(3):
+            bounded.get_or_render(page, lambda: [page])
+        bounded.get_or_render(1, lambda: [])
+        bounded.get_or_render(3, lambda: [3])
+        self.assertEqual(bounded.stats()["entries"], 2)
+        self.assertEqual(bounded.get_or_render(1, lambda: ["rendered again"])[0], b"[1]")
+
+    def test_job_matches_are_refreshed_and_served(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        job_id = self._create_job(
+            admin_headers, title="Heavy Truck Driver", country="Bahrain", requirements="Truck licence, forklift"
+        )
+        driver_headers = {"Authorization": f"Bearer {self._register_client()}"}
+        cook_headers = {"Authorization": f"Bearer {self._register_client()}"}
+        self.assertEqual(
+            client.put("/api/profile/me", json={"position_applied_for": "Truck driver"}, headers=driver_headers).status_code,
+            200,
+        )
+        self.assertEqual(
+            client.put("/api/profile/me", json={"position_applied_for": "Pastry cook"}, headers=cook_headers).status_code,
+            200,
+        )
+        drain_pending_matches()
+
+        suggested = client.get(f"/api/admin/jobs/{job_id}/suggested-candidates", headers=admin_headers).json()
+        self.assertEqual([candidate["position_applied_for"] for candidate in suggested], ["Truck driver"])
+        driver_score = suggested[0]["match_score"]
+        self.assertGreater(driver_score, 0)
+
+        recommended = client.get("/api/jobs/recommended", headers=driver_headers).json()
+        self.assertIn(job_id, [job["id"] for job in recommended])
+        self.assertNotIn(job_id, [job["id"] for job in client.get("/api/jobs/recommended", headers=cook_headers).json()])
+
+        driver_id = suggested[0]["client_id"]
+        with SessionLocal() as db:
+            db.add(EmploymentRecord(id=str(uuid.uuid4()), client_id=driver_id, employer="Gulf Haulage", position="Driver", country="Bahrain"))
+            queue_match_refresh(db, client_ids=[driver_id])
+            db.commit()
+        drain_pending_matches()
+        rescored = client.get(f"/api/admin/jobs/{job_id}/suggested-candidates", headers=admin_headers).json()
+        self.assertGreater(rescored[0]["match_score"], driver_score)
+
+        # Deactivated clients drop out before the worker has refreshed their matches
+        with SessionLocal() as db:
+            driver_user = db.query(User).join(ClientProfile, ClientProfile.user_id == User.id).filter(ClientProfile.id == driver_id).one()
+            driver_user.is_active = False
+            db.commit()
+            self.assertEqual(client.get(f"/api/admin/jobs/{job_id}/suggested-candidates", headers=admin_headers).json(), [])
+            driver_user.is_active = True
+            db.commit()
+
+        self.assertEqual(client.post(f"/api/jobs/{job_id}/apply", headers=driver_headers).status_code, 200)
+        self.assertEqual(client.get(f"/api/admin/jobs/{job_id}/suggested-candidates", headers=admin_headers).json(), [])
+        self.assertNotIn(job_id, [job["id"] for job in client.get("/api/jobs/recommended", headers=driver_headers).json()])
+
+        rebuilt = client.post("/api/admin/jobs/matches/rebuild", headers=admin_headers)
+        self.assertEqual(rebuilt.status_code, 200)
+        self.assertGreaterEqual(rebuilt.json()["matches"], 1)
+
+    def test_job_search_filters_sorts_and_pages(self):
+        admin_headers = {"Authorization": f"Bearer {self._login_super_admin()}"}
+        marker = uuid.uuid4().hex[:8]
+        for index, salary in enumerate((500, 900, 1500)):
+            self._create_job(
+                admin_headers,
+                title=f"Search Driver {marker} {index}",
+                country="Qatar",
+                job_type="contract",
+                salary_range_min=salary - 100,
+                salary_range_max=salary,
+                requirements="Heavy vehicle licence",
+            )
+        self._create_job(admin_headers, title=f"Search Driver {marker} closed", country="Qatar", application_deadline="2020-01-01")
+        self._create_job(admin_headers, title=f"Search Nurse {marker}", country="Oman")
+
+        results = client.get("/api/jobs/search", params={"q": f"DRIVER {marker}", "country": "qatar"}).json()
+        self.assertEqual(len(results), 3)
+        licensed = client.get("/api/jobs/search", params={"q": f"{marker} licence", "salary_min": 800}).json()
+        self.assertEqual(len(licensed), 2)
+        with_closed = client.get("/api/jobs/search", params={"q": marker, "open_only": False, "job_type": "full_time"}).json()
+        self.assertEqual(sorted(job["country"] for job in with_closed), ["Oman", "Qatar"])
+
+        first = client.get("/api/jobs/search", params={"q": f"driver {marker}", "sort": "salary", "limit": 2})
+        self.assertEqual([job["salary_range_max"] for job in first.json()], [1500, 900])
+        second = client.get(
+            "/api/jobs/search",
+            params={"q": f"driver {marker}", "sort": "salary", "limit": 2, "cursor": first.headers["X-Next-Cursor"]},
+        )
+        self.assertEqual([job["salary_range_max"] for job in second.json()], [500])
+        self.assertNotIn("X-Next-Cursor", second.headers)
+
+        self.assertEqual(client.get("/api/jobs/search", params={"sort": "random"}).status_code, 400)
+        self.assertEqual(client.get("/api/jobs/search", params={"cursor": "bogus"}).status_code, 400)
+
+    def test_document_deletion_is_queued_until_after_commit(self):
+        admin_token = self._login_super_admin()
+        token = self._register_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        upload_response = client.post(
+            "/api/documents/upload",
+            data={"document_type": "medical"},
+            files={"file": ("medical.pdf", b"medical report", "application/pdf")},
+            headers=headers,
+        )
+        self.assertEqual(upload_response.status_code, 200)
+        document = client.get("/api/documents/me", headers=headers).json()[0]
+        stored_path = storage.get_local_upload_dir() / document["file_url"][len("/api/uploads/"):]
+
+        delete_response = client.delete(
+            f"/api/admin/clients/{document['client_id']}/documents/{document['id']}",
+            headers={"Authorization": f"Bearer {admin_token}"},
+        )
+        self.assertEqual(delete_response.status_code, 200)
+        self.assertTrue(stored_path.exists())
+        with SessionLocal() as db:
+            self.assertEqual(db.query(StorageDeletion).filter(StorageDeletion.key.endswith(stored_path.name)).count(), 1)
+
+        drain_pending_deletions()
+        self.assertFalse(stored_path.exists())
+        with SessionLocal() as db:
+            self.assertEqual(db.query(StorageDeletion).filter(StorageDeletion.key.endswith(stored_path.name)).count(), 0)
+
 
 if __name__ == "__main__":
     unittest.main()